@@ -1,5 +1,8 @@
 from edflow.data.dataset_mixin import DatasetMixin
+import os
+import shutil
 import warnings
+import yaml
 import pandas as pd
 import numpy as np
 
@@ -8,9 +11,16 @@ class CsvDataset(DatasetMixin):
     """Using a csv file as index, this Dataset returns only the entries in the
     csv file, but can be easily extended to load other data using the
     :class:`ProcessedDatasets`.
+
+    Parsing large csv files can take a long time. Pass ``cache=True`` to
+    convert the csv file once into memory mapped columns, which are stored
+    next to it in the same format the :class:`MetaDataset` uses for its
+    labels. Columns of strings are stored dictionary encoded. As long as the
+    csv file and the :attr:`pandas_kwargs` stay the same, all following
+    instantiations only open the memory maps.
     """
 
-    def __init__(self, csv_root, **pandas_kwargs):
+    def __init__(self, csv_root, cache=False, **pandas_kwargs):
         """
         Parameters
         ----------
@@ -18,11 +28,24 @@ class CsvDataset(DatasetMixin):
             Path/to/the/csv containing all datapoints. The
             first line in the file should contain the names for the
             attributes in the corresponding columns.
+        cache : bool or str
+            If ``True``, the columns are cached at ``<csv_root>.columns``. If a
+            string, it is used as folder for the cached columns.
         pandas_kwargs : kwargs
             Passed to :func:`pandas.read_csv` when loading the csv file.
         """
 
         self.root = csv_root
+
+        if cache:
+            if not isinstance(cache, str):
+                cache = csv_root + ".columns"
+            self.cache_root = cache
+            self.labels, self.num_examples = load_csv_columns(
+                csv_root, cache, **pandas_kwargs
+            )
+            return
+
         self.data = pd.read_csv(csv_root, **pandas_kwargs)
 
         # Stacking allows to also contain higher dimensional data in the csv
@@ -36,9 +59,157 @@ class CsvDataset(DatasetMixin):
 
             self.labels = {k: np.stack(self.data[k].values) for k in self.data}
 
+    def __len__(self):
+        if hasattr(self, "data"):
+            return len(self.data)
+        return self.num_examples
+
     def get_example(self, idx):
         """Returns all entries in row :attr:`idx` of the labels."""
 
+        if not hasattr(self, "data"):
+            # Cached columns are indexed directly.
+            return {k: v[idx] for k, v in self.labels.items()}
+
         # Labels are a pandas dataframe. `.iloc[idx]` returns the row at index
         # idx. Converting to dict results in column_name: row_entry pairs.
         return dict(self.data.iloc[idx])
+
+
+def load_csv_columns(csv_root, cache_root, **pandas_kwargs):
+    """Loads the columns of a csv file from their cached memory maps. If the
+    cache does not exist or is outdated, the csv file is converted first.
+
+    Parameters
+    ----------
+    csv_root : str
+        Path to the csv file.
+    cache_root : str
+        Folder containing the cached columns.
+    pandas_kwargs : kwargs
+        Passed to :func:`pandas.read_csv` when converting the csv file.
+
+    Returns
+    -------
+    labels : dict
+        Column name, ``np.memmap`` pairs.
+    num_examples : int
+        Number of rows.
+    """
+    # Imported here to avoid circular imports with the believers package.
+    from edflow.data.believers.meta import load_labels
+
+    source = _csv_source(csv_root, pandas_kwargs)
+
+    source_path = os.path.join(cache_root, "source.yaml")
+    cached_source = None
+    if os.path.exists(source_path):
+        with open(source_path, "r") as f:
+            cached_source = yaml.safe_load(f)
+
+    if cached_source is None or any(
+        cached_source.get(k) != v for k, v in source.items()
+    ):
+        cached_source = convert_csv(csv_root, cache_root, **pandas_kwargs)
+
+    labels = load_labels(os.path.join(cache_root, "labels"))
+    return labels, cached_source["num_examples"]
+
+
+def convert_csv(csv_root, cache_root, **pandas_kwargs):
+    """Converts all columns of a csv file to memory maps stored at
+    :attr:`cache_root`. Numeric columns are stored as is, string columns
+    dictionary encoded.
+
+    Parameters
+    ----------
+    csv_root : str
+        Path to the csv file.
+    cache_root : str
+        Folder the columns are stored in. Existing content is replaced.
+    pandas_kwargs : kwargs
+        Passed to :func:`pandas.read_csv`.
+
+    Returns
+    -------
+    source : dict
+        Description of the converted csv file, which is also stored as
+        ``source.yaml`` to check if the cache is still valid.
+    """
+    from edflow.data.believers.meta_util import store_label_mmap
+    from edflow.data.believers.meta_columns import store_categorical_label
+
+    source = _csv_source(csv_root, pandas_kwargs)
+    data = pd.read_csv(csv_root, **pandas_kwargs)
+
+    # Write everything to a temporary folder first, so that concurrent
+    # readers never see a partially converted cache.
+    tmp_root = "{}.{}.tmp".format(cache_root.rstrip(os.sep), os.getpid())
+    labels_root = os.path.join(tmp_root, "labels")
+    os.makedirs(labels_root, exist_ok=True)
+
+    for k in data:
+        if "/" in str(k) or "-*-" in str(k):
+            raise ValueError(
+                "Column `{}` can not be cached, as its name contains `/` or "
+                "`-*-`.".format(k)
+            )
+        values = np.stack(data[k].values)
+        if values.dtype.kind in "biuf":
+            store_label_mmap(values, labels_root, k)
+        elif values.dtype.kind in "OUS" and values.ndim == 1:
+            store_categorical_label(values.astype(str), labels_root, k)
+        else:
+            raise ValueError(
+                "Column `{}` of dtype {} and shape {} can not be cached.".format(
+                    k, values.dtype, values.shape
+                )
+            )
+
+    source["num_examples"] = len(data)
+    with open(os.path.join(tmp_root, "source.yaml"), "w") as f:
+        yaml.safe_dump(source, f)
+
+    # Move an outdated cache aside instead of deleting it in place, such that
+    # there is no window without a cache while it is being deleted.
+    old_root = "{}.{}.old".format(cache_root.rstrip(os.sep), os.getpid())
+    try:
+        os.rename(cache_root, old_root)
+    except OSError:
+        # No cache yet or another process has moved it already.
+        old_root = None
+
+    try:
+        os.replace(tmp_root, cache_root)
+    except OSError:
+        # Another process has been faster.
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+    if old_root is not None:
+        shutil.rmtree(old_root, ignore_errors=True)
+
+    return source
+
+
+def _csv_source(csv_root, pandas_kwargs):
+    """Identifies the state of the csv file and how it is parsed."""
+    stat = os.stat(csv_root)
+
+    def describe(value):
+        if callable(value):
+            return "{}.{}".format(
+                getattr(value, "__module__", None),
+                getattr(value, "__qualname__", repr(value)),
+            )
+        if isinstance(value, dict):
+            return {str(k): describe(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [describe(v) for v in value]
+        return repr(value)
+
+    return {
+        "csv": os.path.abspath(csv_root),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "pandas_kwargs": describe(pandas_kwargs),
+    }
@@ -0,0 +1,314 @@
+"""Vectorized queries on the labels of a dataset.
+
+Queries are evaluated chunk by chunk directly on the label arrays, such that
+memory mapped labels never need to be loaded as a whole. A query can either
+be a string or a callable:
+
+.. code-block:: python
+
+    indices = query_indices(D.labels, "partition == 0 & identity in [1, 5]")
+    indices = query_indices(D.labels, lambda l: l["partition"] == 0)
+
+String queries are python expressions, where names refer to label keys.
+Labels with keys, which are not valid python names, e.g. nested keys like
+``a/b``, can be referred to using backticks: ```a/b` > 3``. Supported are
+comparisons, ``in`` and ``not in``, arithmetic and the logical operators
+``&``, ``|``, ``~``, ``and``, ``or`` and ``not``. As in :meth:`pandas.DataFrame.query`
+``&`` and ``|`` bind weaker than comparisons.
+
+Callable queries are passed a mapping from label keys to the label chunk
+currently evaluated and must return a boolean mask for this chunk.
+"""
+
+import ast
+import hashlib
+import io
+import operator
+import os
+import re
+import tokenize
+
+import numpy as np
+
+from edflow.util import retrieve
+
+# The operators work on string arrays as well, contrary to the ufuncs.
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: np.isin,
+    ast.NotIn: lambda a, b: np.logical_not(np.isin(a, b)),
+}
+
+_BINOPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+
+_UNARYOPS = {
+    ast.Not: np.logical_not,
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+_BOOLOPS = {ast.And: np.logical_and, ast.Or: np.logical_or}
+
+_BOOL_TOKENS = {"&": "and", "|": "or", "~": "not"}
+
+
+class LabelQuery(object):
+    """A compiled query on labels. See the module documentation for the
+    query syntax."""
+
+    def __init__(self, query):
+        """
+        Parameters
+        ----------
+        query : str or Callable
+            The query as string expression or as callable accepting a mapping
+            of label chunks.
+        """
+        self.query = query
+
+        if callable(query):
+            self.names = None
+            self.tree = None
+        else:
+            self.aliases = {}
+
+            def alias(match):
+                name = "__edflow_label_{}__".format(len(self.aliases))
+                self.aliases[name] = match.group(1)
+                return name
+
+            expression = re.sub(r"`([^`]*)`", alias, query)
+            expression = _replace_bool_ops(expression)
+            self.tree = ast.parse(expression.strip(), mode="eval")
+
+            self.names = sorted(
+                set(
+                    self.aliases.get(node.id, node.id)
+                    for node in ast.walk(self.tree)
+                    if isinstance(node, ast.Name)
+                )
+            )
+
+    def __call__(self, labels):
+        """Evaluates the query.
+
+        Parameters
+        ----------
+        labels : Mapping
+            Label key, array pairs.
+
+        Returns
+        -------
+        mask : np.ndarray
+            The result of the query.
+        """
+        if self.tree is None:
+            return self.query(labels)
+        return self._eval(self.tree.body, labels)
+
+    def _eval(self, node, labels):
+        if isinstance(node, ast.BoolOp):
+            op = _BOOLOPS[type(node.op)]
+            result = self._eval(node.values[0], labels)
+            for value in node.values[1:]:
+                result = op(result, self._eval(value, labels))
+            return result
+
+        elif isinstance(node, ast.Compare):
+            result = None
+            left = self._eval(node.left, labels)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._eval(comparator, labels)
+                value = _COMPARISONS[type(op)](left, right)
+                result = value if result is None else np.logical_and(result, value)
+                left = right
+            return result
+
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            left = self._eval(node.left, labels)
+            right = self._eval(node.right, labels)
+            return _BINOPS[type(node.op)](left, right)
+
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARYOPS:
+            return _UNARYOPS[type(node.op)](self._eval(node.operand, labels))
+
+        elif isinstance(node, ast.Name):
+            key = self.aliases.get(node.id, node.id)
+            return labels[key]
+
+        elif isinstance(node, ast.Constant):
+            return node.value
+
+        elif type(node).__name__ in ["Num", "Str", "NameConstant"]:
+            # python < 3.8
+            return ast.literal_eval(node)
+
+        elif type(node).__name__ == "Index":
+            # python < 3.9
+            return self._eval(node.value, labels)
+
+        elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            values = [self._eval(e, labels) for e in node.elts]
+            if isinstance(node, ast.Tuple):
+                return tuple(values)
+            return values
+
+        elif isinstance(node, ast.Subscript):
+            value = self._eval(node.value, labels)
+            return value[self._eval(node.slice, labels)]
+
+        elif isinstance(node, ast.Slice):
+            return slice(
+                *[
+                    None if e is None else self._eval(e, labels)
+                    for e in [node.lower, node.upper, node.step]
+                ]
+            )
+
+        raise ValueError(
+            "Unsupported expression `{}` in query `{}`".format(
+                type(node).__name__, self.query
+            )
+        )
+
+    def fingerprint(self, labels, length):
+        """A string identifying the query together with the state of the
+        labels it depends on. Only string queries on memory mapped labels can
+        be fingerprinted.
+
+        Parameters
+        ----------
+        labels : dict
+            The labels the query is evaluated on.
+        length : int
+            Number of examples.
+
+        Returns
+        -------
+        fingerprint : str or None
+            A hash of the query, the number of examples and the paths,
+            modification times and sizes of all label files used in the
+            query. ``None`` if the query can not be fingerprinted.
+        """
+        if self.names is None:
+            return None
+
+        state = [self.query, str(length)]
+        for name in self.names:
+            label = retrieve(labels, name, default=None)
+            filename = getattr(label, "filename", None)
+            if filename is None:
+                return None
+            stat = os.stat(filename)
+            state += [name, filename, str(stat.st_mtime_ns), str(stat.st_size)]
+
+        return hashlib.sha1("\n".join(state).encode("utf-8")).hexdigest()
+
+
+class ChunkView(object):
+    """Mapping of label keys to slices of the corresponding labels. Labels
+    are only sliced when accessed."""
+
+    def __init__(self, labels, chunk):
+        self.labels = labels
+        self.chunk = chunk
+
+    def __getitem__(self, key):
+        try:
+            label = retrieve(self.labels, key)
+        except Exception as e:
+            raise KeyError(
+                "Label `{}` used in query not found. Available are {}".format(
+                    key, list(self.labels.keys())
+                )
+            ) from e
+        return np.asarray(label[self.chunk])
+
+    def __contains__(self, key):
+        return retrieve(self.labels, key, default=None) is not None
+
+
+def query_indices(labels, query, length, chunk_size=2 ** 20, cache_root=None):
+    """Returns all indices at which the labels fulfill :attr:`query`.
+
+    Parameters
+    ----------
+    labels : dict
+        Labels of a dataset.
+    query : str or Callable or LabelQuery
+        The query. See the module documentation.
+    length : int
+        Number of examples in the dataset.
+    chunk_size : int
+        Number of label entries evaluated at once.
+    cache_root : str
+        If given, the resulting indices are stored in this folder, keyed by
+        the query and the modification times of the label files it uses. If
+        the same query is evaluated again on unchanged labels the stored
+        indices are returned. If the folder is not writable, the indices are
+        not cached.
+
+    Returns
+    -------
+    indices : np.ndarray
+        All indices at which the query evaluates to ``True``.
+    """
+    if not isinstance(query, LabelQuery):
+        query = LabelQuery(query)
+
+    cache_path = None
+    if cache_root is not None:
+        fingerprint = query.fingerprint(labels, length)
+        if fingerprint is not None:
+            cache_path = os.path.join(cache_root, fingerprint + ".npy")
+            if os.path.exists(cache_path):
+                return np.load(cache_path, mmap_mode="r")
+
+    indices = []
+    for start in range(0, length, chunk_size):
+        stop = min(start + chunk_size, length)
+        mask = query(ChunkView(labels, slice(start, stop)))
+        mask = np.broadcast_to(np.asarray(mask, dtype=bool), [stop - start])
+        indices += [np.flatnonzero(mask) + start]
+
+    indices = np.concatenate(indices) if indices else np.zeros([0], dtype=np.int64)
+    indices = indices.astype(np.int64)
+
+    if cache_path is not None:
+        # Write to a temporary file first, so that concurrent readers never
+        # see partially written results.
+        tmp_path = "{}.{}.tmp.npy".format(cache_path[: -len(".npy")], os.getpid())
+        try:
+            os.makedirs(cache_root, exist_ok=True)
+            np.save(tmp_path, indices)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # e.g. a read only dataset, the result is still valid.
+            pass
+
+    return indices
+
+
+def _replace_bool_ops(expression):
+    """Replaces ``&``, ``|`` and ``~`` by ``and``, ``or`` and ``not``, which
+    have lower precedence than comparisons."""
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(expression).readline):
+        toknum, tokval = token[:2]
+        if toknum == tokenize.OP and tokval in _BOOL_TOKENS:
+            toknum, tokval = tokenize.NAME, _BOOL_TOKENS[tokval]
+        tokens += [(toknum, tokval)]
+    return tokenize.untokenize(tokens)
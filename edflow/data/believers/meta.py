@@ -7,6 +7,12 @@ from edflow.data.dataset_mixin import DatasetMixin
 from edflow.util import retrieve, get_obj_from_str, pp2mkdtable, pop_keypath
 from edflow.util import walk, set_value, edprint
 from edflow.data.believers.meta_loaders import image_loader, numpy_loader
+from edflow.data.believers.meta_loaders import DecodedImageCache, decoded_cache_name
+from edflow.data.believers.meta_columns import is_column_folder, load_column_folder
+from edflow.data.believers.meta_columns import ConcatenatedLabel
+from edflow.data.believers.meta_manifest import load_manifest
+from edflow.data.believers.meta_manifest import write_manifest as _write_manifest
+from edflow.data.util.label_index import LabelIndex
 
 try:
     from IPython import get_ipython
@@ -74,19 +80,78 @@ class MetaDataset(DatasetMixin):
     As we have specifed loader kweyword arguments, we will get the images with
     a support of ``[-1, 1]``.
 
+    Whole batches of examples can be loaded with :meth:`get_batch`. The image
+    loader then decodes all images of the batch on a pool of threads directly
+    into one array. The loader kwargs ``n_threads`` sets the size of the
+    pool and ``draft: true`` lets JPEG images be decoded at reduced size when
+    ``resize_to`` is given.
+
+    Set the image loader kwarg ``decoded_cache: true`` to store decoded and
+    resized images in ``root/decoded_cache``. Later epochs and runs read them
+    from there instead of decoding them again. All images must have the same
+    shape after resizing. The cache is rebuilt when the label containing the
+    images changes.
+
+    Inverted indices of labels, i.e. ``value -> indices`` lookups as used
+    e.g. by the :class:`edflow.data.dataset.RandomlyJoinedDataset`, can be
+    obtained using :meth:`get_label_index`. They are stored in the folder
+    ``root/label_indices`` and reused the next time they are requested.
+
+    Large datasets on slow storage open much faster with a manifest, which
+    lists all labels, such that the ``labels/`` folder needs not be scanned
+    and label files are only opened when accessed. See
+    :mod:`edflow.data.believers.meta_manifest`.
+
+    Datasets split into several shards with the same labels, e.g. stored on
+    different disks, can be combined into one dataset by passing a list of
+    roots or by listing the shards in the ``meta.yaml`` of a root folder:
+
+    .. code-block:: yaml
+
+        description: All our data
+        shards:
+            - /disk1/data_part1
+            - part2  # relative to the root
+
+    Each shard is a :class:`MetaDataset` itself and loads its examples with
+    its own loaders. The labels of all shards are concatenated lazily.
     """
 
-    def __init__(self, root):
+    def __init__(self, root, write_manifest=False):
         """
         Parameters
         ----------
-        root : str
-            Where to look for all the data.
+        root : str or list(str)
+            Where to look for all the data. If a list, each entry is the root
+            of a shard.
+        write_manifest : bool
+            If ``True`` and there is no up to date manifest, one is written,
+            which speeds up the next construction of the dataset. See
+            :mod:`edflow.data.believers.meta_manifest`.
         """
+        self.shards = None
+
+        if isinstance(root, (list, tuple)):
+            self.root = None
+            self._setup_shards(root, write_manifest)
+            self.meta = self.shards[0].meta
+            return
+
+        self.root = root
         meta_path = os.path.join(root, "meta.yaml")
         self.meta = meta = yaml.safe_load(open(meta_path, "r"))
 
-        labels = load_labels(os.path.join(root, "labels"))
+        if "shards" in meta:
+            shard_roots = [os.path.join(root, r) for r in meta["shards"]]
+            self._setup_shards(shard_roots, write_manifest)
+            return
+
+        labels = load_manifest(root)
+        if labels is None and write_manifest:
+            _write_manifest(root)
+            labels = load_manifest(root)
+        if labels is None:
+            labels = load_labels(os.path.join(root, "labels"))
         self.loaders, self.loader_kwargs = setup_loaders(labels, meta)
         self.labels = clean_keys(labels, self.loaders)
 
@@ -112,8 +177,59 @@ class MetaDataset(DatasetMixin):
 
         self.num_examples = L.l
 
+        self.decoded_caches = {}
+        for key, kwargs in self.loader_kwargs.items():
+            if kwargs.get("decoded_cache", False):
+                kwargs = dict(kwargs)
+                del kwargs["decoded_cache"]
+                self.loader_kwargs[key] = kwargs
+
+                name = decoded_cache_name(
+                    key, kwargs.get("resize_to"), kwargs.get("draft", False)
+                )
+                self.decoded_caches[key] = DecodedImageCache(
+                    os.path.join(root, "decoded_cache", name),
+                    self.num_examples,
+                    source=_label_source(self.labels.get(key + "_")),
+                )
+
+        self.append_labels = True
+
+    def _setup_shards(self, roots, write_manifest):
+        """Loads all shards and concatenates their labels."""
+        if len(roots) == 0:
+            raise ValueError("At least one shard is needed.")
+
+        self.shards = [MetaDataset(r, write_manifest=write_manifest) for r in roots]
+        for shard in self.shards:
+            shard.append_labels = False
+        self.shard_offsets = np.cumsum([0] + [len(shard) for shard in self.shards])
+
+        def concatenate(key, label):
+            parts = []
+            for shard in self.shards:
+                part = retrieve(shard.labels, key, default=None)
+                if part is None:
+                    raise ValueError(
+                        f"Label {key} is missing in shard {shard.root}. All "
+                        "shards must have the same labels."
+                    )
+                parts += [part]
+            return ConcatenatedLabel(parts)
+
+        self.labels = walk(self.shards[0].labels, concatenate, pass_key=True)
+        self.loaders = self.shards[0].loaders
+        self.loader_kwargs = self.shards[0].loader_kwargs
+        self.decoded_caches = {}
+        self.num_examples = int(self.shard_offsets[-1])
+
         self.append_labels = True
 
+    def _locate(self, indices):
+        """Returns the shard and the index inside the shard of each index."""
+        shards = np.searchsorted(self.shard_offsets, indices, side="right") - 1
+        return shards, indices - self.shard_offsets[shards]
+
     def __len__(self):
         return self.num_examples
 
@@ -125,14 +241,152 @@ class MetaDataset(DatasetMixin):
         idx : int
             The index of the example to load
         """
+        if self.shards is not None:
+            if idx < 0:
+                idx += len(self)
+            shard, local_idx = self._locate(idx)
+            return self.shards[shard].get_example(int(local_idx))
+
         example = {}
 
         for key, loader in self.loaders.items():
             kwargs = self.loader_kwargs[key]
+            if key in self.decoded_caches:
+                kwargs = dict(kwargs, cache=self.decoded_caches[key], index=idx)
             example[key] = loader(self.labels[key + "_"][idx], **kwargs)
 
         return example
 
+    def get_batch(self, indices):
+        """Loads the examples at :attr:`indices` at once. Loaders providing a
+        ``batch_loader``, like the ``image`` loader, load the data of all
+        examples in one call, e.g. decoding images on a thread pool.
+
+        Parameters
+        ----------
+        indices : list(int)
+            The indices of the examples to load.
+
+        Returns
+        -------
+        batch : dict
+            Like an example, but all values are stacked along a new first
+            axis. Contains the ``index_`` and, if :attr:`append_labels` is
+            ``True``, the ``labels_`` of all examples.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+
+        if self.shards is not None:
+            batch = self._get_sharded_batch(indices)
+        else:
+            batch = self._get_batch(indices)
+
+        batch["index_"] = indices
+        if self.append_labels:
+            batch["labels_"] = walk(self.labels, lambda label: label[indices])
+
+        return batch
+
+    def _get_batch(self, indices):
+        batch = {}
+        for key, loader in self.loaders.items():
+            kwargs = self.loader_kwargs[key]
+            values = self.labels[key + "_"][indices]
+
+            cache = self.decoded_caches.get(key)
+
+            batch_loader = getattr(loader, "batch_loader", None)
+            if batch_loader is not None:
+                if cache is not None:
+                    kwargs = dict(kwargs, cache=cache, indices=indices)
+                batch[key] = batch_loader(values, **kwargs)
+            else:
+                examples = []
+                for idx, value in zip(indices, values):
+                    kwargs_ = kwargs
+                    if cache is not None:
+                        kwargs_ = dict(kwargs, cache=cache, index=idx)
+                    example = loader(value, **kwargs_)
+                    if callable(example):
+                        example = example()
+                    examples += [example]
+                batch[key] = np.stack(examples)
+
+        return batch
+
+    def _get_sharded_batch(self, indices):
+        """Loads the examples of each shard with one batch per shard."""
+        shards, local_indices = self._locate(indices)
+
+        selections = []
+        shard_batches = []
+        for shard in np.unique(shards):
+            selection = shards == shard
+            selections += [selection]
+            shard_batches += [self.shards[shard]._get_batch(local_indices[selection])]
+
+        batch = {}
+        for key in shard_batches[0]:
+            values = [shard_batch[key] for shard_batch in shard_batches]
+            dtype = np.result_type(*[v.dtype for v in values])
+            batch[key] = np.empty((len(indices),) + values[0].shape[1:], dtype=dtype)
+            for selection, v in zip(selections, values):
+                batch[key][selection] = v
+        return batch
+
+    def get_label_index(self, key):
+        """Returns a :class:`LabelIndex` of the labels at :attr:`key`. The
+        index is built once and stored next to the labels in the folder
+        ``root/label_indices``, together with the size and modification time
+        of the label files it was built from. If the root is not writable,
+        the index is only kept in memory.
+
+        Parameters
+        ----------
+        key : str
+            Key of a one dimensional label.
+
+        Returns
+        -------
+        LabelIndex
+            The inverted index of the label values.
+        """
+        labels = retrieve(self.labels, key)
+        source = _label_source(labels)
+        if self.root is None or source is None:
+            return LabelIndex(labels)
+
+        index_root = os.path.join(self.root, "label_indices", key)
+        source_path = os.path.join(index_root, "source.txt")
+
+        if LabelIndex.exists(index_root) and os.path.exists(source_path):
+            with open(source_path) as f:
+                stored_source = f.read()
+            label_index = LabelIndex.load(index_root)
+            if stored_source == source and label_index.n_indices == len(self):
+                return label_index
+
+        label_index = LabelIndex(labels)
+        try:
+            if os.path.exists(source_path):
+                os.remove(source_path)
+            label_index.save(index_root)
+            # Written last, such that partially saved indices are not used.
+            with open(source_path, "w") as f:
+                f.write(source)
+        except OSError:
+            # e.g. a read only dataset
+            pass
+
+        return label_index
+
+    def where(self, query, chunk_size=2 ** 20, cache_root=None):
+        """See :meth:`edflow.data.dataset_mixin.DatasetMixin.where`. By
+        default the resulting indices are cached in ``root/query_cache``."""
+        if cache_root is None and self.root is not None:
+            cache_root = os.path.join(self.root, "query_cache")
+        return super().where(query, chunk_size=chunk_size, cache_root=cache_root)
+
     def __repr__(self):
         if (
             __COULD_HAVE_IPYTHON__
@@ -229,6 +483,23 @@ def setup_loaders(labels, meta_dict):
     return loaders, loader_kwargs
 
 
+def _label_source(label):
+    """Describes the files a label is stored in by their path, size and
+    modification time. Returns ``None`` for labels not stored in files."""
+    parts = getattr(label, "parts", None)
+    if parts is not None:
+        sources = [_label_source(part) for part in parts]
+        if any(source is None for source in sources):
+            return None
+        return "\n".join(sources)
+
+    filename = getattr(label, "filename", None)
+    if filename is None:
+        return None
+    stat = os.stat(filename)
+    return "{} {} {}".format(filename, stat.st_size, stat.st_mtime_ns)
+
+
 def load_labels(root):
     """
     Parameters
@@ -239,38 +510,86 @@ def load_labels(root):
     Returns
     -------
     labels : dict
-        All labels as ``np.memmap`` s.
+        All labels as ``np.memmap`` s. Columns stored in special formats,
+        like dictionary encoded strings, are loaded as array like objects
+        (see :mod:`edflow.data.believers.meta_columns`).
+    """
+
+    labels = {}
+    for entry in list_label_files(root):
+        if entry["format"] == "memmap":
+            label = np.memmap(
+                entry["path"], mode="c", shape=entry["shape"], dtype=entry["dtype"]
+            )
+        else:
+            label = load_column_folder(entry["path"])
+
+        set_value(labels, entry["key"], label)
+
+    return labels
+
+
+def list_label_files(root):
+    """Finds all label files below :attr:`root` and parses their names.
+
+    Parameters
+    ----------
+    root : str
+        Where to look for the labels.
+
+    Returns
+    -------
+    entries : list(dict)
+        One ``dict`` per label with the ``key`` it is stored at, the
+        ``path`` to its file, its ``format`` (``memmap`` or one of the formats
+        in :mod:`edflow.data.believers.meta_columns`), its ``shape`` and its
+        ``dtype``. The ``dtype`` of special formats is ``None``.
     """
 
     regex = re.compile(r".*-\*-.*-\*-.*\.npy")
 
     label_files = _get_label_files(root)
 
-    class Loader:
+    class Lister:
         def __init__(self):
-            self.labels = {}
+            self.entries = []
 
         def __call__(self, key_path, path):
-            if isinstance(path, str) and regex.match(path):
+            if not isinstance(path, str):
+                return
+
+            if is_column_folder(path):
+                key_, shape, format_ = os.path.basename(path).split("-*-")
+                dtype = None
+            elif regex.match(path):
                 f = os.path.basename(path)
                 f_ = f[: -len(".npy")]
                 key_, shape, dtype = f_.split("-*-")
-                shape = tuple([int(s) for s in shape.split("x")])
-
-                key_path = key_path.split("/")
-                if len(key_path) == 1:
-                    key = key_
-                else:
-                    key = "/".join(key_path[:-1] + [key_])
-
-                mmap = np.memmap(path, mode="c", shape=shape, dtype=dtype)
-
-                set_value(self.labels, key, mmap)
+                format_ = "memmap"
+            else:
+                return
+            shape = tuple([int(s) for s in shape.split("x")])
 
-    L = Loader()
+            key_path = key_path.split("/")
+            if len(key_path) == 1:
+                key = key_
+            else:
+                key = "/".join(key_path[:-1] + [key_])
+
+            self.entries += [
+                {
+                    "key": key,
+                    "path": path,
+                    "format": format_,
+                    "shape": shape,
+                    "dtype": dtype,
+                }
+            ]
+
+    L = Lister()
     walk(label_files, L, pass_key=True)
 
-    return L.labels
+    return L.entries
 
 
 def clean_keys(labels, loaders):
@@ -333,7 +652,9 @@ def _get_label_files(root):
 
         name_ = os.path.basename(path)
 
-        if os.path.isdir(path):
+        if is_column_folder(path):
+            d = path
+        elif os.path.isdir(path):
             for name in os.listdir(path):
                 d[name] = f(os.path.join(path, name), regex)
         else:
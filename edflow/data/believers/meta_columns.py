@@ -0,0 +1,827 @@
+"""Label columns, which are not stored as a single memory map.
+
+Besides plain memory maps the :class:`MetaDataset` can load label columns
+stored in special formats. Each such column is a folder in the labels
+directory, which follows the naming scheme ``name-*-{shape}-*-{format}``
+and contains the memory maps making up the column:
+
+- ``category``: Dictionary encoded values, e.g. strings with few unique
+  values. The folder contains the ``codes`` of all entries and the
+  ``categories`` the codes refer to.
+- ``utf8``: Variable length strings, e.g. paths, stored as one UTF-8
+  encoded ``data`` blob and the ``offsets`` of each string in it, which
+  needs far less space than fixed width unicode arrays. Entries are
+  returned as ``str``.
+- ``packed``: Variable length binary data, e.g. encoded images, packed into
+  a single ``blob`` file. The ``offsets`` and ``lengths`` of each entry
+  locate its bytes in the blob. Entries are returned as ``np.uint8`` views
+  into the memory mapped blob, such that reading an entry needs no file
+  system access. The ``image`` loader accepts them in place of a path.
+
+.. code-block:: bash
+
+    labels/
+    ├ identity-*-10000-*-category/
+    │  ├ codes-*-10000-*-int32.npy
+    │  └ categories-*-42-*-<U12.npy
+    ├ name-*-10000-*-utf8/
+    │  ├ offsets-*-10001-*-int64.npy
+    │  └ data-*-654321-*-uint8.npy
+    ├ image:image-*-10000-*-packed/
+    │  ├ offsets-*-10000-*-int64.npy
+    │  ├ lengths-*-10000-*-int64.npy
+    │  └ blob-*-123456789-*-uint8.npy
+    └ attr1-*-10000-*-int64.npy
+
+Existing columns of image paths can be packed using :func:`pack_column`
+and existing unicode labels can be converted to ``utf8`` or ``category``
+columns using :func:`convert_string_labels`. The original labels are moved
+to the folder ``original_labels`` in both cases. Both are available from
+the command line:
+
+.. code-block:: bash
+
+    python -m edflow.data.believers.meta_columns pack path/to/dataset image
+    python -m edflow.data.believers.meta_columns strings path/to/dataset
+"""
+
+import os
+import re
+import shutil
+import operator
+import numpy as np
+from concurrent import futures
+
+from edflow.data.believers.meta_util import store_label_mmap
+
+
+COLUMN_FORMATS = ["category", "utf8", "packed"]
+
+
+class ArrayOperatorsMixin(object):
+    """Elementwise operators and numpy ufuncs for array like labels, such
+    that e.g. ``labels[k] == value`` works as for numpy arrays. They are
+    computed on the array returned by :meth:`_as_array`."""
+
+    def _as_array(self):
+        return np.asarray(self)
+
+    def _apply(self, op, other):
+        """Computes ``op(self, other)`` for the binary operator :attr:`op`."""
+        return op(self._as_array(), other)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        def unwrap(x):
+            return x._as_array() if isinstance(x, ArrayOperatorsMixin) else x
+
+        inputs = [unwrap(x) for x in inputs]
+        if "out" in kwargs:
+            kwargs["out"] = tuple(unwrap(x) for x in kwargs["out"])
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def _binary(op):
+        def method(self, other):
+            if isinstance(other, ArrayOperatorsMixin):
+                other = other._as_array()
+            return self._apply(op, other)
+
+        return method
+
+    def _reflected(op):
+        def method(self, other):
+            return op(other, self._as_array())
+
+        return method
+
+    def _unary(op):
+        def method(self):
+            return op(self._as_array())
+
+        return method
+
+    # Python operators instead of ufuncs, as numpy does not compare strings
+    # with ufuncs.
+    __eq__ = _binary(operator.eq)
+    __ne__ = _binary(operator.ne)
+    __lt__ = _binary(operator.lt)
+    __le__ = _binary(operator.le)
+    __gt__ = _binary(operator.gt)
+    __ge__ = _binary(operator.ge)
+    __add__ = _binary(operator.add)
+    __radd__ = _reflected(operator.add)
+    __sub__ = _binary(operator.sub)
+    __rsub__ = _reflected(operator.sub)
+    __mul__ = _binary(operator.mul)
+    __rmul__ = _reflected(operator.mul)
+    __truediv__ = _binary(operator.truediv)
+    __rtruediv__ = _reflected(operator.truediv)
+    __floordiv__ = _binary(operator.floordiv)
+    __rfloordiv__ = _reflected(operator.floordiv)
+    __mod__ = _binary(operator.mod)
+    __rmod__ = _reflected(operator.mod)
+    __pow__ = _binary(operator.pow)
+    __rpow__ = _reflected(operator.pow)
+    __and__ = _binary(operator.and_)
+    __rand__ = _reflected(operator.and_)
+    __or__ = _binary(operator.or_)
+    __ror__ = _reflected(operator.or_)
+    __xor__ = _binary(operator.xor)
+    __rxor__ = _reflected(operator.xor)
+    __neg__ = _unary(operator.neg)
+    __pos__ = _unary(operator.pos)
+    __abs__ = _unary(operator.abs)
+    __invert__ = _unary(operator.invert)
+
+    del _binary, _reflected, _unary
+
+
+class CategoricalColumn(ArrayOperatorsMixin):
+    """A dictionary encoded label column. Indexing it works like indexing a
+    numpy array and returns the decoded values."""
+
+    def __init__(self, codes, categories):
+        """
+        Parameters
+        ----------
+        codes : np.ndarray
+            For each entry the index of its value in :attr:`categories`.
+        categories : np.ndarray
+            All unique values.
+        """
+        self.codes = codes
+        self.categories = categories
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def dtype(self):
+        return self.categories.dtype
+
+    @property
+    def ndim(self):
+        return self.codes.ndim
+
+    @property
+    def filename(self):
+        """The file storing the codes. Allows to fingerprint the column."""
+        return getattr(self.codes, "filename", None)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, idx):
+        return self.categories[self.codes[idx]]
+
+    def __array__(self, dtype=None):
+        values = self.categories[np.asarray(self.codes)]
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __eq__(self, other):
+        if np.ndim(other) == 0 and not isinstance(other, ArrayOperatorsMixin):
+            # Only the categories are compared.
+            return (self.categories == other)[np.asarray(self.codes)]
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        return ~(self == other)
+
+    def __iter__(self):
+        for code in self.codes:
+            yield self.categories[code]
+
+    def __repr__(self):
+        return "CategoricalColumn(n={}, categories={})".format(
+            len(self), len(self.categories)
+        )
+
+    @classmethod
+    def from_folder(cls, path):
+        """Loads the column stored in the folder at :attr:`path`."""
+        arrays = _load_folder(path)
+        return cls(arrays["codes"], arrays["categories"])
+
+
+class StringColumn(ArrayOperatorsMixin):
+    """A column of variable length strings stored as UTF-8 encoded blob.
+    Indexing it works like indexing a numpy array of strings."""
+
+    def __init__(self, offsets, data):
+        """
+        Parameters
+        ----------
+        offsets : np.ndarray
+            Start of each string in :attr:`data` plus the end of the last
+            string. Has one entry more than the column.
+        data : np.ndarray
+            All UTF-8 encoded strings concatenated as ``np.uint8`` array.
+        """
+        self.offsets = offsets
+        self.data = data
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    @property
+    def dtype(self):
+        """Unicode dtype wide enough for all strings. The number of bytes of
+        the longest string bounds its number of characters."""
+        if not hasattr(self, "_dtype"):
+            lengths = np.diff(np.asarray(self.offsets))
+            width = max(1, int(lengths.max())) if len(lengths) > 0 else 1
+            self._dtype = np.dtype("<U{}".format(width))
+        return self._dtype
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def filename(self):
+        """The file storing the offsets. Allows to fingerprint the column."""
+        return getattr(self.offsets, "filename", None)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _decode(self, start, stop):
+        return self.data[start:stop].tobytes().decode("utf-8")
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            if idx < 0:
+                idx += len(self)
+            return self._decode(self.offsets[idx], self.offsets[idx + 1])
+
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step == 1:
+                # Only the needed offsets are read.
+                offsets = np.asarray(self.offsets[start : max(start, stop) + 1])
+                starts, stops = offsets[:-1], offsets[1:]
+                shape = starts.shape
+            else:
+                idx = np.arange(start, stop, step)
+        if not isinstance(idx, slice):
+            indices = np.asarray(idx)
+            if indices.dtype == bool:
+                indices = np.flatnonzero(indices)
+            indices = indices.astype(np.int64, copy=False)
+            indices = np.where(indices < 0, indices + len(self), indices)
+            starts = np.asarray(self.offsets[indices])
+            stops = np.asarray(self.offsets[indices + 1])
+            shape = indices.shape
+
+        if starts.size == 0:
+            return np.zeros(shape, dtype="<U1")
+        strings = [
+            self._decode(a, b) for a, b in zip(starts.reshape(-1), stops.reshape(-1))
+        ]
+        return np.array(strings).reshape(shape)
+
+    def __array__(self, dtype=None):
+        values = self[:]
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return "StringColumn(n={}, bytes={})".format(len(self), len(self.data))
+
+    @classmethod
+    def from_folder(cls, path):
+        """Loads the column stored in the folder at :attr:`path`."""
+        arrays = _load_folder(path)
+        return cls(arrays["offsets"], arrays["data"])
+
+
+class PackedColumn(object):
+    """A column of variable length binary entries packed into one memory
+    mapped blob. Indexing it returns ``np.uint8`` views into the blob."""
+
+    def __init__(self, offsets, lengths, blob):
+        """
+        Parameters
+        ----------
+        offsets : np.ndarray
+            Start of each entry in :attr:`blob`.
+        lengths : np.ndarray
+            Number of bytes of each entry.
+        blob : np.ndarray
+            All entries concatenated as ``np.uint8`` array.
+        """
+        self.offsets = offsets
+        self.lengths = lengths
+        self.blob = blob
+
+    @property
+    def shape(self):
+        return self.offsets.shape
+
+    @property
+    def dtype(self):
+        return np.dtype(object)
+
+    @property
+    def ndim(self):
+        return self.offsets.ndim
+
+    @property
+    def filename(self):
+        """The file storing the offsets. Allows to fingerprint the column."""
+        return getattr(self.offsets, "filename", None)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)) and self.offsets.ndim == 1:
+            start = int(self.offsets[idx])
+            return self.blob[start : start + int(self.lengths[idx])]
+
+        offsets = np.asarray(self.offsets[idx])
+        lengths = np.asarray(self.lengths[idx])
+        if offsets.ndim == 0:
+            start = int(offsets)
+            return self.blob[start : start + int(lengths)]
+        entries = np.empty(offsets.shape, dtype=object)
+        for pos in np.ndindex(*offsets.shape):
+            start = int(offsets[pos])
+            entries[pos] = self.blob[start : start + int(lengths[pos])]
+        return entries
+
+    def __array__(self, dtype=None):
+        return self[np.arange(len(self))]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return "PackedColumn(n={}, bytes={})".format(len(self), len(self.blob))
+
+    @classmethod
+    def from_folder(cls, path):
+        """Loads the column stored in the folder at :attr:`path`."""
+        arrays = _load_folder(path)
+        return cls(arrays["offsets"], arrays["lengths"], arrays["blob"])
+
+
+class ConcatenatedLabel(ArrayOperatorsMixin):
+    """Presents several labels as one, concatenated along the first axis,
+    without copying them. Used for labels of sharded datasets. Operators with
+    scalars are applied part by part."""
+
+    def __init__(self, parts):
+        """
+        Parameters
+        ----------
+        parts : list
+            The array like labels to concatenate. All must have the same
+            shape except for the first axis.
+        """
+        self.parts = list(parts)
+        self.offsets = np.cumsum([0] + [len(p) for p in self.parts])
+
+        shapes = set(tuple(p.shape[1:]) for p in self.parts)
+        if len(shapes) != 1:
+            raise ValueError(
+                "Can not concatenate labels of shapes {}".format(
+                    [p.shape for p in self.parts]
+                )
+            )
+
+    @property
+    def shape(self):
+        return (int(self.offsets[-1]),) + tuple(self.parts[0].shape[1:])
+
+    @property
+    def dtype(self):
+        return np.result_type(*[np.dtype(p.dtype) for p in self.parts])
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def filename(self):
+        return None
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def locate(self, indices):
+        """Returns the part and the index inside the part for each index."""
+        parts = np.searchsorted(self.offsets, indices, side="right") - 1
+        return parts, indices - self.offsets[parts]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            if idx < 0:
+                idx += len(self)
+            if not 0 <= idx < len(self):
+                raise IndexError(
+                    "index {} is out of bounds for label of length {}".format(
+                        idx, len(self)
+                    )
+                )
+            part, local = self.locate(idx)
+            return self.parts[part][local]
+
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step == 1:
+                return self._slice(start, stop)
+            indices = np.arange(start, stop, step)
+        else:
+            indices = np.asarray(idx)
+            if indices.dtype == bool:
+                indices = np.flatnonzero(indices)
+            indices = np.where(indices < 0, indices + len(self), indices)
+            if np.any((indices < 0) | (indices >= len(self))):
+                raise IndexError(
+                    "index out of bounds for label of length {}".format(len(self))
+                )
+
+        flat = indices.reshape(-1)
+        parts, local = self.locate(flat)
+
+        # The values are gathered from the parts, such that their dtype is
+        # the one of the gathered values, e.g. for columns of strings.
+        pieces = []
+        positions = []
+        for part in np.unique(parts):
+            selection = np.flatnonzero(parts == part)
+            pieces += [np.asarray(self.parts[part][local[selection]])]
+            positions += [selection]
+        if len(pieces) == 0:
+            return np.empty(indices.shape + self.shape[1:], dtype=self.dtype)
+
+        gathered = np.concatenate(pieces)
+        values = np.empty_like(gathered)
+        values[np.concatenate(positions)] = gathered
+        return values.reshape(indices.shape + self.shape[1:])
+
+    def _slice(self, start, stop):
+        """Concatenates the slices ``[start:stop]`` of all parts overlapping
+        the range."""
+        first, last = np.searchsorted(self.offsets, [start, stop], side="right") - 1
+
+        pieces = []
+        for part in range(first, min(last, len(self.parts) - 1) + 1):
+            offset = self.offsets[part]
+            a = max(start - offset, 0)
+            b = min(stop - offset, len(self.parts[part]))
+            if b > a:
+                pieces += [np.asarray(self.parts[part][a:b])]
+        if len(pieces) == 0:
+            return np.empty((0,) + self.shape[1:], dtype=self.dtype)
+        return np.concatenate(pieces)
+
+    def _apply(self, op, other):
+        if np.ndim(other) != 0:
+            return op(self._as_array(), other)
+        return np.concatenate([np.asarray(op(p, other)) for p in self.parts])
+
+    def __array__(self, dtype=None):
+        values = np.concatenate([np.asarray(p) for p in self.parts])
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __iter__(self):
+        for part in self.parts:
+            for value in part:
+                yield value
+
+    def __repr__(self):
+        return "ConcatenatedLabel(shape={}, parts={})".format(
+            self.shape, len(self.parts)
+        )
+
+
+COLUMN_CLASSES = {
+    "category": CategoricalColumn,
+    "utf8": StringColumn,
+    "packed": PackedColumn,
+}
+
+
+def store_categorical_label(data, root, name):
+    """Stores the values in :attr:`data` dictionary encoded, such that they
+    can be loaded by the :class:`MetaDataset` as :class:`CategoricalColumn`.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The values to store. Must be one dimensional.
+    root : str
+        Where to store the column.
+    name : str
+        The name of the column. If loaded by :class:`MetaDataset` this will
+        be the key in the labels dictionary at which one can find the data.
+
+    Returns
+    -------
+    path : str
+        The folder containing the column.
+    """
+    data = np.asarray(data)
+    if data.ndim != 1:
+        raise ValueError(
+            "Only one dimensional data can be stored as categories, but "
+            "data has shape {}".format(data.shape)
+        )
+
+    categories, codes = np.unique(data, return_inverse=True)
+    codes = codes.astype(_smallest_int(len(categories)))
+
+    path = os.path.join(root, "{}-*-{}-*-category".format(name, len(data)))
+    os.makedirs(path, exist_ok=True)
+
+    store_label_mmap(codes, path, "codes")
+    store_label_mmap(categories, path, "categories")
+
+    return path
+
+
+def store_string_label(data, root, name):
+    """Stores the strings in :attr:`data` UTF-8 encoded, such that they can
+    be loaded by the :class:`MetaDataset` as :class:`StringColumn`.
+
+    Parameters
+    ----------
+    data : list(str)
+        The strings to store.
+    root : str
+        Where to store the column.
+    name : str
+        The name of the column.
+
+    Returns
+    -------
+    path : str
+        The folder containing the column.
+    """
+    encoded = [str(value).encode("utf-8") for value in data]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    path = os.path.join(root, "{}-*-{}-*-utf8".format(name, len(encoded)))
+    os.makedirs(path, exist_ok=True)
+
+    store_label_mmap(offsets, path, "offsets")
+    if len(blob) > 0:
+        store_label_mmap(blob, path, "data")
+    else:
+        open(os.path.join(path, "data-*-0-*-uint8.npy"), "wb").close()
+
+    return path
+
+
+def convert_string_labels(root, category_ratio=0.1):
+    """Converts all unicode labels of the :class:`MetaDataset` at
+    :attr:`root` into :class:`StringColumn` s or, if they contain few unique
+    values, :class:`CategoricalColumn` s. The original labels are moved to the
+    folder ``root/original_labels``.
+
+    Parameters
+    ----------
+    root : str
+        Root of the dataset.
+    category_ratio : float
+        Labels with at most ``category_ratio * len(label)`` unique values are
+        stored dictionary encoded as categories.
+
+    Returns
+    -------
+    paths : list(str)
+        The folders containing the converted columns.
+    """
+    # Imported here to avoid circular imports.
+    from edflow.data.believers.meta import list_label_files
+
+    labels_root = os.path.join(root, "labels")
+
+    paths = []
+    for entry in list_label_files(labels_root):
+        if entry["format"] != "memmap" or np.dtype(entry["dtype"]).kind != "U":
+            continue
+        if len(entry["shape"]) != 1:
+            continue
+
+        values = np.memmap(
+            entry["path"], mode="r", shape=entry["shape"], dtype=entry["dtype"]
+        )
+        name = os.path.basename(entry["path"]).split("-*-")[0]
+        column_root = os.path.dirname(entry["path"])
+
+        n_unique = len(np.unique(values))
+        if n_unique <= category_ratio * len(values):
+            path = store_categorical_label(values, column_root, name)
+        else:
+            path = store_string_label(values, column_root, name)
+        del values
+
+        _move_original(root, entry["path"])
+        paths += [path]
+
+    return paths
+
+
+def store_packed_label(entries, root, name, n_threads=8):
+    """Packs binary entries into a single blob, such that they can be loaded
+    by the :class:`MetaDataset` as :class:`PackedColumn`.
+
+    Parameters
+    ----------
+    entries : list
+        The entries to store. Each entry is either ``bytes`` or a path to a
+        file, whose content is stored.
+    root : str
+        Where to store the column.
+    name : str
+        The name of the column.
+    n_threads : int
+        Number of threads reading files.
+
+    Returns
+    -------
+    path : str
+        The folder containing the column.
+    """
+    n = len(entries)
+    path = os.path.join(root, "{}-*-{}-*-packed".format(name, n))
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    os.makedirs(tmp_path, exist_ok=True)
+
+    offsets = np.zeros(n, dtype=np.int64)
+    lengths = np.zeros(n, dtype=np.int64)
+
+    def read(entry):
+        if isinstance(entry, bytes):
+            return entry
+        with open(str(entry), "rb") as f:
+            return f.read()
+
+    blob_tmp = os.path.join(tmp_path, "blob.tmp")
+    chunk_size = 1024
+    size = 0
+    with open(blob_tmp, "wb") as blob, futures.ThreadPoolExecutor(n_threads) as pool:
+        for start in range(0, n, chunk_size):
+            chunk = entries[start : start + chunk_size]
+            for i, data in enumerate(pool.map(read, chunk), start):
+                blob.write(data)
+                offsets[i] = size
+                lengths[i] = len(data)
+                size += len(data)
+
+    os.rename(blob_tmp, os.path.join(tmp_path, "blob-*-{}-*-uint8.npy".format(size)))
+    store_label_mmap(offsets, tmp_path, "offsets")
+    store_label_mmap(lengths, tmp_path, "lengths")
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(tmp_path, path)
+
+    return path
+
+
+def pack_column(root, key, n_threads=8):
+    """Packs the files referenced by the path column :attr:`key` of the
+    :class:`MetaDataset` at :attr:`root` into a :class:`PackedColumn`. The
+    original column is moved to the folder ``root/original_labels``.
+
+    Parameters
+    ----------
+    root : str
+        Root of the dataset.
+    key : str
+        Key of the column without loader, e.g. ``image`` for the label file
+        ``image:image-*-10000-*-<U40.npy``.
+    n_threads : int
+        Number of threads reading files.
+
+    Returns
+    -------
+    path : str
+        The folder containing the packed column.
+    """
+    # Imported here to avoid circular imports.
+    from edflow.data.believers.meta import list_label_files, loader_from_key
+
+    labels_root = os.path.join(root, "labels")
+    entries = [
+        e
+        for e in list_label_files(labels_root)
+        if e["format"] == "memmap" and loader_from_key(e["key"])[0] == key
+    ]
+    if len(entries) != 1:
+        raise ValueError(
+            "Found {} path columns with key `{}` in {}".format(
+                len(entries), key, labels_root
+            )
+        )
+    entry = entries[0]
+
+    paths = np.memmap(
+        entry["path"], mode="r", shape=entry["shape"], dtype=entry["dtype"]
+    )
+    name = os.path.basename(entry["path"]).split("-*-")[0]
+    column_root = os.path.dirname(entry["path"])
+
+    packed_path = store_packed_label(list(paths), column_root, name, n_threads)
+    _move_original(root, entry["path"])
+
+    return packed_path
+
+
+def _move_original(root, path):
+    """Moves the label file at :attr:`path` from ``root/labels`` to the same
+    place in ``root/original_labels``."""
+    labels_root = os.path.join(root, "labels")
+    original_root = os.path.join(
+        root, "original_labels", os.path.relpath(os.path.dirname(path), labels_root)
+    )
+    os.makedirs(original_root, exist_ok=True)
+    os.rename(path, os.path.join(original_root, os.path.basename(path)))
+
+
+def is_column_folder(path):
+    """Checks if :attr:`path` is a folder containing a special column."""
+    name = os.path.basename(path)
+    parts = name.split("-*-")
+    return os.path.isdir(path) and len(parts) == 3 and parts[2] in COLUMN_FORMATS
+
+
+def load_column_folder(path):
+    """Loads the special column stored in the folder at :attr:`path`."""
+    column_format = os.path.basename(path).split("-*-")[2]
+    return COLUMN_CLASSES[column_format].from_folder(path)
+
+
+def _load_folder(path):
+    regex = re.compile(r".*-\*-.*-\*-.*\.npy")
+
+    arrays = {}
+    for f in os.listdir(path):
+        if regex.match(f):
+            key, shape, dtype = f[: -len(".npy")].split("-*-")
+            shape = tuple([int(s) for s in shape.split("x")])
+            if np.prod(shape) == 0:
+                # Empty files can not be memory mapped.
+                arrays[key] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[key] = np.memmap(
+                os.path.join(path, f), mode="c", shape=shape, dtype=dtype
+            )
+    return arrays
+
+
+def _smallest_int(n):
+    """Smallest signed integer type, which can hold values up to :attr:`n`."""
+    for dtype in [np.int8, np.int16, np.int32]:
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert the label columns of a MetaDataset."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    pack_parser = subparsers.add_parser(
+        "pack", help="Pack the files of a path column."
+    )
+    pack_parser.add_argument("root", help="Root of the dataset.")
+    pack_parser.add_argument("key", help="Key of the path column, e.g. image.")
+    pack_parser.add_argument("--n_threads", type=int, default=8)
+
+    strings_parser = subparsers.add_parser(
+        "strings", help="Convert unicode labels to utf8 or category columns."
+    )
+    strings_parser.add_argument("root", help="Root of the dataset.")
+    strings_parser.add_argument("--category_ratio", type=float, default=0.1)
+
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        print(pack_column(args.root, args.key, args.n_threads))
+    elif args.command == "strings":
+        for path in convert_string_labels(args.root, args.category_ratio):
+            print(path)
+    else:
+        parser.print_help()
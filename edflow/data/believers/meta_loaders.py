@@ -1,15 +1,30 @@
+import io
+import os
+import shutil
+import warnings
 import numpy as np
 from PIL import Image
-from edflow.data.util import adjust_support
+from concurrent import futures
+from edflow.data.util import sup_str_to_num
 
 
-def image_loader(path, support="0->255", resize_to=None):
+def image_loader(
+    path,
+    support="0->255",
+    resize_to=None,
+    draft=False,
+    n_threads=8,
+    cache=None,
+    index=None,
+):
     """
 
     Parameters
     ----------
-    path : str
-        Where to finde the image.
+    path : str or np.ndarray
+        Where to finde the image or the encoded image as ``np.uint8`` array,
+        as stored in a packed column (see
+        :class:`edflow.data.believers.meta_columns.PackedColumn`).
     support : str
         Defines the support and data type of the loaded image. Must be one of
             - ``0->255``: The PIL default. Datatype is ``np.uint8`` and all values
@@ -22,31 +37,369 @@ def image_loader(path, support="0->255", resize_to=None):
         If not None, the loaded image will be resized to these dimensions. Must
         be a list of two integers or a single integer, which is interpreted as
         list of two integers with same value.
+    draft : bool
+        If ``True`` and :attr:`resize_to` is given, JPEG images are decoded
+        directly at the smallest scale which is still larger than
+        :attr:`resize_to`, which skips most of the decoding work.
+    n_threads : int
+        Number of threads used to decode the images, when loading a whole
+        batch at once using :func:`image_batch_loader`.
+    cache : DecodedImageCache
+        If given, the decoded image is read from or written to this cache at
+        slot :attr:`index`.
+    index : int
+        Slot of the image in :attr:`cache`.
 
     Returns
     -------
     im : np.array
         An image loaded using :class:`PIL.Image` and adjusted to the range as
-        specified.
+        specified. Cached images with support ``0->255`` are returned as read
+        only views into the cache.
+    """
+
+    def loader(support=support, resize_to=resize_to, draft=draft):
+        im, cached = _load_image(path, resize_to, draft, cache, index)
+
+        if cached and support == "0->255":
+            return im
+        return _to_support(im, support)
+
+    return loader
+
+
+def image_batch_loader(
+    paths,
+    support="0->255",
+    resize_to=None,
+    draft=False,
+    n_threads=8,
+    out=None,
+    cache=None,
+    indices=None,
+):
+    """Loads a batch of images at once. The images are decoded by a pool of
+    threads and written directly into one array.
+
+    Parameters
+    ----------
+    paths : list(str)
+        Where to find the images or the encoded images. All images must have
+        the same size after resizing.
+    support : str
+        See :func:`image_loader`.
+    resize_to : list
+        See :func:`image_loader`.
+    draft : bool
+        See :func:`image_loader`.
+    n_threads : int
+        Number of threads decoding the images.
+    out : np.ndarray
+        Preallocated array the images are written to. Must have the shape
+        ``[len(paths), height, width(, channels)]`` and dtype ``np.uint8`` for
+        the support ``0->255`` and ``np.float32`` otherwise.
+    cache : DecodedImageCache
+        If given, decoded images are read from or written to this cache.
+    indices : list(int)
+        Slots of the images in :attr:`cache`.
+
+    Returns
+    -------
+    images : np.ndarray
+        All images stacked along the first axis.
+    """
+    if len(paths) == 0:
+        return out
+
+    def decode(i):
+        index = None if indices is None else indices[i]
+        return _load_image(paths[i], resize_to, draft, cache, index)[0]
+
+    first = decode(0)
+    if out is None:
+        dtype = np.uint8 if support == "0->255" else np.float32
+        out = np.empty((len(paths),) + first.shape, dtype=dtype)
+
+    def load(i, im=None):
+        if im is None:
+            im = decode(i)
+        if im.shape != out.shape[1:]:
+            raise ValueError(
+                "Image {} has shape {}, but the batch is of shape {}".format(
+                    i, im.shape, out.shape
+                )
+            )
+        _to_support(im, support, out=out[i])
+
+    load(0, first)
+    if n_threads and n_threads > 1:
+        # PIL releases the GIL while decoding.
+        with futures.ThreadPoolExecutor(n_threads) as executor:
+            list(executor.map(load, range(1, len(paths))))
+    else:
+        for i in range(1, len(paths)):
+            load(i)
+
+    return out
+
+
+image_loader.batch_loader = image_batch_loader
+
+
+class DecodedImageCache(object):
+    """Persistent cache of decoded images of fixed shape.
+
+    All images are stored as ``np.uint8`` in one memory map
+    ``data-*-NxHxWxC-*-uint8.npy`` inside the folder :attr:`root`. The shape
+    is taken from the first image put into the cache. Images of other shapes
+    are not cached. The memory map ``valid-*-N-*-uint8.npy`` marks the filled
+    slots, such that partially filled caches can be used.
+
+    If a :attr:`source` is given, it is stored in ``source.txt`` and a cache
+    created from another source is deleted and rebuilt, such that changed
+    images are not served from the cache. If the cache can not be created,
+    e.g. because the dataset is read only, it is disabled with a warning.
+
+    Multiple processes can fill the cache at the same time: the folder is
+    created atomically and each slot is only marked as valid after its data
+    has been written. Validity is stored as one byte per slot, so that
+    processes never modify shared bytes.
     """
 
-    def loader(support=support, resize_to=resize_to):
-        im = Image.open(path)
+    def __init__(self, root, n, source=None):
+        """
+        Parameters
+        ----------
+        root : str
+            Folder containing the cache.
+        n : int
+            Number of slots.
+        source : str
+            Describes the images, e.g. by path, size and modification time
+            of the label containing them.
+        """
+        self.root = root
+        self.n = n
+        self.source = source
+        self.disabled = False
+        self._data = None
+
+    @property
+    def n_valid(self):
+        """Number of filled slots."""
+        if not self._open():
+            return 0
+        return int(np.count_nonzero(self._valid))
+
+    def get(self, index):
+        """Returns the image at slot :attr:`index` as read only view or
+        ``None``, if it has not been cached yet."""
+        if not self._open() or not self._valid[index]:
+            return None
+        return self._data[index]
 
-        if resize_to is not None:
-            if isinstance(resize_to, int):
-                resize_to = [resize_to] * 2
+    def put(self, index, im):
+        """Stores the image :attr:`im` at slot :attr:`index`."""
+        if not self._open(im.shape) or im.shape != self._data.shape[1:]:
+            return
+        if self._writable is None:
+            return
+        self._writable[index] = im
+        self._valid[index] = 1
 
+    def _open(self, shape=None):
+        """Opens the cache, creating it with images of :attr:`shape` if it
+        does not exist yet.
+
+        Returns
+        -------
+        bool
+            ``True`` if the cache could be opened.
+        """
+        if self._data is not None:
+            return True
+        if self.disabled:
+            return False
+
+        if os.path.isdir(self.root) and not self._is_current():
+            self._remove()
+        if not os.path.isdir(self.root):
+            if shape is None or not self._create(shape):
+                return False
+
+        arrays = {}
+        for f in os.listdir(self.root):
+            parts = f[: -len(".npy")].split("-*-")
+            if not f.endswith(".npy") or len(parts) != 3:
+                continue
+            arrays[parts[0]] = (
+                os.path.join(self.root, f),
+                tuple([int(s) for s in parts[1].split("x")]),
+            )
+        if "valid" not in arrays or "data" not in arrays:
+            # e.g. removed by another process, which found it outdated
+            return False
+
+        valid_path, valid_shape = arrays["valid"]
+        if valid_shape != (self.n,):
+            raise ValueError(
+                "Decoded image cache at {} has {} slots, but {} are needed. "
+                "Delete it to rebuild it.".format(self.root, valid_shape[0], self.n)
+            )
+        data_path, data_shape = arrays["data"]
+
+        try:
+            self._valid = np.memmap(valid_path, mode="r+", shape=valid_shape)
+            self._writable = np.memmap(data_path, mode="r+", shape=data_shape)
+        except OSError:
+            # Only the cached images can be used.
+            self._valid = np.memmap(valid_path, mode="r", shape=valid_shape)
+            self._writable = None
+        self._data = np.memmap(data_path, mode="r", shape=data_shape)
+        return True
+
+    def _is_current(self):
+        """Checks if the cache at :attr:`root` has been created from
+        :attr:`source`."""
+        if self.source is None:
+            return True
+        try:
+            with open(os.path.join(self.root, "source.txt")) as f:
+                return f.read() == self.source
+        except OSError:
+            return False
+
+    def _remove(self):
+        """Deletes the outdated cache at :attr:`root`."""
+        old_root = "{}.{}.old".format(self.root, os.getpid())
+        try:
+            os.rename(self.root, old_root)
+        except FileNotFoundError:
+            # Another process has been faster.
+            return
+        except OSError as e:
+            self._disable(e)
+            return
+        shutil.rmtree(old_root, ignore_errors=True)
+
+    def _create(self, shape):
+        """Creates the cache. Returns ``False`` if it has been disabled."""
+        tmp_root = "{}.{}.tmp".format(self.root, os.getpid())
+        try:
+            os.makedirs(tmp_root, exist_ok=True)
+
+            shape_str = "x".join(str(s) for s in (self.n,) + tuple(shape))
+            data_path = os.path.join(
+                tmp_root, "data-*-{}-*-uint8.npy".format(shape_str)
+            )
+            valid_path = os.path.join(tmp_root, "valid-*-{}-*-uint8.npy".format(self.n))
+
+            # Creating the memory maps only allocates the files sparsely.
+            np.memmap(data_path, mode="w+", shape=(self.n,) + tuple(shape)).flush()
+            np.memmap(valid_path, mode="w+", shape=(self.n,)).flush()
+            if self.source is not None:
+                with open(os.path.join(tmp_root, "source.txt"), "w") as f:
+                    f.write(self.source)
+        except OSError as e:
+            shutil.rmtree(tmp_root, ignore_errors=True)
+            self._disable(e)
+            return False
+
+        try:
+            os.rename(tmp_root, self.root)
+        except OSError:
+            # Another process has been faster.
+            shutil.rmtree(tmp_root, ignore_errors=True)
+        return True
+
+    def _disable(self, error):
+        self.disabled = True
+        warnings.warn(
+            "Disabling the decoded image cache at {}: {}".format(self.root, error)
+        )
+
+    def __getstate__(self):
+        # Memory maps are reopened in each process.
+        state = dict(self.__dict__)
+        state.pop("_writable", None)
+        state.pop("_valid", None)
+        state["_data"] = None
+        return state
+
+
+def decoded_cache_name(key, resize_to=None, draft=False):
+    """Name of the :class:`DecodedImageCache` of the images at :attr:`key`
+    loaded with the given options."""
+    if resize_to is None:
+        size = "full"
+    else:
+        if isinstance(resize_to, int):
+            resize_to = [resize_to] * 2
+        size = "x".join(str(s) for s in resize_to)
+    name = "{}-{}".format(key.replace("/", "_"), size)
+    if draft:
+        name += "-draft"
+    return name
+
+
+def _load_image(path, resize_to=None, draft=False, cache=None, index=None):
+    """Loads an image as ``np.uint8`` array, using the cache if given.
+
+    Returns
+    -------
+    im : np.ndarray
+        The image.
+    cached : bool
+        Whether the image has been read from the cache.
+    """
+    if cache is not None and index is not None:
+        im = cache.get(index)
+        if im is not None:
+            return im, True
+
+    im = _decode_image(path, resize_to, draft)
+
+    if cache is not None and index is not None:
+        cache.put(index, im)
+    return im, False
+
+
+def _decode_image(path, resize_to=None, draft=False):
+    """Decodes an image as ``np.uint8`` array."""
+    if isinstance(path, np.ndarray) and path.dtype == np.uint8:
+        path = io.BytesIO(memoryview(path))
+    im = Image.open(path)
+
+    if resize_to is not None:
+        if isinstance(resize_to, int):
+            resize_to = [resize_to] * 2
+        resize_to = tuple(resize_to)
+
+        if draft:
+            # Only has an effect for JPEG images
+            im.draft(im.mode, resize_to)
+
+        if im.size != resize_to:
             im = im.resize(resize_to)
 
-        im = np.array(im)
+    return np.asarray(im)
 
-        if support == "0->255":
-            return im
-        else:
-            return adjust_support(im, support, "0->255")
 
-    return loader
+def _to_support(im, support, out=None):
+    """Converts a ``np.uint8`` image to :attr:`support` in a single pass,
+    writing to :attr:`out` if given."""
+    if support == "0->255":
+        if out is None:
+            return np.array(im)
+        out[...] = im
+        return out
+
+    vmin, vmax = sup_str_to_num(support)
+    if out is None:
+        out = np.empty(im.shape, dtype=np.float32)
+    np.multiply(im, np.float32((vmax - vmin) / 255.0), out=out, casting="unsafe")
+    out += np.float32(vmin)
+    return out
 
 
 def numpy_loader(path):
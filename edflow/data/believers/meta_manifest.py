@@ -0,0 +1,212 @@
+"""Manifests allow to open a :class:`MetaDataset` without listing its
+``labels/`` folder.
+
+A manifest is the file ``manifest.yaml`` in the root of a dataset. It lists
+the key, path, format, shape and dtype of every label. When present and up
+to date, the :class:`MetaDataset` creates its labels from it as
+:class:`LazyLabel` s, which only open the underlying memory map when the
+label data is accessed for the first time.
+
+Manifests can be written on the first load by passing
+``write_manifest=True`` to the :class:`MetaDataset` or with
+
+.. code-block:: bash
+
+    python -m edflow.data.believers.meta_manifest path/to/dataset
+
+The manifest is considered outdated as soon as the modification time of the
+``labels/`` folder changes, i.e. when label files are added, removed or
+renamed directly inside it. Changes in nested folders are not detected, so
+remember to rewrite the manifest after changing those.
+"""
+
+import os
+import numpy as np
+import yaml
+
+from edflow.data.believers.meta_columns import ArrayOperatorsMixin, load_column_folder
+from edflow.util import set_value
+
+
+MANIFEST_NAME = "manifest.yaml"
+
+
+class LazyLabel(ArrayOperatorsMixin):
+    """Stands in for a label until its data is accessed. Shape and dtype are
+    known without opening the label. Operators and numpy ufuncs are applied
+    to the opened label."""
+
+    def __init__(self, path, shape, dtype, format="memmap"):
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the label file or folder.
+        shape : tuple
+            Shape of the label.
+        dtype : str
+            Dtype of the label.
+        format : str
+            ``memmap`` for plain memory maps or the format of a special
+            column (see :mod:`edflow.data.believers.meta_columns`).
+        """
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.format = format
+        self._label = None
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def filename(self):
+        if self.format == "memmap":
+            return os.path.abspath(self.path)
+        return self.open().filename
+
+    def open(self):
+        """Returns the label, opening it on first use."""
+        if self._label is None:
+            if self.format == "memmap":
+                self._label = np.memmap(
+                    self.path, mode="c", shape=self.shape, dtype=self.dtype
+                )
+            else:
+                self._label = load_column_folder(self.path)
+        return self._label
+
+    def _as_array(self):
+        return self.open()
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, idx):
+        return self.open()[idx]
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.open(), dtype=dtype)
+
+    def __iter__(self):
+        return iter(self.open())
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.open(), name)
+
+    def __getstate__(self):
+        # Reopen in each process instead of pickling the data.
+        state = dict(self.__dict__)
+        state["_label"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def __repr__(self):
+        return "LazyLabel({}, shape={}, dtype={})".format(
+            os.path.basename(self.path), self.shape, self.dtype
+        )
+
+
+def write_manifest(root):
+    """Lists all labels of the :class:`MetaDataset` at :attr:`root` and
+    stores them in its manifest.
+
+    Parameters
+    ----------
+    root : str
+        Root of the dataset, containing the ``labels/`` folder.
+
+    Returns
+    -------
+    path : str
+        Path to the written manifest.
+    """
+    # Imported here to avoid circular imports.
+    from edflow.data.believers.meta import list_label_files
+
+    labels_root = os.path.join(root, "labels")
+    entries = list_label_files(labels_root)
+
+    labels = []
+    for entry in entries:
+        dtype = entry["dtype"]
+        if dtype is None:
+            dtype = load_column_folder(entry["path"]).dtype
+        labels += [
+            {
+                "key": entry["key"],
+                "path": os.path.relpath(entry["path"], labels_root),
+                "format": entry["format"],
+                "shape": [int(s) for s in entry["shape"]],
+                "dtype": np.dtype(dtype).str,
+            }
+        ]
+
+    manifest = {
+        "labels_mtime_ns": os.stat(labels_root).st_mtime_ns,
+        "labels": labels,
+    }
+
+    path = os.path.join(root, MANIFEST_NAME)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "w") as f:
+        yaml.dump(manifest, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper))
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def load_manifest(root):
+    """Creates the labels of the :class:`MetaDataset` at :attr:`root` from
+    its manifest without opening any label file.
+
+    Parameters
+    ----------
+    root : str
+        Root of the dataset.
+
+    Returns
+    -------
+    labels : dict
+        All labels as :class:`LazyLabel` s or ``None`` if there is no up to
+        date manifest.
+    """
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as f:
+        manifest = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+    labels_root = os.path.join(root, "labels")
+    if manifest.get("labels_mtime_ns") != os.stat(labels_root).st_mtime_ns:
+        return None
+
+    labels = {}
+    for entry in manifest["labels"]:
+        label = LazyLabel(
+            os.path.join(labels_root, entry["path"]),
+            entry["shape"],
+            entry["dtype"],
+            entry["format"],
+        )
+        set_value(labels, entry["key"], label)
+
+    return labels
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Write the manifest of a MetaDataset."
+    )
+    parser.add_argument("root", help="Root of the dataset.")
+    args = parser.parse_args()
+
+    print(write_manifest(args.root))
@@ -22,3 +22,241 @@ def store_label_mmap(data, root, name):
 
     mmap = np.memmap(mmap_path, dtype=data.dtype, mode="w+", shape=data.shape)
     mmap[:] = data
+
+
+class LabelWriter(object):
+    """Writes labels loadable by :class:`MetaDataset` from a stream of rows of
+    unknown length.
+
+    Rows are buffered per label and appended to a growing file once
+    :attr:`buffer_size` rows are collected, so memory stays bounded. When
+    finalizing, each file is renamed according to the naming convention,
+    which contains the final number of rows.
+
+    .. code-block:: python
+
+        with LabelWriter("root/labels") as writer:
+            for frame in video:
+                writer.append({"keypoints": detect(frame), "frame": frame.id})
+
+        # root/labels/keypoints-*-{N}x17x2-*-float32.npy
+        # root/labels/frame-*-{N}-*-int64.npy
+
+    If an exception leaves the ``with`` block, all buffered rows are flushed,
+    but the files are not finalized.
+    """
+
+    def __init__(self, root, buffer_size=1024, dtypes=None):
+        """
+        Parameters
+        ----------
+        root : str
+            Where to store the labels.
+        buffer_size : int
+            Number of rows buffered per label before writing them.
+        dtypes : dict
+            Name, dtype pairs. By default the dtype of each label is taken
+            from its first row. Specify the dtype of string labels, e.g.
+            ``<U200``, as the first row determines their maximum length
+            otherwise. The same holds for numbers: rows which do not fit
+            into the dtype, e.g. ``0.7`` after an integer first row, raise a
+            ``ValueError``.
+        """
+        self.root = root
+        self.buffer_size = buffer_size
+        self.dtypes = dict(dtypes or {})
+
+        self.columns = {}
+
+    def append(self, row):
+        """Appends one row.
+
+        Parameters
+        ----------
+        row : dict
+            Name, value pairs. Names may contain ``/`` to store labels in
+            subfolders.
+
+        Raises
+        ------
+        ValueError
+            If a value does not fit its label. Nothing of the row is
+            appended in this case.
+        """
+        self._add(row, single=True)
+
+    def extend(self, rows):
+        """Appends many rows at once.
+
+        Parameters
+        ----------
+        rows : dict
+            Name, array pairs, each array containing the rows along its first
+            axis.
+        """
+        self._add(rows, single=False)
+
+    def _add(self, rows, single):
+        # All values are checked before any of them is appended, such that
+        # the labels keep the same number of rows if one of them is invalid.
+        converted = {}
+        for name, value in rows.items():
+            values = np.asarray(value)[None] if single else np.asarray(value)
+            if name in self.columns:
+                converted[name] = self.columns[name].convert(values)
+        created = []
+        try:
+            for name, value in rows.items():
+                if name not in converted:
+                    column = self._column(name, value, single)
+                    created += [name]
+                    values = np.asarray(value)[None] if single else np.asarray(value)
+                    converted[name] = column.convert(values)
+        except ValueError:
+            for name in created:
+                os.remove(self.columns.pop(name).path)
+            raise
+
+        for name, values in converted.items():
+            self.columns[name].push(values)
+
+    def flush(self):
+        """Writes all buffered rows to disk."""
+        for column in self.columns.values():
+            column.flush()
+
+    def finalize(self):
+        """Flushes all rows and renames the files, such that they can be
+        loaded by :class:`MetaDataset`.
+
+        Returns
+        -------
+        paths : dict
+            Name, path pairs of the written labels.
+
+        Raises
+        ------
+        ValueError
+            If the labels have different numbers of rows or no rows at all.
+        """
+        self.flush()
+
+        lengths = {name: column.n for name, column in self.columns.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(
+                "All labels must have the same number of rows, but have "
+                "{}".format(lengths)
+            )
+        if 0 in lengths.values():
+            raise ValueError("Labels without rows can not be stored.")
+
+        return {name: column.finalize() for name, column in self.columns.items()}
+
+    def _column(self, name, value, single):
+        if name not in self.columns:
+            value = np.asarray(value, dtype=self.dtypes.get(name))
+            row_shape = value.shape if single else value.shape[1:]
+            dirname, basename = os.path.split(os.path.join(self.root, name))
+            os.makedirs(dirname, exist_ok=True)
+            self.columns[name] = _LabelColumnWriter(
+                dirname, basename, row_shape, value.dtype, self.buffer_size
+            )
+        return self.columns[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.flush()
+
+
+class _LabelColumnWriter(object):
+    """Appends rows of one label to the file ``.name.partial``."""
+
+    def __init__(self, root, name, row_shape, dtype, buffer_size):
+        self.root = root
+        self.name = name
+        self.row_shape = tuple(row_shape)
+        self.dtype = np.dtype(dtype)
+        self.buffer_size = buffer_size
+
+        self.path = os.path.join(root, f".{name}.partial")
+        # Start with an empty file.
+        open(self.path, "wb").close()
+
+        self.n = 0
+        self.buffer = []
+        self.n_buffered = 0
+        self.final_path = None
+
+    def convert(self, values):
+        """Checks rows and converts them to the dtype of the label."""
+        if values.shape[1:] != self.row_shape:
+            raise ValueError(
+                "Rows of label `{}` must have shape {}, but got {}".format(
+                    self.name, self.row_shape, values.shape[1:]
+                )
+            )
+        try:
+            with np.errstate(invalid="ignore", over="ignore"):
+                converted = values.astype(self.dtype)
+            fits = self._is_lossless(values, converted)
+        except (OverflowError, TypeError):
+            # E.g. python integers too large for any integer dtype.
+            fits = False
+        if not fits:
+            raise ValueError(
+                "Values of label `{}` of dtype {} do not fit into dtype {}. "
+                "Specify a larger dtype in the LabelWriter.".format(
+                    self.name, values.dtype, self.dtype
+                )
+            )
+        return converted
+
+    def _is_lossless(self, values, converted):
+        if values.dtype == self.dtype:
+            return True
+        if self.dtype.kind in "fc":
+            # Rounding is fine, but neither overflows nor e.g. complex to
+            # float.
+            if not np.can_cast(values.dtype, self.dtype, "same_kind"):
+                return False
+            with np.errstate(invalid="ignore"):
+                overflow = np.isinf(converted) & np.isfinite(values)
+            return not np.any(overflow)
+        # Strings, integers and booleans must keep their values exactly.
+        with np.errstate(invalid="ignore"):
+            return not np.any(converted != values)
+
+    def push(self, converted):
+        """Appends rows returned by :meth:`convert`."""
+        self.buffer += [converted]
+        self.n_buffered += len(converted)
+        if self.n_buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with open(self.path, "ab") as f:
+            for values in self.buffer:
+                f.write(np.ascontiguousarray(values).tobytes())
+        self.n += self.n_buffered
+        self.buffer = []
+        self.n_buffered = 0
+
+    def finalize(self):
+        if self.final_path is not None:
+            return self.final_path
+
+        self.flush()
+        if self.n == 0:
+            raise ValueError("Label `{}` has no rows.".format(self.name))
+        shape_str = "x".join([str(int(x)) for x in (self.n,) + self.row_shape])
+        path = os.path.join(self.root, f"{self.name}-*-{shape_str}-*-{self.dtype}.npy")
+        os.rename(self.path, path)
+        self.final_path = path
+        return path
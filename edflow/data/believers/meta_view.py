@@ -1,9 +1,14 @@
 import os
+import shutil
 import numpy as np
+from concurrent import futures
 
 from edflow.data.believers.meta import MetaDataset
+from edflow.data.believers.meta_columns import PackedColumn
+from edflow.data.believers.meta_manifest import LazyLabel
 from edflow.data.believers.meta_util import store_label_mmap
 from edflow.util import retrieve, get_obj_from_str, walk
+from edflow.iterators.batches import deep_lod2dol
 
 from tqdm.autonotebook import tqdm
 
@@ -112,9 +117,30 @@ class MetaViewDataset(MetaDataset):
         print(len(ViewDset))  # {M}
 
         ViewDset.show()  # prints the labels and the first example
+
+    Views often contain the same base index several times, e.g. an
+    appearance image shared by a whole sequence or overlapping windows. All
+    base indices needed for an example, or for a whole batch when using
+    :meth:`get_batch`, are collected and deduplicated first. Each base
+    example is then loaded only once and placed at all positions it is
+    needed at. If the base dataset supports batched loading via
+    ``get_batch`` and :attr:`expand` is ``True``, all base examples are
+    loaded in a single batch.
     """
 
-    def __init__(self, root):
+    def __init__(self, root, n_threads=8, chunk_size=None):
+        """
+        Parameters
+        ----------
+        root : str
+            Where to look for all the data.
+        n_threads : int
+            Number of labels exported at the same time when constructing the
+            view.
+        chunk_size : int
+            Number of view entries exported at once per label. By default
+            chosen such that each chunk is about 64 MB large.
+        """
         super().__init__(root)
 
         base_import = retrieve(self.meta, "base_dset")
@@ -131,22 +157,33 @@ class MetaViewDataset(MetaDataset):
 
         if not os.path.exists(os.path.join(root, ".constructed.txt")):
 
+            tasks = []
+
             def constructor(name, view):
                 folder_name = name
                 savefolder = os.path.join(root, "labels", folder_name)
 
                 os.makedirs(savefolder, exist_ok=True)
 
-                for key, label in tqdm(
-                    self.base.labels.items(), desc=f"Exporting View {name}"
-                ):
-
-                    savepath = os.path.join(root, "labels", name)
-                    label_view = np.take(label, view, axis=0)
-                    store_label_mmap(label_view, savepath, key)
+                for key, label in self.base.labels.items():
+                    tasks.append((label, view, savefolder, key))
 
             walk(self.views, constructor, pass_key=True)
 
+            def export(task):
+                export_label_view(*task, chunk_size=chunk_size)
+
+            # Each label is streamed into its memory map chunk by chunk.
+            # Interrupted exports continue where they stopped.
+            with futures.ThreadPoolExecutor(n_threads) as executor:
+                list(
+                    tqdm(
+                        executor.map(export, tasks),
+                        total=len(tasks),
+                        desc="Exporting Views",
+                    )
+                )
+
             with open(os.path.join(root, ".constructed.txt"), "w+") as cf:
                 cf.write(
                     "Do not delete, this reduces loading times.\n"
@@ -161,11 +198,224 @@ class MetaViewDataset(MetaDataset):
         """Get the examples from the base dataset at defined at ``view[idx]``.
         """
 
-        def get_view(view):
-            return view[idx]
+        return self._resolve([idx])[0]
 
-        view = walk(self.views, get_view)
+    def get_batch(self, indices):
+        """Loads the examples at :attr:`indices` at once, loading each needed
+        base example only once.
 
-        view_example = walk(view, self.base.__getitem__, walk_np_arrays=True)
+        Parameters
+        ----------
+        indices : list(int)
+            The indices of the examples to load.
+
+        Returns
+        -------
+        batch : dict
+            Like an example, but all values are stacked along a new first
+            axis.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
 
-        return view_example
+        examples = self._resolve(indices)
+        for idx, example in zip(indices, examples):
+            example["index_"] = idx
+        self._maybe_expand(examples)
+
+        batch = deep_lod2dol(examples)
+        if self.append_labels:
+            batch["labels_"] = walk(self.labels, lambda label: label[indices])
+
+        return batch
+
+    def _resolve(self, indices):
+        """Creates the view examples at :attr:`indices`.
+
+        All base indices contained in the views are collected and
+        deduplicated, the corresponding base examples are loaded at once and
+        scattered back into the view structure. Each position receives its
+        own shallow copy of the base example.
+        """
+
+        views = [walk(self.views, lambda view: view[idx]) for idx in indices]
+
+        base_indices = []
+        walk(views, base_indices.append, walk_np_arrays=True)
+        base_indices = np.asarray(base_indices, dtype=np.int64)
+
+        unique, inverse = np.unique(base_indices, return_inverse=True)
+        base_examples = self._load_base(unique)
+
+        # walk visits the leaves in the same order as above.
+        positions = iter(inverse)
+
+        def scatter(base_index):
+            example = base_examples[next(positions)]
+            if isinstance(example, dict):
+                example = dict(example)
+            return example
+
+        return walk(views, scatter, walk_np_arrays=True)
+
+    def _load_base(self, indices):
+        """Loads the base examples at :attr:`indices`."""
+
+        get_batch = getattr(self.base, "get_batch", None)
+        if self.expand and callable(get_batch) and len(indices) > 0:
+            batch = get_batch(indices)
+            return [
+                walk(batch, lambda value: value[i])
+                for i in range(len(indices))
+            ]
+
+        return self.base[[int(i) for i in indices]]
+
+
+def export_label_view(label, view, root, name, chunk_size=None):
+    """Stores ``label[view]`` as memory map loadable by the
+    :class:`MetaDataset`, without loading the whole result into memory.
+
+    The view is processed in chunks, which are written directly into the
+    memory map. The number of finished entries is tracked in the file
+    ``root/.name.progress``, which allows to resume interrupted exports. It is
+    removed once the export is finished.
+
+    Views on a :class:`PackedColumn` are exported as packed column using
+    :func:`export_packed_view`. Other labels of dtype ``object`` can not be
+    stored as memory map and raise a ``ValueError``.
+
+    Parameters
+    ----------
+    label : np.ndarray
+        The label to take a view on. Indexed along the first axis.
+    view : np.ndarray
+        Integer array of indices into :attr:`label`.
+    root : str
+        Where to store the memory map.
+    name : str
+        The name of the label. See :func:`store_label_mmap`.
+    chunk_size : int
+        Number of view entries exported at once. By default chosen such that
+        each chunk is about 64 MB large.
+
+    Returns
+    -------
+    path : str
+        Path to the memory map.
+    """
+    view = np.asarray(view)
+    if isinstance(label, LazyLabel):
+        label = label.open()
+    if isinstance(label, PackedColumn):
+        return export_packed_view(label, view, root, name, chunk_size)
+
+    row_shape = tuple(label.shape[1:])
+    shape = view.shape + row_shape
+    dtype = np.dtype(label.dtype)
+    if dtype.hasobject or dtype.itemsize == 0:
+        # Memory maps of python objects store pointers.
+        raise ValueError(
+            "Label `{}` of dtype {} can not be exported as memory map.".format(
+                name, dtype
+            )
+        )
+
+    shape_str = "x".join([str(int(x)) for x in shape])
+    path = os.path.join(root, f"{name}-*-{shape_str}-*-{dtype}.npy")
+    progress_path = os.path.join(root, f".{name}.progress")
+
+    if os.path.exists(path) and not os.path.exists(progress_path):
+        # Already exported.
+        return path
+
+    start = 0
+    if os.path.exists(progress_path) and os.path.exists(path):
+        with open(progress_path, "r") as pf:
+            start = int(pf.read().strip() or 0)
+        mmap = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+    else:
+        _write_progress(progress_path, 0)
+        mmap = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+
+    if chunk_size is None:
+        row_bytes = int(np.prod(view.shape[1:] + row_shape)) * dtype.itemsize
+        chunk_size = max(1, 2 ** 26 // max(1, row_bytes))
+
+    for chunk_start in range(start, len(view), chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, len(view))
+        indices = view[chunk_start:chunk_stop]
+        values = np.asarray(label[indices.reshape(-1)])
+        mmap[chunk_start:chunk_stop] = values.reshape(indices.shape + row_shape)
+
+        mmap.flush()
+        _write_progress(progress_path, chunk_stop)
+
+    del mmap
+    os.remove(progress_path)
+
+    return path
+
+
+def export_packed_view(label, view, root, name, chunk_size=None):
+    """Stores ``label[view]`` of the :class:`PackedColumn` :attr:`label` as
+    packed column. Each entry used by the view is copied once into the new
+    blob.
+
+    Parameters
+    ----------
+    label : PackedColumn
+        The label to take a view on.
+    view : np.ndarray
+        Integer array of indices into :attr:`label`.
+    root : str
+        Where to store the column.
+    name : str
+        The name of the label.
+    chunk_size : int
+        Number of entries copied at once.
+
+    Returns
+    -------
+    path : str
+        The folder containing the column.
+    """
+    shape_str = "x".join([str(int(x)) for x in view.shape])
+    path = os.path.join(root, f"{name}-*-{shape_str}-*-packed")
+    if os.path.exists(path):
+        # Already exported.
+        return path
+
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    os.makedirs(tmp_path, exist_ok=True)
+
+    unique, inverse = np.unique(view, return_inverse=True)
+    lengths = np.asarray(label.lengths[unique], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+    chunk_size = chunk_size or 1024
+    blob_tmp = os.path.join(tmp_path, "blob.tmp")
+    with open(blob_tmp, "wb") as blob:
+        for start in range(0, len(unique), chunk_size):
+            for entry in label[unique[start : start + chunk_size]]:
+                blob.write(memoryview(np.ascontiguousarray(entry)))
+    size = int(lengths.sum())
+    os.rename(blob_tmp, os.path.join(tmp_path, f"blob-*-{size}-*-uint8.npy"))
+
+    inverse = inverse.reshape(view.shape)
+    store_label_mmap(offsets[inverse], tmp_path, "offsets")
+    store_label_mmap(lengths[inverse], tmp_path, "lengths")
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process has been faster.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    return path
+
+
+def _write_progress(path, n):
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "w") as pf:
+        pf.write(str(n))
+    os.replace(tmp_path, path)
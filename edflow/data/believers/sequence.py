@@ -2,7 +2,9 @@ from edflow.data.dataset_mixin import DatasetMixin
 from edflow.data.agnostics.subdataset import SubDataset
 from edflow.data.agnostics.concatenated import ExampleConcatenatedDataset
 from edflow.main import get_implementations_from_config
+from collections import OrderedDict
 import numpy as np
+import os
 
 
 def get_sequence_view(frame_ids, length, step=1, strategy="raise"):
@@ -122,9 +124,24 @@ class SequenceDataset(DatasetMixin):
     The SequenceDataset also exposes the Attribute ``self.base_indices``,
     which holds at each index ``i`` the indices of the elements contained in
     the example from the sequentialized dataset.
+
+    Neighbouring sequences share most of their frames. By setting
+    :attr:`frame_cache_size` single frames are kept in a :class:`FrameCache`,
+    such that a frame, which is part of several requested sequences, is
+    only loaded once per process. Combine this with
+    :class:`edflow.iterators.batches.ContiguousOrderSampler` to make
+    neighbouring sequences end up in the same batch.
     """
 
-    def __init__(self, dataset, length, step=1, fid_key="fid", strategy="raise"):
+    def __init__(
+        self,
+        dataset,
+        length,
+        step=1,
+        fid_key="fid",
+        strategy="raise",
+        frame_cache_size=0,
+    ):
         """
         Parameters
         ----------
@@ -142,6 +159,9 @@ class SequenceDataset(DatasetMixin):
             - ``raise``: Raise a ``ValueError``
             - ``remove``: remove the sequence
             - ``reset``: remove the sequence
+        frame_cache_size : int
+            Maximum number of single frame examples kept in memory per
+            process. If ``0``, no frames are cached.
 
         This dataset will have `len(dataset) - length * step` examples.
         """
@@ -239,6 +259,85 @@ class SequenceDataset(DatasetMixin):
         self.data.set_example_pars(step=self.step)
         self.base_indices = np.array(base_indices).transpose(1, 0)[:, ::-1]
 
+        self.frame_cache_size = frame_cache_size
+        if self.frame_cache_size > 0:
+            self.frame_cache = FrameCache(dataset, self.frame_cache_size)
+
+    def get_example(self, i):
+        """Returns the sequence at index ``i``. If a frame cache is used, the
+        frames are taken from the cache where possible."""
+        if self.frame_cache_size <= 0:
+            return self.data.get_example(i)
+
+        frame_indices = self.base_indices[i, :: self.step]
+        examples = [self.frame_cache[idx] for idx in frame_indices]
+
+        new_examples = {}
+        for ex in examples:
+            for key, value in ex.items():
+                if key in new_examples:
+                    new_examples[key] += [value]
+                else:
+                    new_examples[key] = [value]
+        # Behave like the SubDatasets used without cache
+        if "index_" in new_examples:
+            new_examples["index_"] = [i] * len(examples)
+
+        return new_examples
+
+
+class FrameCache(object):
+    """Bounded least recently used cache of single frame examples, keyed by
+    their index in the frame dataset.
+
+    The cache is reset whenever the process id changes, so that each worker
+    process holds its own cache of at most :attr:`size` frames.
+
+    .. warning::
+        Cached examples are shared between all sequences containing them. Do
+        not change the values of returned frames inplace.
+    """
+
+    def __init__(self, dataset, size):
+        """
+        Parameters
+        ----------
+        dataset : DatasetMixin
+            Dataset from which single frame examples are taken.
+        size : int
+            Maximum number of frames kept in memory.
+        """
+        self.dataset = dataset
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        currentpid = os.getpid()
+        if getattr(self, "_initpid", None) != currentpid:
+            self._initpid = currentpid
+            self._cache = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+        return self._cache
+
+    def __getitem__(self, idx):
+        cache = self.cache
+        idx = int(idx)
+        if idx in cache:
+            cache.move_to_end(idx)
+            self.hits += 1
+        else:
+            cache[idx] = self.dataset[idx]
+            self.misses += 1
+            if len(cache) > self.size:
+                cache.popitem(last=False)
+        return cache[idx]
+
+    def __len__(self):
+        return len(self.cache)
+
 
 class UnSequenceDataset(DatasetMixin):
     """Flattened version of a :class:`SequenceDataset`.
@@ -323,6 +422,7 @@ def getSeqDataset(config):
                 length: 3
                 step: 1
                 fid_key: fid
+                frame_cache_size: 0  # optional
 
     ``getSeqDataSet`` will import the base ``dataset`` and pass it to
     :class:`SequenceDataset` together with ``length`` and ``step`` to
@@ -350,6 +450,7 @@ def getSeqDataset(config):
         config[ks]["length"],
         config[ks]["step"],
         fid_key=config[ks]["fid_key"],
+        frame_cache_size=config[ks].get("frame_cache_size", 0),
     )
 
     return S
@@ -1,6 +1,7 @@
 from chainer.dataset import DatasetMixin as DatasetMixin_
 import numpy as np
 from edflow.util import walk, update
+from edflow.data.agnostics.query import query_indices
 
 # handle bug with mocked chainer.dataset.DatasetMixin import
 if hasattr(DatasetMixin_, "_mock_name"):
@@ -133,6 +134,16 @@ class DatasetMixin(DatasetMixin_):
     :attr:`get_example` method. Thus, if there are keys in your labels, which
     can also be found in the examples, the label entries will override the
     values in you example, as can be seen in the example above.
+
+    **Filtering by labels**
+
+    Use :meth:`where` to get the subset of examples, whose labels fulfill
+    some condition. The condition is evaluated vectorized on the labels.
+
+    .. code-block:: python
+
+        D = SomeDataset()
+        train = D.where("partition == 0 & identity in [1, 2, 3]")
     """
 
     def _d_msg(self, val):
@@ -225,6 +236,34 @@ class DatasetMixin(DatasetMixin_):
         else:
             return super().get_example(*args, **kwargs)
 
+    def where(self, query, chunk_size=2 ** 20, cache_root=None):
+        """Returns the subset of this dataset, where the labels fulfill
+        :attr:`query`. The query is evaluated in chunks directly on the
+        labels, thus memory mapped labels are never loaded completely.
+
+        Parameters
+        ----------
+        query : str or Callable
+            Either a python expression, in which names refer to label keys,
+            e.g. ``"partition == 0 & identity in [1, 2]"``, or a callable,
+            which is passed a mapping of label chunks and returns a boolean
+            mask. See :mod:`edflow.data.agnostics.query` for details.
+        chunk_size : int
+            Number of label entries evaluated at once.
+        cache_root : str
+            Folder in which the resulting indices are cached. Only string
+            queries on memory mapped labels are cached.
+
+        Returns
+        -------
+        SubDataset
+            The examples at which the query is ``True``.
+        """
+        indices = query_indices(
+            self.labels, query, len(self), chunk_size=chunk_size, cache_root=cache_root
+        )
+        return SubDataset(self, indices)
+
     def __mul__(self, val):
         """Returns a ConcatenatedDataset of multiples of itself.
 
@@ -401,5 +440,6 @@ class SubDataset(DatasetMixin):
             self._labels = dict()
             labels = self.data.labels
             for k in labels:
-                self._labels[k] = np.array(labels[k])[self.subindices]
+                # asarray avoids copying memory mapped labels completely
+                self._labels[k] = np.asarray(labels[k])[self.subindices]
         return self._labels
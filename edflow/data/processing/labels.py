@@ -1,5 +1,13 @@
 from edflow.data.dataset_mixin import DatasetMixin
+import os
+import re
+import shutil
+import hashlib
+import inspect
+import functools
+import multiprocessing
 import numpy as np
+from tqdm import tqdm
 
 
 class LabelDataset(DatasetMixin):
@@ -24,9 +32,29 @@ class LabelDataset(DatasetMixin):
 
 
 class ExtraLabelsDataset(DatasetMixin):
-    """A dataset with extra labels added."""
+    """A dataset with extra labels added.
 
-    def __init__(self, data, labeler):
+    The labeler is called for every index once. If :attr:`n_processes` is
+    given, it is mapped over chunks of indices using a process pool, in which
+    case the labeler and the dataset are shared with the workers by forking
+    and the results are written into preallocated arrays.
+
+    If :attr:`cache_root` is given, the computed labels are stored there as
+    memory maps, keyed by the identity of the labeler and a fingerprint of
+    the base dataset (see :func:`dataset_fingerprint`). Later constructions
+    with the same labeler on the same data load them instead.
+    """
+
+    def __init__(
+        self,
+        data,
+        labeler,
+        n_processes=None,
+        chunk_size=None,
+        cache_root=None,
+        show_bar=False,
+        cache_key=None,
+    ):
         """
         Parameters
         ----------
@@ -37,23 +65,43 @@ class ExtraLabelsDataset(DatasetMixin):
             return a dictionary of labels to add or overwrite. For all indices
             the keys in the returned ``dict`` must be the same and the type
             and shape of the values at those keys must be the same per key.
+        n_processes : int
+            If given, the labeler is applied using this many processes.
+        chunk_size : int
+            Number of indices labeled per task sent to a process.
+        cache_root : str
+            Folder in which computed labels are persisted.
+        show_bar : bool
+            Show a progress bar while computing the labels.
+        cache_key : str
+            Identifies the labeler in the cache instead of
+            :func:`labeler_identity`. Needed for labelers whose state can not
+            be described.
         """
         self.data = data
         self._labeler = labeler
-        self._new_keys = sorted(self._labeler(self.data, 0).keys())
-        self._new_labels = dict()
-        for k in self._new_keys:
-            self._new_labels[k] = [None for _ in range(len(self.data))]
-        for i in range(len(self.data)):
-            new_labels = self._labeler(self.data, i)
-            for k in self._new_keys:
-                self._new_labels[k][i] = new_labels[k]
-        self._labels = dict(self.data.labels)
-        self._labels.update(self._new_labels)
+        self.n_processes = n_processes
+        self.chunk_size = chunk_size
+        self.cache_root = cache_root
+        self.show_bar = show_bar
+        self.labeler_key = cache_key
+
+        self._new_labels = None
+        if cache_root is not None:
+            self.cache_path = os.path.join(cache_root, self._cache_key)
+            self._new_labels = self._load_cache()
+
+        if self._new_labels is None:
+            self._new_labels = self._compute_labels()
+            if cache_root is not None:
+                self._store_cache()
+
+        self._new_keys = sorted(self._new_labels.keys())
 
         labels = {}
-        for k, v in self._labels.items():
-            labels[k] = np.array(v)
+        for k, v in self.data.labels.items():
+            labels[k] = np.asarray(v)
+        labels.update(self._new_labels)
         self._labels = labels
 
         self.append_labels = True
@@ -61,3 +109,242 @@ class ExtraLabelsDataset(DatasetMixin):
     @property
     def labels(self):
         return self._labels
+
+    @property
+    def _cache_key(self):
+        identity = self.labeler_key
+        if identity is None:
+            identity = labeler_identity(self._labeler)
+        state = [identity, dataset_fingerprint(self.data)]
+        return hashlib.sha1("\n".join(state).encode("utf-8")).hexdigest()
+
+    def _compute_labels(self):
+        n = len(self.data)
+        first = self._labeler(self.data, 0)
+
+        # Preallocate typed arrays from the first result. Strings and other
+        # python objects are collected in object arrays and converted at the
+        # end, as their final dtype is not known beforehand.
+        new_labels = {}
+        for k, v in first.items():
+            v = np.asarray(v)
+            dtype = object if v.dtype.kind in "OUS" else v.dtype
+            new_labels[k] = np.empty((n,) + v.shape, dtype=dtype)
+
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            chunk_size = max(1, n // (4 * (self.n_processes or 1)))
+        chunks = [
+            np.arange(start, min(start + chunk_size, n))
+            for start in range(0, n, chunk_size)
+        ]
+
+        if self.n_processes:
+            pool = multiprocessing.Pool(
+                self.n_processes,
+                initializer=_init_labeler,
+                initargs=(self.data, self._labeler),
+            )
+            with pool:
+                results = pool.imap_unordered(_label_chunk, chunks)
+                self._fill(new_labels, results, n)
+        else:
+            results = (
+                (indices, _label_indices(self.data, self._labeler, indices))
+                for indices in chunks
+            )
+            self._fill(new_labels, results, n)
+
+        for k, v in new_labels.items():
+            if v.dtype == object:
+                new_labels[k] = np.array(v.tolist())
+        return new_labels
+
+    def _fill(self, new_labels, results, n):
+        with tqdm(total=n, desc="Labels", disable=not self.show_bar) as pbar:
+            for indices, chunk_labels in results:
+                for k in new_labels:
+                    values = chunk_labels[k]
+                    dtype = new_labels[k].dtype
+                    if dtype != object and not np.can_cast(values.dtype, dtype):
+                        # e.g. a float label after integer ones
+                        dtype = np.result_type(dtype, values.dtype)
+                        new_labels[k] = new_labels[k].astype(dtype)
+                    new_labels[k][indices] = values
+                pbar.update(len(indices))
+
+    def _load_cache(self):
+        """Loads the labels stored at :attr:`cache_path`.
+
+        Returns
+        -------
+        labels : dict
+            The labels or ``None`` if they have not been cached yet.
+        """
+        # Imported here to avoid circular imports with the believers package.
+        from edflow.data.believers.meta import load_labels
+
+        if not os.path.isdir(self.cache_path):
+            return None
+        return load_labels(self.cache_path)
+
+    def _store_cache(self):
+        from edflow.data.believers.meta_util import store_label_mmap
+
+        if any(v.dtype == object for v in self._new_labels.values()):
+            # Arbitrary python objects can not be memory mapped.
+            return
+
+        # Write to a temporary folder first, so that concurrent readers never
+        # see partially written labels.
+        tmp_path = "{}.{}.tmp".format(self.cache_path, os.getpid())
+        os.makedirs(tmp_path, exist_ok=True)
+        for k, v in self._new_labels.items():
+            store_label_mmap(v, tmp_path, k)
+        try:
+            os.rename(tmp_path, self.cache_path)
+        except OSError:
+            # Another process has been faster.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+_LABELER_STATE = {}
+
+
+def _init_labeler(data, labeler):
+    _LABELER_STATE["data"] = data
+    _LABELER_STATE["labeler"] = labeler
+
+
+def _label_chunk(indices):
+    data = _LABELER_STATE["data"]
+    labeler = _LABELER_STATE["labeler"]
+    return indices, _label_indices(data, labeler, indices)
+
+
+def _label_indices(data, labeler, indices):
+    """Applies the labeler to all indices and stacks the results per key."""
+    results = [labeler(data, int(i)) for i in indices]
+    return {k: np.array([r[k] for r in results]) for k in results[0]}
+
+
+def labeler_identity(labeler):
+    """A string identifying a labeler by its qualified name, its source code
+    if available and its state: the arguments of a ``functools.partial`` and
+    the attributes of a callable object or of the object a method is bound
+    to.
+
+    Parameters
+    ----------
+    labeler : Callable
+        A function or callable object.
+
+    Returns
+    -------
+    identity : str
+
+    Raises
+    ------
+    ValueError
+        If the state contains objects, which can only be described by their
+        memory address.
+    """
+    if isinstance(labeler, functools.partial):
+        return "\n".join(
+            [
+                "functools.partial",
+                labeler_identity(labeler.func),
+                describe_state(labeler.args),
+                describe_state(labeler.keywords),
+            ]
+        )
+
+    function = labeler if inspect.isroutine(labeler) else type(labeler)
+    name = "{}.{}".format(
+        getattr(function, "__module__", ""),
+        getattr(function, "__qualname__", type(labeler).__name__),
+    )
+    try:
+        source = inspect.getsource(function)
+    except (OSError, TypeError):
+        source = ""
+    identity = [name, source]
+
+    if inspect.ismethod(labeler):
+        identity += [describe_state(vars(labeler.__self__))]
+    elif not inspect.isroutine(labeler):
+        identity += [describe_state(getattr(labeler, "__dict__", {}))]
+    return "\n".join(identity)
+
+
+def describe_state(value):
+    """A string describing :attr:`value` by content. Arrays are described by
+    a hash of their data, callables by :func:`labeler_identity`.
+
+    Raises
+    ------
+    ValueError
+        If :attr:`value` can only be described by its memory address.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            content = describe_state(value.tolist()).encode("utf-8")
+        else:
+            content = np.ascontiguousarray(value).tobytes()
+        return "ndarray({}, {}, {})".format(
+            value.dtype, value.shape, hashlib.sha1(content).hexdigest()
+        )
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return "{{{}}}".format(
+            ", ".join("{!r}: {}".format(k, describe_state(v)) for k, v in items)
+        )
+    if isinstance(value, (list, tuple)):
+        return "{}[{}]".format(
+            type(value).__name__, ", ".join(describe_state(v) for v in value)
+        )
+    if callable(value) and not isinstance(value, type):
+        return labeler_identity(value)
+
+    description = repr(value)
+    if re.search(r" at 0x[0-9a-fA-F]+", description):
+        raise ValueError(
+            "Can not describe {} by its content. Pass an explicit `cache_key` "
+            "to cache the labels.".format(description)
+        )
+    return description
+
+
+def dataset_fingerprint(dataset):
+    """A string describing the state of a dataset via its type, length and
+    labels. Memory mapped labels are described by their files, all others by
+    a hash of their content.
+
+    Parameters
+    ----------
+    dataset : DatasetMixin
+        The dataset to fingerprint.
+
+    Returns
+    -------
+    fingerprint : str
+    """
+    state = [
+        "{}.{}".format(type(dataset).__module__, type(dataset).__qualname__),
+        str(len(dataset)),
+    ]
+    for k in sorted(dataset.labels.keys()):
+        label = dataset.labels[k]
+        filename = getattr(label, "filename", None)
+        if filename is not None:
+            stat = os.stat(filename)
+            state += [k, filename, str(stat.st_mtime_ns), str(stat.st_size)]
+        else:
+            label = np.asarray(label)
+            if label.dtype == object:
+                content = repr(label.tolist()).encode("utf-8")
+            else:
+                content = np.ascontiguousarray(label).tobytes()
+            state += [k, str(label.dtype), str(label.shape)]
+            state += [hashlib.sha1(content).hexdigest()]
+    return "\n".join(state)
@@ -0,0 +1,470 @@
+"""Indexed record files for :class:`edflow.data.util.cached_dset.CachedDataset`.
+
+A record cache is a folder containing
+
+    records.bin     # all encoded examples, appended one after the other
+    index.npy       # int64 array of shape [N, 3]: offset, length, codec
+    labels/         # the in_memory_keys as MetaDataset style memory maps
+
+Row ``i`` of the index locates example ``i`` in ``records.bin``. Rows of
+examples, which have not been written yet, have an offset of ``-1``, such
+that interrupted caching can be resumed. Both files are read through memory
+maps, so reading an example costs one slice and one unpickle, plus one
+decompression if the record has been compressed. Labels, which can not be
+stored as arrays, e.g. lists of varying length, are pickled into
+``labels.p`` instead.
+
+Records encoded with ``raw_arrays=True`` store the numpy arrays of an
+example as raw buffers, aligned to :data:`ALIGNMENT` bytes, behind the
+pickled remainder of the example, in which each array is replaced by its
+dtype, shape and offset. Uncompressed records of this kind are decoded
+without copying: their arrays are read only views into the memory mapped
+``records.bin``.
+
+Existing zip caches can be converted with :func:`convert_zip_cache` or
+
+.. code-block:: bash
+
+    python -m edflow.data.util.cache_records path/to/cache.zip
+"""
+
+import mmap
+import os
+import pickle
+import re
+import shutil
+import warnings
+import zlib
+from zipfile import ZipFile
+
+import numpy as np
+from tqdm import tqdm
+
+from edflow.data.believers.meta import list_label_files
+from edflow.data.believers.meta_util import store_label_mmap
+from edflow.util import walk
+
+
+RECORDS_NAME = "records.bin"
+INDEX_NAME = "index.npy"
+LABELS_NAME = "labels"
+PICKLED_LABELS_NAME = "labels.p"
+
+# Codecs are combinations of these flags.
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ARRAYS = 2
+
+ALIGNMENT = 64
+
+
+def encode_record(example, compression=0, raw_arrays=False):
+    """Serializes an example.
+
+    Parameters
+    ----------
+    example : object
+        Anything picklable.
+    compression : int
+        zlib compression level between 0 and 9. With 0 or if compression does
+        not reduce the size, the record is stored uncompressed.
+    raw_arrays : bool
+        Store numpy arrays in nested lists and dicts as raw buffers, which
+        can be decoded without copying.
+
+    Returns
+    -------
+    record : bytes
+        The encoded example.
+    codec : int
+        How the record has been encoded. Needed to decode it.
+    """
+    if raw_arrays:
+        record = _encode_arrays(example)
+        codec = CODEC_ARRAYS
+    else:
+        record = pickle.dumps(example, protocol=pickle.HIGHEST_PROTOCOL)
+        codec = CODEC_RAW
+
+    if compression:
+        compressed = zlib.compress(record, compression)
+        if len(compressed) < len(record):
+            return compressed, codec | CODEC_ZLIB
+    return record, codec
+
+
+def decode_record(record, codec):
+    """Inverse of :func:`encode_record`. Arrays of records encoded with
+    ``raw_arrays=True`` are read only views into :attr:`record`."""
+    codec = int(codec)
+    if codec & ~(CODEC_ZLIB | CODEC_ARRAYS):
+        raise ValueError("Unknown record codec {}".format(codec))
+    if codec & CODEC_ZLIB:
+        record = zlib.decompress(record)
+    if codec & CODEC_ARRAYS:
+        return _decode_arrays(record)
+    return pickle.loads(record)
+
+
+class _ArrayLeaf(object):
+    """Stands in for an array in the pickled part of a record."""
+
+    def __init__(self, dtype, shape, offset):
+        self.dtype = dtype
+        self.shape = shape
+        self.offset = offset
+
+
+def _aligned(n):
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def _encode_arrays(example):
+    """Encodes an example as ``[header length, header, padding, arrays]``,
+    where each array starts at a multiple of :data:`ALIGNMENT` relative to
+    the start of the record."""
+    arrays = []
+    size = [0]
+
+    def extract(value):
+        if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+            return value
+        if not value.flags.c_contiguous:
+            value = value.copy(order="C")
+        leaf = _ArrayLeaf(value.dtype, value.shape, size[0])
+        arrays.append(value)
+        size[0] = _aligned(size[0] + value.nbytes)
+        return leaf
+
+    header = pickle.dumps(walk(example, extract), protocol=pickle.HIGHEST_PROTOCOL)
+    start = _aligned(8 + len(header))
+
+    record = np.zeros(start + size[0], dtype=np.uint8)
+    record[:8] = np.frombuffer(len(header).to_bytes(8, "little"), dtype=np.uint8)
+    record[8 : 8 + len(header)] = np.frombuffer(header, dtype=np.uint8)
+    offset = start
+    for array in arrays:
+        record[offset : offset + array.nbytes] = array.reshape(-1).view(np.uint8)
+        offset = _aligned(offset + array.nbytes)
+    return record.tobytes()
+
+
+def _decode_arrays(record):
+    record = memoryview(record)
+    n_header = int.from_bytes(record[:8], "little")
+    header = pickle.loads(record[8 : 8 + n_header])
+    start = _aligned(8 + n_header)
+
+    def restore(value):
+        if not isinstance(value, _ArrayLeaf):
+            return value
+        count = int(np.prod(value.shape))
+        if count == 0:
+            return np.empty(value.shape, dtype=value.dtype)
+        array = np.frombuffer(
+            record, dtype=value.dtype, count=count, offset=start + value.offset
+        )
+        return array.reshape(value.shape)
+
+    return walk(header, restore)
+
+
+class RecordWriter(object):
+    """Appends records to a record cache. Records can be written in any
+    order.
+
+    Index entries are only committed after the records they point to have
+    been flushed to the file, such that an interrupted writer never leaves
+    entries pointing to unwritten bytes.
+    """
+
+    commit_every = 64
+
+    def __init__(self, root, n):
+        """
+        Parameters
+        ----------
+        root : str
+            Folder of the record cache. Created if it does not exist, opened
+            for appending otherwise.
+        n : int
+            Number of examples in the cache.
+        """
+        self.root = root
+        self.n = n
+
+        os.makedirs(root, exist_ok=True)
+        index_path = os.path.join(root, INDEX_NAME)
+        if os.path.exists(index_path):
+            self.index = np.load(index_path, mmap_mode="r+")
+            if len(self.index) != n:
+                raise ValueError(
+                    "Record cache at {} holds {} examples, but {} are "
+                    "expected.".format(root, len(self.index), n)
+                )
+        else:
+            tmp_path = "{}.{}.tmp.npy".format(index_path[: -len(".npy")], os.getpid())
+            index = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=np.int64, shape=(n, 3)
+            )
+            index[:, 0] = -1
+            index.flush()
+            del index
+            os.replace(tmp_path, index_path)
+            self.index = np.load(index_path, mmap_mode="r+")
+
+        self.file = open(os.path.join(root, RECORDS_NAME), "ab")
+        self.file.seek(0, os.SEEK_END)
+        self.pending = []
+
+        # Entries of records lost when an older writer was killed
+        ends = self.index[:, 0] + self.index[:, 1]
+        lost = (self.index[:, 0] >= 0) & (ends > self.file.tell())
+        if np.any(lost):
+            self.index[lost, 0] = -1
+
+    @property
+    def missing(self):
+        """Indices of all examples not written yet."""
+        self.commit()
+        return np.flatnonzero(self.index[:, 0] < 0)
+
+    def write(self, i, record, codec=CODEC_RAW):
+        """Appends the encoded example :attr:`i`. Records start at multiples
+        of :data:`ALIGNMENT`."""
+        offset = self.file.tell()
+        padding = _aligned(offset) - offset
+        if padding:
+            self.file.write(bytes(padding))
+            offset += padding
+        self.file.write(record)
+        self.pending += [(i, offset, len(record), codec)]
+        if len(self.pending) >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        """Flushes the written records and adds their index entries."""
+        if len(self.pending) == 0:
+            return
+        # Data first, such that the index never points to unwritten bytes.
+        self.file.flush()
+        for i, offset, length, codec in self.pending:
+            self.index[i] = (offset, length, codec)
+        self.pending = []
+
+    def close(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.commit()
+        self.file.close()
+        self.index.flush()
+        del self.index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RecordReader(object):
+    """Reads records from a record cache through memory maps. Memory maps are
+    opened lazily, such that readers can be pickled and are safe to use in
+    forked processes."""
+
+    def __init__(self, root):
+        """
+        Parameters
+        ----------
+        root : str
+            Folder of the record cache.
+        """
+        self.root = root
+        self._index = None
+        self._records = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = np.load(os.path.join(self.root, INDEX_NAME), mmap_mode="r")
+        return self._index
+
+    @property
+    def records(self):
+        if self._records is None:
+            with open(os.path.join(self.root, RECORDS_NAME), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._records = b""
+                else:
+                    self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._records
+
+    def __len__(self):
+        return len(self.index)
+
+    def read(self, i):
+        """Returns the encoded example :attr:`i` and its codec."""
+        offset, length, codec = self.index[i]
+        if offset < 0:
+            raise KeyError("Example {} is not in the cache {}".format(i, self.root))
+        return memoryview(self.records)[offset : offset + length], codec
+
+    def __getitem__(self, i):
+        return decode_record(*self.read(i))
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_index"] = None
+        state["_records"] = None
+        return state
+
+
+def store_cache_labels(root, labels):
+    """Stores the labels of a record cache.
+
+    Parameters
+    ----------
+    root : str
+        Folder of the record cache.
+    labels : dict
+        Maps each in_memory_key to a list or array of its values.
+    """
+    tmp_root = os.path.join(root, "{}.{}.tmp".format(LABELS_NAME, os.getpid()))
+    os.makedirs(tmp_root, exist_ok=True)
+
+    pickled = {}
+    for key, values in labels.items():
+        try:
+            with warnings.catch_warnings():
+                # older numpy versions warn about ragged values
+                warnings.simplefilter("ignore")
+                values = np.asarray(values)
+        except ValueError:
+            # ragged values
+            values = None
+        if values is None or values.dtype == object or values.size == 0:
+            pickled[key] = labels[key]
+        else:
+            store_label_mmap(values, tmp_root, key)
+
+    labels_root = os.path.join(root, LABELS_NAME)
+    if os.path.exists(labels_root):
+        shutil.rmtree(labels_root)
+    os.rename(tmp_root, labels_root)
+
+    pickled_path = os.path.join(root, PICKLED_LABELS_NAME)
+    if pickled:
+        with open(pickled_path, "wb") as f:
+            pickle.dump(pickled, f)
+    elif os.path.exists(pickled_path):
+        os.remove(pickled_path)
+
+
+def load_cache_labels(root):
+    """Loads the labels of a record cache. Labels stored as arrays are opened
+    as read only memory maps.
+
+    Parameters
+    ----------
+    root : str
+        Folder of the record cache.
+
+    Returns
+    -------
+    labels : dict
+        Maps each in_memory_key to its values.
+    """
+    labels = {}
+
+    pickled_path = os.path.join(root, PICKLED_LABELS_NAME)
+    if os.path.exists(pickled_path):
+        with open(pickled_path, "rb") as f:
+            labels.update(pickle.load(f))
+
+    labels_root = os.path.join(root, LABELS_NAME)
+    if os.path.isdir(labels_root):
+        for entry in list_label_files(labels_root):
+            labels[entry["key"]] = np.memmap(
+                entry["path"], mode="r", shape=entry["shape"], dtype=entry["dtype"]
+            )
+
+    return labels
+
+
+def is_record_cache(root):
+    """``True`` if :attr:`root` is a record cache."""
+    return os.path.isfile(os.path.join(root, INDEX_NAME))
+
+
+def convert_zip_cache(
+    zip_path, root=None, compression=0, raw_arrays=False, labels_name="labels.p"
+):
+    """Converts a zip cache written by
+    :class:`edflow.data.util.cached_dset.CachedDataset` into a record cache.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to the zip file.
+    root : str
+        Folder of the record cache. Defaults to :attr:`zip_path` with the
+        ending ``.records`` instead of ``.zip``.
+    compression : int
+        zlib compression level of the records.
+    raw_arrays : bool
+        Store arrays as raw buffers. See :func:`encode_record`.
+    labels_name : str
+        Name of the labels in the zip file. They are converted to memory maps
+        where possible.
+
+    Returns
+    -------
+    root : str
+        Folder of the record cache.
+    """
+    if root is None:
+        root = os.path.splitext(zip_path)[0] + ".records"
+
+    with ZipFile(zip_path, "r") as zip_f:
+        names = zip_f.namelist()
+        examples = {}
+        for name in names:
+            match = re.match(r"^example_(\d+)\.p$", name)
+            if match is not None:
+                examples[int(match.group(1))] = name
+        n = max(examples) + 1 if examples else 0
+
+        with RecordWriter(root, n) as writer:
+            for i in tqdm(sorted(examples), desc="Converting"):
+                example = pickle.loads(zip_f.read(examples[i]))
+                writer.write(i, *encode_record(example, compression, raw_arrays))
+
+        if labels_name in names:
+            # Later entries of the same name take precedence, see
+            # CachedDataset.cache_dataset.
+            store_cache_labels(root, pickle.loads(zip_f.read(labels_name)))
+
+    return root
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert a zip cache of a CachedDataset into a record cache."
+    )
+    parser.add_argument("zip_path", help="Path to the zip file.")
+    parser.add_argument("--root", help="Folder of the record cache.")
+    parser.add_argument(
+        "--compression", type=int, default=0, help="zlib compression level."
+    )
+    parser.add_argument(
+        "--raw-arrays",
+        action="store_true",
+        help="Store arrays as raw buffers, which are read without copying.",
+    )
+    args = parser.parse_args()
+
+    print(
+        convert_zip_cache(args.zip_path, args.root, args.compression, args.raw_arrays)
+    )
@@ -1,23 +1,141 @@
-from tqdm import tqdm, trange
+from tqdm import tqdm
 from zipfile import ZipFile, ZIP_DEFLATED  # , ZIP_BZIP2, ZIP_LZMA
 import numpy as np
 import os
 import pickle
+import shutil
+import time
+import threading
+import collections
+import functools
+import hashlib
+import inspect
+import json
+import re
 
 from multiprocessing.managers import BaseManager
 import queue
 
 from edflow.data.dataset_mixin import DatasetMixin
+from edflow.data.util.cache_records import (
+    RecordReader,
+    RecordWriter,
+    encode_record,
+    is_record_cache,
+    convert_zip_cache,
+    store_cache_labels,
+    load_cache_labels,
+)
+
+
+class ChunkLeases(object):
+    """Hands out chunks of work to the workers. A chunk, which has not been
+    completed within :attr:`lease_timeout` seconds after it has been leased
+    or after the last heartbeat of its worker, is handed out again, such that
+    chunks of dead workers are not lost.
+
+    Lives in the process of the manager server, see
+    :func:`make_server_manager`.
+    """
+
+    def __init__(self, lease_timeout=600):
+        self.lease_timeout = lease_timeout
+        self.lock = threading.Lock()
+        self.tasks = {}
+        self.pending = collections.deque()
+        self.leased = {}
+        self.completed = set()
+        self.last_contact = None
+
+    def put(self, tasks):
+        """Adds a list of ``(chunk_id, task)`` pairs."""
+        with self.lock:
+            for chunk_id, task in tasks:
+                self.tasks[chunk_id] = task
+                self.pending.append(chunk_id)
+
+    def lease(self):
+        """Returns a ``(chunk_id, task)`` pair or ``None``, if no chunk is
+        pending at the moment."""
+        with self.lock:
+            now = time.time()
+            self.last_contact = now
+            for chunk_id, leased_at in list(self.leased.items()):
+                if now - leased_at > self.lease_timeout:
+                    del self.leased[chunk_id]
+                    self.pending.append(chunk_id)
+                    print("Lease of chunk {} expired.".format(chunk_id))
+
+            if len(self.pending) == 0:
+                return None
+            chunk_id = self.pending.popleft()
+            self.leased[chunk_id] = now
+            return chunk_id, self.tasks[chunk_id]
+
+    def heartbeat(self, chunk_id):
+        """Called regularly by the worker working on :attr:`chunk_id` to
+        renew its lease."""
+        with self.lock:
+            now = time.time()
+            self.last_contact = now
+            if chunk_id in self.leased:
+                self.leased[chunk_id] = now
+
+    def complete(self, chunk_id):
+        """Marks a chunk as completed. Returns ``False`` if it has been
+        completed before, i.e. if a worker delivered it after its lease
+        expired."""
+        with self.lock:
+            self.last_contact = time.time()
+            if chunk_id in self.completed:
+                return False
+            self.completed.add(chunk_id)
+            self.leased.pop(chunk_id, None)
+            if chunk_id in self.pending:
+                self.pending.remove(chunk_id)
+            return True
+
+    def finished(self):
+        """``True`` if all chunks have been completed."""
+        with self.lock:
+            return len(self.completed) == len(self.tasks)
+
+    def idle_time(self):
+        """Seconds since a worker last asked for a chunk, sent a heartbeat or
+        delivered a chunk or ``None``, if no worker has been in contact yet.
+        """
+        with self.lock:
+            if self.last_contact is None:
+                return None
+            return time.time() - self.last_contact
 
 
-def make_server_manager(port=63127, authkey=b"edcache"):
-    inqueue = queue.Queue()
-    outqueue = queue.Queue()
+def make_server_manager(
+    port=63127, authkey=b"edcache", lease_timeout=600, max_pending=8
+):
+    """Starts the manager server distributing the chunks.
+
+    Parameters
+    ----------
+    port : int
+        Port to listen at.
+    authkey : bytes
+        Key workers need to connect.
+    lease_timeout : float
+        Seconds after which chunks leased by a worker are handed out again,
+        unless the worker renews the lease.
+    max_pending : int
+        Maximum number of finished chunks waiting to be written. Workers
+        block when delivering further chunks, which bounds the memory of the
+        server.
+    """
+    leases = ChunkLeases(lease_timeout)
+    outqueue = queue.Queue(maxsize=max_pending)
 
     class InOutManager(BaseManager):
         pass
 
-    InOutManager.register("get_inqueue", lambda: inqueue)
+    InOutManager.register("get_leases", lambda: leases)
     InOutManager.register("get_outqueue", lambda: outqueue)
     manager = InOutManager(address=("", port), authkey=authkey)
     manager.start()
@@ -29,7 +147,7 @@ def make_client_manager(ip, port=63127, authkey=b"edcache"):
     class InOutManager(BaseManager):
         pass
 
-    InOutManager.register("get_inqueue")
+    InOutManager.register("get_leases")
     InOutManager.register("get_outqueue")
     manager = InOutManager(address=(ip, port), authkey=authkey)
     manager.connect()
@@ -38,7 +156,11 @@ def make_client_manager(ip, port=63127, authkey=b"edcache"):
 
 
 def pickle_and_queue(
-    dataset_factory, inqueue, outqueue, naming_template="example_{}.p"
+    dataset_factory,
+    leases,
+    outqueue,
+    naming_template="example_{}.p",
+    poll_interval=1.0,
 ):
     """Parallelizable function to retrieve and queue examples from a Dataset.
 
@@ -46,35 +168,101 @@ def pickle_and_queue(
     ----------
     dataset_factory : chainer.DatasetMixin
         A dataset factory, with methods described in :class:`CachedDataset`.
-    indeces : list
-        List of indeces, used to retrieve samples from dataset.
-    queue : mp.Queue
-        Queue to put the samples in.
+    leases : ChunkLeases
+        Hands out the chunks of indices to work on.
+    outqueue : queue.Queue
+        Queue to put the finished chunks in.
     naming_template : str
         Formatable string, which defines the name of the stored file given
         its index.
-
+    poll_interval : float
+        Seconds to wait before asking for work again, while all remaining
+        chunks are leased by other workers.
+
+    Tasks are dicts containing the ``indices`` of the chunk, the
+    ``compression`` level, whether to store ``raw_arrays`` and the
+    ``heartbeat_interval``, i.e. the seconds after which the lease of the
+    chunk is renewed between two examples. Each finished
+    chunk is queued as one message ``[chunk_id, results]``. For record
+    caches, i.e. if ``compression`` is not ``None``, examples are serialized
+    and compressed here using
+    :func:`edflow.data.util.cache_records.encode_record` and each result is
+    ``[index, record, codec, labels]``, such that the server only has to
+    append them. Otherwise results are ``[name, pickle_bytes, labels]``.
+    ``labels`` contains the values of the dataset's ``in_memory_keys``, such
+    that the server does not need to read the examples again.
+
+    Returns when all chunks are completed or the server is gone.
     """
-    pbar = tqdm()
+    pbar = tqdm(unit="ex")
     dataset = dataset_factory()
+    memory_keys = getattr(dataset, "in_memory_keys", [])
     while True:
         try:
-            indices = inqueue.get_nowait()
-        except queue.Empty:
+            lease = leases.lease()
+            if lease is None:
+                if leases.finished():
+                    return
+                time.sleep(poll_interval)
+                continue
+        except (EOFError, ConnectionError):
+            # server shut down
             return
 
-        for idx in indices:
+        chunk_id, task = lease
+        compression = task["compression"]
+        raw_arrays = task.get("raw_arrays", False)
+        heartbeat_interval = task.get("heartbeat_interval", poll_interval)
+        last_heartbeat = time.time()
+
+        results = []
+        for idx in task["indices"]:
+            if time.time() - last_heartbeat > heartbeat_interval:
+                try:
+                    leases.heartbeat(chunk_id)
+                except (EOFError, ConnectionError):
+                    return
+                last_heartbeat = time.time()
+
             try:
                 example = dataset[idx]
             except BaseException:
                 print("Error getting example {}".format(idx))
                 raise
-            pickle_name = naming_template.format(idx)
-            pickle_bytes = pickle.dumps(example)
 
-            outqueue.put([pickle_name, pickle_bytes])
+            labels = {key: example[key] for key in memory_keys}
+
+            if compression is not None:
+                record, codec = encode_record(example, compression, raw_arrays)
+                results += [[int(idx), record, codec, labels]]
+            else:
+                pickle_name = naming_template.format(idx)
+                pickle_bytes = pickle.dumps(example)
+
+                results += [[pickle_name, pickle_bytes, labels]]
             pbar.update(1)
 
+        try:
+            # Blocks while the server is busy writing.
+            outqueue.put([chunk_id, results])
+        except (EOFError, ConnectionError):
+            return
+
+
+def run_cache_worker(dataset_factory, ip, port=63127, authkey=b"edcache"):
+    """Connects to the caching server at :attr:`ip` and works on its chunks
+    until all are done."""
+    manager = make_client_manager(ip, port=port, authkey=authkey)
+    pickle_and_queue(dataset_factory, manager.get_leases(), manager.get_outqueue())
+
+
+def throughput(n_examples, n_bytes, seconds):
+    """Formats the caching throughput in examples/s and MB/s."""
+    seconds = max(seconds, 1e-9)
+    return "{} examples in {:.1f}s: {:.1f} examples/s, {:.2f} MB/s".format(
+        n_examples, seconds, n_examples / seconds, n_bytes / seconds / 2 ** 20
+    )
+
 
 class ExamplesFolder(object):
     """Contains all examples and labels of a cached dataset."""
@@ -90,13 +278,16 @@ class ExamplesFolder(object):
 class _CacheDataset(DatasetMixin):
     """Only used to avoid initializing the original dataset."""
 
-    def __init__(self, root, name, _legacy=True):
+    def __init__(self, root, name, _legacy=True, records=False):
         self.root = root
         self.name = name
 
         filespath = os.path.join(root, "cached", name)
 
-        if _legacy:
+        if records:
+            self.n = len(RecordReader(filespath + ".records"))
+            return
+        elif _legacy:
             zippath = filespath + ".zip"
             # naming_template = 'example_{}.p'
             with ZipFile(zippath, "r") as zip_f:
@@ -160,9 +351,24 @@ class CachedDataset(DatasetMixin):
         edcache --address <server_ip_or_hostname> --dataset import.path.to.DataCache  # noqa
 
     Start a cacherhive!
+
+    With ``records=True`` examples are stored in an indexed record file
+    (see :mod:`edflow.data.util.cache_records`) in the folder `name.records`
+    instead of a zip. Reading an example then only slices a memory map and
+    unpickles the example. Existing zip caches can be converted with
+    :func:`edflow.data.util.cache_records.convert_zip_cache`. Additionally
+    passing ``raw_arrays=True`` stores the numpy arrays of the examples as
+    raw buffers, which are returned as read only views into the cache file
+    if the records are not compressed.
     """
 
     _legacy = True
+    records = False
+    chunk_size = 64
+    port = 63127
+    lease_timeout = 600
+    max_pending = 8
+    poll_interval = 1.0
 
     def __init__(
         self,
@@ -171,6 +377,12 @@ class CachedDataset(DatasetMixin):
         keep_existing=True,
         _legacy=True,
         chunk_size=64,
+        records=False,
+        compression=0,
+        raw_arrays=False,
+        port=63127,
+        lease_timeout=600,
+        max_pending=8,
     ):
         """Given a dataset class, stores all examples in the dataset, if this
         has not yet happened.
@@ -184,7 +396,8 @@ class CachedDataset(DatasetMixin):
             - `__len__`: number of examples in the dataset \n
             - `__getitem__`: returns a sindle datum \n
             - `in_memory_keys`: returns all keys, that are stored \n
-            alongside the dataset, in a `labels.p` file. This
+            alongside the dataset, in a `labels.p` file or as memory maps
+            in the `labels` folder of record caches. This
             allows to retrive labels more quickly and can be used
             to filter the data more easily.
         force_cache : bool
@@ -200,11 +413,37 @@ class CachedDataset(DatasetMixin):
             very long.
         chunksize : int
             Length of the index list that is sent to the worker.
+        records : bool
+            Store and read examples in an indexed record file instead of a
+            zip. Takes precedence over :attr:`_legacy`.
+        compression : int
+            zlib compression level of the records between 0 (uncompressed)
+            and 9. Only used with :attr:`records`.
+        raw_arrays : bool
+            Store numpy arrays as raw buffers, such that they can be read
+            without copying. Arrays of uncompressed examples are then read
+            only. Only used with :attr:`records`.
+        port : int
+            Port of the caching server.
+        lease_timeout : float
+            Seconds after which chunks leased by a worker are handed to
+            another worker, e.g. because the first one died. Workers renew
+            their leases between examples, so that only a single example has
+            to be loaded within this time.
+        max_pending : int
+            Maximum number of finished chunks queued on the server. Bounds
+            the memory of the server, if the workers are faster than it.
         """
 
         self.force_cache = force_cache
         self.keep_existing = keep_existing
         self._legacy = _legacy
+        self.records = records
+        self.compression = compression
+        self.raw_arrays = raw_arrays
+        self.port = port
+        self.lease_timeout = lease_timeout
+        self.max_pending = max_pending
 
         self.base_dataset = dataset
         self._root = root = dataset.root
@@ -213,7 +452,9 @@ class CachedDataset(DatasetMixin):
 
         self.store_dir = os.path.join(root, "cached")
         self.store_path = os.path.join(self.store_dir, name)
-        if _legacy:
+        if records:
+            self.store_path += ".records"
+        elif _legacy:
             self.store_path += ".zip"
 
         # leading_zeroes = str(len(str(len(self))))
@@ -228,12 +469,12 @@ class CachedDataset(DatasetMixin):
             self.cache_dataset()
 
     @classmethod
-    def from_cache(cls, root, name, _legacy=True):
+    def from_cache(cls, root, name, _legacy=True, records=False):
         """Use this constructor to avoid initialization of original dataset
         which can be useful if only the cached zip file is available or to
         avoid expensive constructors of datasets."""
-        dataset = _CacheDataset(root, name, _legacy)
-        return cls(dataset, _legacy=_legacy)
+        dataset = _CacheDataset(root, name, _legacy, records)
+        return cls(dataset, _legacy=_legacy, records=records)
 
     def __getstate__(self):
         """Close file before pickling."""
@@ -245,6 +486,10 @@ class CachedDataset(DatasetMixin):
 
     @property
     def fork_safe_zip(self):
+        if self.records:
+            if getattr(self, "_reader", None) is None:
+                self._reader = RecordReader(self.store_path)
+            return self._reader
         if self._legacy:
             currentpid = os.getpid()
             if getattr(self, "_initpid", None) != currentpid:
@@ -257,14 +502,15 @@ class CachedDataset(DatasetMixin):
         """Checks if a dataset is stored. If not iterates over all possible
         indeces and stores the examples in a file, as well as the labels."""
 
+        if self.records:
+            return self._cache_records()
+
         if not os.path.isfile(self.store_path) or self.force_cache:
             print("Caching {}".format(self.store_path))
-            manager = make_server_manager()
-            inqueue = manager.get_inqueue()
-            outqueue = manager.get_outqueue()
 
             N_examples = len(self.base_dataset)
             indeces = np.arange(N_examples)
+            kept = []
             if self.keep_existing and os.path.isfile(self.store_path):
                 with ZipFile(self.store_path, "r") as zip_f:
                     zipfilenames = zip_f.namelist()
@@ -274,28 +520,27 @@ class CachedDataset(DatasetMixin):
                     for i in indeces
                     if not self.naming_template.format(i) in zipfilenames
                 ]
+                kept = sorted(set(range(N_examples)) - set(indeces))
                 print("Keeping {} cached examples.".format(N_examples - len(indeces)))
                 N_examples = len(indeces)
             print("Caching {} examples.".format(N_examples))
-            index_chunks = [
-                indeces[i : i + self.chunk_size]
-                for i in range(0, len(indeces), self.chunk_size)
-            ]
-            for chunk in index_chunks:
-                inqueue.put(chunk)
-            print("Waiting for results.")
 
-            pbar = tqdm(total=N_examples)
+            pbar = tqdm(total=N_examples, unit="ex")
             mode = "a" if self.keep_existing else "w"
+            start = time.time()
+            n_bytes = 0
+            memory_dict = self._new_memory_dict()
             with ZipFile(self.store_path, mode, ZIP_DEFLATED) as self.zip:
-                done_count = 0
-                while True:
-                    if done_count == N_examples:
-                        break
-                    pickle_name, pickle_bytes = outqueue.get()
+                results = self._serve(indeces, {"compression": None})
+                for pickle_name, pickle_bytes, labels in results:
                     self.zip.writestr(pickle_name, pickle_bytes)
+                    idx = int(pickle_name[len("example_") : -len(".p")])
+                    for key, value in labels.items():
+                        memory_dict[key][idx] = value
+                    n_bytes += len(pickle_bytes)
                     pbar.update(1)
-                    done_count += 1
+            pbar.close()
+            print("Cached " + throughput(N_examples, n_bytes, time.time() - start))
 
             # after everything is done, we store memory keys seperately for
             # more efficient access
@@ -307,23 +552,125 @@ class CachedDataset(DatasetMixin):
             # is _not_ documented or guaranteed in the API. If you experience
             # problems, try to write a new zip file with desired contents or
             # delete cached zip and cache again.
-            memory_dict = dict()
-            if hasattr(self.base_dataset, "in_memory_keys"):
-                print("Caching Labels.")
-                memory_keys = self.base_dataset.in_memory_keys
-                for key in memory_keys:
-                    memory_dict[key] = list()
-
-                for idx in trange(len(self.base_dataset)):
-                    example = self[idx]  # load cached version
-                    # extract keys
-                    for key in memory_keys:
-                        memory_dict[key].append(example[key])
-
+            self._complete_memory_dict(memory_dict, kept)
             with ZipFile(self.store_path, "a", ZIP_DEFLATED) as zipfile:
                 zipfile.writestr(self._labels_name, pickle.dumps(memory_dict))
             print("Finished caching.")
 
+    def _cache_records(self):
+        """Like :meth:`cache_dataset` but writing into a record file."""
+        N_examples = len(self.base_dataset)
+        exists = is_record_cache(self.store_path)
+        if exists and not self.force_cache:
+            return
+
+        if exists and not self.keep_existing:
+            shutil.rmtree(self.store_path)
+
+        print("Caching {}".format(self.store_path))
+        with RecordWriter(self.store_path, N_examples) as writer:
+            indeces = writer.missing
+            print("Keeping {} cached examples.".format(N_examples - len(indeces)))
+            print("Caching {} examples.".format(len(indeces)))
+
+            task = {"compression": self.compression, "raw_arrays": self.raw_arrays}
+
+            # Workers encode and compress, here records are only appended.
+            start = time.time()
+            n_bytes = 0
+            memory_dict = self._new_memory_dict()
+            pbar = tqdm(total=len(indeces), unit="ex")
+            for idx, record, codec, labels in self._serve(indeces, task):
+                writer.write(idx, record, codec)
+                for key, value in labels.items():
+                    memory_dict[key][idx] = value
+                n_bytes += len(record)
+                seconds = max(time.time() - start, 1e-9)
+                pbar.set_postfix(
+                    MBps="{:.2f}".format(n_bytes / 2 ** 20 / seconds), refresh=False
+                )
+                pbar.update(1)
+            pbar.close()
+            print("Cached " + throughput(len(indeces), n_bytes, time.time() - start))
+            kept = np.setdiff1d(np.arange(N_examples), indeces)
+
+        self._complete_memory_dict(memory_dict, kept)
+        store_cache_labels(self.store_path, memory_dict)
+        print("Finished caching.")
+
+    def _serve(self, indeces, task):
+        """Distributes chunks of :attr:`indeces` to the workers and yields
+        the results of all examples. Raises a ``RuntimeError`` if no worker
+        has been in contact for twice the :attr:`lease_timeout`, i.e. if all
+        workers have died. Busy workers renew their leases between examples,
+        thus a single example must take less than :attr:`lease_timeout`.
+
+        Parameters
+        ----------
+        indeces : list
+            Indices of the examples to cache.
+        task : dict
+            Options for the workers, see :func:`pickle_and_queue`.
+        """
+        manager = make_server_manager(
+            port=self.port,
+            lease_timeout=self.lease_timeout,
+            max_pending=self.max_pending,
+        )
+        try:
+            leases = manager.get_leases()
+            outqueue = manager.get_outqueue()
+
+            task = dict(task, heartbeat_interval=self.lease_timeout / 4)
+            tasks = []
+            for i in range(0, len(indeces), self.chunk_size):
+                chunk = [int(idx) for idx in indeces[i : i + self.chunk_size]]
+                tasks += [(len(tasks), dict(task, indices=chunk))]
+            leases.put(tasks)
+            print("Waiting for results.")
+
+            n_chunks = len(tasks)
+            while n_chunks > 0:
+                try:
+                    chunk_id, results = outqueue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    # Idle workers ask for chunks regularly and busy workers
+                    # send heartbeats.
+                    idle_time = leases.idle_time()
+                    if idle_time is not None and idle_time > 2 * self.lease_timeout:
+                        raise RuntimeError(
+                            "No worker has been in contact for {:.0f}s, but {} "
+                            "chunks are missing. All workers seem to have "
+                            "died.".format(idle_time, n_chunks)
+                        )
+                    continue
+                if not leases.complete(chunk_id):
+                    # delivered again after its lease expired
+                    continue
+                n_chunks -= 1
+                for result in results:
+                    yield result
+        finally:
+            manager.shutdown()
+
+    def _new_memory_dict(self):
+        """Holds the values of all in_memory_keys, which the workers send
+        along with the examples."""
+        memory_keys = getattr(self.base_dataset, "in_memory_keys", [])
+        N_examples = len(self.base_dataset)
+        return {key: [None] * N_examples for key in memory_keys}
+
+    def _complete_memory_dict(self, memory_dict, kept):
+        """Adds the labels of examples, which have been cached in an earlier
+        run, by reading them from the cache."""
+        if not memory_dict or len(kept) == 0:
+            return
+        print("Collecting labels of {} kept examples.".format(len(kept)))
+        for idx in tqdm(kept):
+            example = self[idx]  # load cached version
+            for key in memory_dict:
+                memory_dict[key][idx] = example[key]
+
     def __len__(self):
         """Number of examples in this Dataset."""
         return len(self.base_dataset)
@@ -333,6 +680,9 @@ class CachedDataset(DatasetMixin):
         """Returns the labels associated with the base dataset, but from the
         cached source."""
         if not hasattr(self, "_labels"):
+            if self.records:
+                self._labels = load_cache_labels(self.store_path)
+                return self._labels
             labels = self.fork_safe_zip.read(self._labels_name)
             labels = pickle.loads(labels)
             self._labels = labels
@@ -346,6 +696,9 @@ class CachedDataset(DatasetMixin):
     def get_example(self, i):
         """Given an index i, returns a example."""
 
+        if self.records:
+            return self.fork_safe_zip[i]
+
         example_name = self.naming_template.format(i)
         example_file = self.fork_safe_zip.read(example_name)
 
@@ -387,34 +740,214 @@ class PathCachedDataset(CachedDataset):
         return self._len
 
 
-def cachable(path):
+def cache_key(fn, args=(), kwargs=None):
+    """Stable hash of the qualified name of :attr:`fn` and the arguments it
+    is called with. Arguments are bound to the signature of :attr:`fn`, such
+    that passing an argument by position, by keyword or not at all, if it
+    equals the default, gives the same key. Arguments are described by their
+    json representation, numpy arrays by their dtype, shape and a hash of
+    their data and all other objects by their ``repr``, which should
+    therefore not contain values changing between runs.
+
+    Returns
+    -------
+    key : str
+        16 hexadecimal characters.
+
+    Raises
+    ------
+    ValueError
+        If an argument can only be described by its memory address.
+    """
+    kwargs = kwargs or {}
+    try:
+        bound = inspect.signature(fn).bind(*args, **kwargs)
+        bound.apply_defaults()
+        parameters = dict(bound.arguments)
+    except (TypeError, ValueError):
+        parameters = {"args": list(args), "kwargs": kwargs}
+
+    name = "{}.{}".format(fn.__module__, getattr(fn, "__qualname__", fn.__name__))
+    description = json.dumps([name, parameters], sort_keys=True, default=_describe)
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()[:16]
+
+
+def _describe(value):
+    """Describes arguments of :func:`cache_key`, which json can not
+    serialize."""
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return {"shape": list(value.shape), "values": value.tolist()}
+        data = np.ascontiguousarray(value).tobytes()
+        return {
+            "dtype": str(value.dtype),
+            "shape": list(value.shape),
+            "sha1": hashlib.sha1(data).hexdigest(),
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+
+    description = repr(value)
+    if re.search(r" at 0x[0-9a-fA-F]+", description):
+        raise ValueError(
+            "Can not build a cache key from the argument {}, as it is only "
+            "described by its memory address.".format(description)
+        )
+    return description
+
+
+def keyed_cache_path(path, key):
+    """Path of the cache with :attr:`key` for the :func:`cachable` at
+    :attr:`path`, e.g. ``data-<key>.zip`` for ``data.zip``."""
+    base, ext = os.path.splitext(path)
+    return "{}-{}{}".format(base, key, ext)
+
+
+def evict_caches(path, max_bytes, keep=()):
+    """Deletes the least recently used caches of the :func:`cachable` at
+    :attr:`path` until all of them together take up at most
+    :attr:`max_bytes`.
+
+    Parameters
+    ----------
+    path : str
+        Path passed to :func:`cachable`.
+    max_bytes : int
+        Disk budget.
+    keep : list(str)
+        Paths of caches, which must not be deleted.
+
+    Returns
+    -------
+    evicted : list(str)
+        Paths of the deleted caches.
+    """
+    base, ext = os.path.splitext(path)
+    pattern = re.compile(
+        "^{}-[0-9a-f]{{16}}{}$".format(
+            re.escape(os.path.basename(base)), re.escape(ext)
+        )
+    )
+    root = os.path.dirname(path) or "."
+
+    caches = []
+    for name in os.listdir(root):
+        cache_path = os.path.join(root, name)
+        lenfile = cache_path + ".p"
+        if pattern.match(name) and os.path.exists(lenfile):
+            files = [cache_path, lenfile, cache_path + "parameters.p"]
+            size = sum(_disk_size(f) for f in files)
+            # The length file is touched on every use.
+            caches += [(os.stat(lenfile).st_mtime, cache_path, files, size)]
+
+    total = sum(c[-1] for c in caches)
+    evicted = []
+    for _, cache_path, files, size in sorted(caches):
+        if total <= max_bytes:
+            break
+        if cache_path in keep:
+            continue
+        for f in files:
+            if os.path.isdir(f):
+                shutil.rmtree(f)
+            elif os.path.exists(f):
+                os.remove(f)
+        total -= size
+        evicted += [cache_path]
+        _log_cache_event(path, "evict", cache_path)
+    return evicted
+
+
+def _disk_size(path):
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(r, f))
+            for r, _, files in os.walk(path)
+            for f in files
+        )
+    if os.path.exists(path):
+        return os.path.getsize(path)
+    return 0
+
+
+def _log_cache_event(path, event, cache_path):
+    """Prints a cache event and appends it to ``<path>.log``."""
+    message = "{}\t{}\t{}".format(
+        time.strftime("%Y-%m-%d %H:%M:%S"), event, os.path.basename(cache_path)
+    )
+    print("Cache {}: {}".format(event, cache_path))
+    with open(path + ".log", "a") as f:
+        f.write(message + "\n")
+
+
+def cachable(path, max_bytes=None):
     """Decorator to cache datasets. If not cached, will start a caching server,
     subsequent calls will just load from cache. Currently all worker must be
-    able to see the path. Be careful, function parameters are ignored on
-    furture calls.
+    able to see the path.
     Can be used on any callable that returns a dataset. Currently the path
     should be the path to a zip file to cache into - i.e. it should end in zip.
+
+    Each parameterization of the callable is cached separately at
+    ``<path without .zip>-<key>.zip``, where ``key`` is a hash of the
+    qualified name of the callable and its arguments (see
+    :func:`cache_key`). Changing the arguments thus builds a new cache,
+    while caches of other arguments are kept.
+
+    Workers started with ``edcache`` call the callable without arguments.
+    They receive the dataset with the arguments of the cache currently being
+    built, which are stored at ``<path>parameters.p`` until the cache is
+    complete.
+
+    Hits, misses and evictions are printed and logged to ``<path>.log``.
+
+    Parameters
+    ----------
+    path : str
+        Path of the cache.
+    max_bytes : int
+        If given, the least recently used caches are deleted after building
+        a new one, until all caches of the callable take up at most this
+        many bytes.
     """
 
     def decorator(fn):
+        @functools.wraps(fn)
         def wrapped(*args, **kwargs):
-            if os.path.exists(path + ".p"):
+            key = cache_key(fn, args, kwargs)
+            cache_path = keyed_cache_path(path, key)
+            building_path = path + "parameters.p"
+            os.makedirs(os.path.split(path)[0], exist_ok=True)
+
+            if os.path.exists(building_path):
+                with open(building_path, "rb") as f:
+                    building_args, building_kwargs = pickle.load(f)
+                building_key = cache_key(fn, building_args, building_kwargs)
+                if building_key == key or (len(args) == 0 and len(kwargs) == 0):
+                    # caching server started and we are a worker bee
+                    return fn(*building_args, **building_kwargs)
+
+            if os.path.exists(cache_path + ".p"):
                 # cached version ready
-                return PathCachedDataset(None, path)
-            elif os.path.exists(path + "parameters.p"):
-                # zip exists but not pickle with length - caching server
-                # started and we are a worker bee
-                with open(path + "parameters.p", "rb") as f:
-                    args, kwargs = pickle.load(f)
-                return fn(*args, **kwargs)
-            else:
-                # start caching server
-                dataset = fn(*args, **kwargs)
-                os.makedirs(os.path.split(path)[0], exist_ok=True)
-                with open(path + "parameters.p", "wb") as f:
+                os.utime(cache_path + ".p")
+                _log_cache_event(path, "hit", cache_path)
+                return PathCachedDataset(None, cache_path)
+
+            # start caching server
+            _log_cache_event(path, "miss", cache_path)
+            dataset = fn(*args, **kwargs)
+            for parameters_path in [building_path, cache_path + "parameters.p"]:
+                with open(parameters_path, "wb") as f:
                     pickle.dump((args, kwargs), f)
-                return PathCachedDataset(dataset, path)
+            cached = PathCachedDataset(dataset, cache_path)
+            os.remove(building_path)
+
+            if max_bytes is not None:
+                evict_caches(path, max_bytes, keep=[cache_path])
+            return cached
 
+        wrapped.cache_path = lambda *args, **kwargs: keyed_cache_path(
+            path, cache_key(fn, args, kwargs)
+        )
         return wrapped
 
     return decorator
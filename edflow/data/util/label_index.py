@@ -0,0 +1,226 @@
+import os
+import numpy as np
+
+
+class LabelIndex(object):
+    """An inverted index over a label array, mapping each unique label value
+    to all indices at which it can be found.
+
+    The index is built in a single pass using :func:`numpy.unique` and a
+    stable argsort. All indices belonging to one value are stored as a
+    contiguous slice of :attr:`order`, starting at ``offsets[group]`` and
+    ending at ``offsets[group + 1]``.
+
+    .. code-block:: python
+
+        labels = np.array(["a", "b", "a", "c", "b", "a"])
+        LI = LabelIndex(labels)
+
+        LI.indices("a")  # [0, 2, 5]
+        LI.group_size("b")  # 2
+        LI.sample([0, 1], n=1, avoid_identity=True)  # [[2 or 5], [4]]
+    """
+
+    _files = ["values", "inverse", "order", "offsets"]
+
+    def __init__(
+        self, labels=None, values=None, inverse=None, order=None, offsets=None
+    ):
+        """
+        Parameters
+        ----------
+        labels : np.ndarray
+            One dimensional array of labels, which should be indexed. If
+            ``None``, the precomputed :attr:`values`, :attr:`inverse`,
+            :attr:`order` and :attr:`offsets` are used instead. See
+            :meth:`load`.
+        """
+        if labels is not None:
+            labels = np.asarray(labels)
+            if labels.ndim != 1:
+                raise ValueError(
+                    "Labels must be one dimensional to be indexed, but have "
+                    "shape {}".format(labels.shape)
+                )
+            values, inverse, counts = np.unique(
+                labels, return_inverse=True, return_counts=True
+            )
+            order = np.argsort(inverse, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        self.values = values
+        self.inverse = inverse
+        self.order = order
+        self.offsets = offsets
+
+    def __len__(self):
+        """Number of unique values."""
+        return len(self.values)
+
+    @property
+    def n_indices(self):
+        """Length of the indexed label array."""
+        return len(self.inverse)
+
+    @property
+    def sizes(self):
+        """Number of indices per unique value."""
+        return np.diff(self.offsets)
+
+    @property
+    def positions(self):
+        """Position of each index inside :attr:`order`."""
+        if not hasattr(self, "_positions"):
+            positions = np.empty(len(self.order), dtype=np.int64)
+            positions[self.order] = np.arange(len(self.order))
+            self._positions = positions
+        return self._positions
+
+    def group(self, value):
+        """Returns the group id of :attr:`value`.
+
+        Raises
+        ------
+        KeyError
+            If :attr:`value` is not found in the indexed labels.
+        """
+        group = np.searchsorted(self.values, value)
+        if group >= len(self.values) or self.values[group] != value:
+            raise KeyError(value)
+        return int(group)
+
+    def indices(self, value):
+        """All indices at which the labels equal :attr:`value`."""
+        group = self.group(value)
+        return self.order[self.offsets[group] : self.offsets[group + 1]]
+
+    def group_size(self, value):
+        """Number of indices at which the labels equal :attr:`value`."""
+        group = self.group(value)
+        return int(self.offsets[group + 1] - self.offsets[group])
+
+    def items(self):
+        """Iterates over ``value, indices`` pairs."""
+        for group, value in enumerate(self.values):
+            yield value, self.order[self.offsets[group] : self.offsets[group + 1]]
+
+    def sample(self, indices, n=1, prng=None, avoid_identity=False, replace=False):
+        """Samples :attr:`n` partners for each index in :attr:`indices`, which
+        have the same label value as the index itself. Sampling is vectorized
+        over all indices.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            Indices to find partners for.
+        n : int
+            Number of partners per index.
+        prng : np.random.RandomState
+            Random number generator. Uses the global numpy state if ``None``.
+        avoid_identity : bool
+            If ``True``, never return an index as its own partner, as long as
+            its group contains other indices.
+        replace : bool
+            If ``False``, partners are drawn without replacement wherever the
+            group is large enough and with replacement otherwise.
+
+        Returns
+        -------
+        partners : np.ndarray
+            Array of shape ``[len(indices), n]``.
+        """
+        if prng is None:
+            prng = np.random.random.__self__
+
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        groups = self.inverse[indices]
+        starts = self.offsets[groups]
+        sizes = self.offsets[groups + 1] - starts
+
+        # Position of the index itself inside its group
+        own = self.positions[indices] - starts
+        avoid = np.logical_and(avoid_identity, sizes > 1)
+        available = sizes - avoid
+
+        if replace:
+            with_replacement = np.ones(len(indices), dtype=bool)
+        else:
+            with_replacement = available < n
+
+        # Taken positions, which are skipped when drawing without
+        # replacement. The own position is skipped if it should be avoided.
+        taken = np.where(avoid, own, sizes)[:, None]
+
+        partners = np.empty([len(indices), n], dtype=np.int64)
+        for j in range(n):
+            upper = np.where(with_replacement, available, available - j)
+            r = np.floor(prng.random_sample(len(indices)) * upper).astype(np.int64)
+
+            # Shift draws past all taken positions <= r. For draws with
+            # replacement only the own position is taken, all others are
+            # replaced by the never reached group size.
+            skip = np.array(taken)
+            skip[with_replacement, 1:] = sizes[with_replacement, None]
+            for s in np.sort(skip, axis=1).T:
+                r += s <= r
+
+            partners[:, j] = r
+            taken = np.concatenate([taken, r[:, None]], axis=1)
+
+        return self.order[starts[:, None] + partners]
+
+    def sample_balanced(self, size=None, prng=None):
+        """Samples indices such that each label value is equally likely.
+
+        Parameters
+        ----------
+        size : int
+            Number of indices to sample. If ``None`` a single ``int`` is
+            returned.
+        prng : np.random.RandomState
+            Random number generator. Uses the global numpy state if ``None``.
+        """
+        if prng is None:
+            prng = np.random.random.__self__
+
+        groups = prng.randint(len(self.values), size=size)
+        starts = self.offsets[groups]
+        sizes = self.offsets[groups + 1] - starts
+        r = np.floor(prng.random_sample(size) * sizes).astype(np.int64)
+
+        return self.order[starts + r]
+
+    def save(self, root):
+        """Stores the index as ``.npy`` files in the folder :attr:`root`."""
+        os.makedirs(root, exist_ok=True)
+        for name in self._files:
+            np.save(os.path.join(root, name + ".npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, root):
+        """Loads an index stored with :meth:`save`. Arrays are memory
+        mapped."""
+        arrays = {
+            name: np.load(os.path.join(root, name + ".npy"), mmap_mode="r")
+            for name in cls._files
+        }
+        return cls(**arrays)
+
+    @classmethod
+    def exists(cls, root):
+        """Checks if an index has been stored at :attr:`root`."""
+        return all(
+            os.path.exists(os.path.join(root, name + ".npy")) for name in cls._files
+        )
+
+
+def get_label_index(dataset, key):
+    """Returns a :class:`LabelIndex` for the labels at :attr:`key` of
+    :attr:`dataset`. If the dataset knows how to persist label indices (see
+    :meth:`edflow.data.believers.meta.MetaDataset.get_label_index`), the
+    persisted version is used.
+    """
+    getter = getattr(dataset, "get_label_index", None)
+    if callable(getter):
+        return getter(key)
+    return LabelIndex(dataset.labels[key])
@@ -1,8 +1,16 @@
+import os
+import operator
+import multiprocessing
+from concurrent import futures
+
 import numpy as np
+from tqdm import tqdm
+
 from edflow.data.dataset_mixin import DatasetMixin
 from edflow.util import PRNGMixin
 from edflow.util import retrieve
 from edflow.main import get_obj_from_str
+from edflow.data.util.label_index import get_label_index
 
 
 def JoinedDataset(dataset, key, n_joins):
@@ -92,21 +100,15 @@ class RandomlyJoinedDataset(DatasetMixin, PRNGMixin):
         )
         self.balance = retrieve(config, "RandomlyJoinedDataset/balance", default=False)
 
-        # self.index_map is used to select a partner for each example.
-        # In test_mode it is a list containing a single partner index for each
-        # example, otherwise it is a dict containing all indices for a given
-        # join label
-        self.join_labels = np.asarray(self.dataset.labels[self.key])
-        unique_labels = np.unique(self.join_labels)
-        self.index_map = dict()
-        for value in unique_labels:
-            self.index_map[value] = np.nonzero(self.join_labels == value)[0]
+        # self.label_index is used to select partners for each example.
+        # In test_mode self.index_map is an array containing the partner
+        # indices for each example.
+        self.label_index = get_label_index(self.dataset, self.key)
         if self.test_mode:
             prng = np.random.RandomState(0)
-            self.index_map = [
-                prng.choice(self.index_map[self.join_labels[i]], self.n_joins - 1)
-                for i in range(len(self.dataset))
-            ]
+            self.index_map = self.label_index.sample(
+                np.arange(len(self.dataset)), self.n_joins - 1, prng, replace=True
+            )
 
     def __len__(self):
         return len(self.dataset)
@@ -123,17 +125,14 @@ class RandomlyJoinedDataset(DatasetMixin, PRNGMixin):
             join_indices = self.index_map[i]
         else:
             if self.balance:
-                label_id = self.prng.choice(list(self.index_map.keys()))
-                i = self.prng.choice(self.index_map[label_id])
-            join_value = self.join_labels[i]
-            choices = self.index_map[join_value]
-            replace = True
-            if self.avoid_identity:
-                if len(choices) > 1:
-                    choices = [idx for idx in choices if not idx == i]
-                if len(choices) >= self.n_joins - 1:
-                    replace = False
-            join_indices = self.prng.choice(choices, self.n_joins - 1, replace=replace)
+                i = self.label_index.sample_balanced(prng=self.prng)
+            join_indices = self.label_index.sample(
+                [i],
+                self.n_joins - 1,
+                self.prng,
+                avoid_identity=self.avoid_identity,
+                replace=not self.avoid_identity,
+            )[0]
         join_indices = np.concatenate([[i], join_indices])
 
         return {"examples": self.dataset[join_indices]}
@@ -152,6 +151,17 @@ class DataFolder(DatasetMixin):
     'c']`` and ``read_fn`` returns one with keys ``['d', 'e']`` then the dict
     returned by ``__getitem__`` will contain the keys ``['a', 'b', 'c', 'd',
     'e', 'file_path_', 'index_']``.
+
+    The folder is scanned by a pool of :attr:`n_threads` threads, one
+    directory at a time. If :attr:`n_processes` is given, ``label_fn`` is
+    mapped over all files using a process pool, in which case it must be
+    picklable, i.e. defined at the top level of a module.
+
+    Scanning large folders is slow. If :attr:`cache_path` is given, the
+    labels are stored there as numpy arrays together with the modification
+    times of all scanned directories. As long as no directory has changed,
+    later constructions load the labels from the cache instead of scanning
+    the folder again.
     """
 
     def __init__(
@@ -163,6 +173,9 @@ class DataFolder(DatasetMixin):
         in_memory_keys=None,
         legacy=True,
         show_bar=False,
+        n_threads=8,
+        n_processes=None,
+        cache_path=None,
     ):
         """
         Parameters
@@ -184,6 +197,12 @@ class DataFolder(DatasetMixin):
             see all labels, that have been previously collected.
         show_bar : bool
             Show a loading bar when loading labels.
+        n_threads : int
+            Number of threads used to list the directories.
+        n_processes : int
+            If given, ``label_fn`` is applied using this many processes.
+        cache_path : str
+            Path to a ``.npz`` file, in which the labels are cached.
         """
 
         self.root = image_root
@@ -193,6 +212,9 @@ class DataFolder(DatasetMixin):
 
         self.legacy = legacy
         self.show_bar = show_bar
+        self.n_threads = n_threads
+        self.n_processes = n_processes
+        self.cache_path = cache_path
 
         if in_memory_keys is not None:
             assert isinstance(in_memory_keys, list)
@@ -200,42 +222,109 @@ class DataFolder(DatasetMixin):
 
         self._read_labels()
 
+    @property
+    def _fingerprint(self):
+        """Identifies the settings, which influence the labels."""
+        label_fn = getattr(self.label_fn, "__qualname__", type(self.label_fn).__name__)
+        label_fn = "{}.{}".format(getattr(self.label_fn, "__module__", ""), label_fn)
+        return "\n".join([os.path.abspath(self.root), label_fn, str(self.sort_keys)])
+
     def _read_labels(self):
-        import operator
+        if self.cache_path is not None and self._load_cache():
+            return
+
+        files, dir_mtimes = scan_directory(self.root, self.n_threads)
+
+        if self.n_processes:
+            with multiprocessing.Pool(self.n_processes) as pool:
+                chunksize = max(1, len(files) // (4 * self.n_processes))
+                label_iter = pool.imap(self.label_fn, files, chunksize=chunksize)
+                all_labels = list(
+                    tqdm(
+                        label_iter,
+                        total=len(files),
+                        desc="Labels",
+                        disable=not self.show_bar,
+                    )
+                )
+        else:
+            all_labels = [
+                self.label_fn(path)
+                for path in tqdm(files, desc="Labels", disable=not self.show_bar)
+            ]
 
-        if self.show_bar:
-            n_files = 0
-            for _ in os.walk(self.root):
-                n_files += 1
+        data = []
+        for path, labels in zip(files, all_labels):
+            if labels is not None:
+                datum = {"file_path_": path}
+                datum.update(labels)
+                data += [datum]
 
-            iterator = tqdm(os.walk(self.root), total=n_files, desc="Labels")
-        else:
-            iterator = tqdm(os.walk(self.root))
+        if self.sort_keys is not None:
+            data.sort(key=operator.itemgetter(*self.sort_keys))
 
-        self.data = []
-        self.labels = {}
-        for root, dirs, files in iterator:
-            for f in files:
-                path = os.path.join(root, f)
-                labels = self.label_fn(path)
+        keys = []
+        for datum in data:
+            for k in datum:
+                if k not in keys:
+                    keys += [k]
 
-                if labels is not None:
-                    datum = {"file_path_": path}
-                    datum.update(labels)
-                    self.data += [datum]
+        self.labels = {k: _to_array([datum.get(k) for datum in data]) for k in keys}
+        self.num_examples = len(data)
 
-        if self.sort_keys is not None:
-            self.data.sort(key=operator.itemgetter(*self.sort_keys))
+        if self.cache_path is not None:
+            self._store_cache(dir_mtimes)
+
+    def _load_cache(self):
+        """Loads the labels from :attr:`cache_path` if no directory has been
+        changed since the cache was written.
 
-        for datum in self.data:
-            for k, v in datum.items():
-                if k not in self.labels:
-                    self.labels[k] = []
-                self.labels[k] += [v]
+        Returns
+        -------
+        bool
+            ``True`` if the labels have been loaded.
+        """
+        if not os.path.exists(self.cache_path):
+            return False
+
+        with np.load(self.cache_path, allow_pickle=True) as cache:
+            if str(cache["fingerprint_"]) != self._fingerprint:
+                return False
+
+            dirs = cache["dirs_"]
+            mtimes = cache["dir_mtimes_"]
+            with futures.ThreadPoolExecutor(self.n_threads) as executor:
+                current = list(executor.map(_mtime, dirs))
+            if not np.array_equal(np.array(current, dtype=np.int64), mtimes):
+                return False
+
+            self.labels = {
+                k[len("label/") :]: cache[k] for k in cache if k.startswith("label/")
+            }
+            self.num_examples = int(cache["num_examples_"])
+
+        return True
+
+    def _store_cache(self, dir_mtimes):
+        dirs = sorted(dir_mtimes)
+        arrays = {"label/" + k: v for k, v in self.labels.items()}
+        arrays["fingerprint_"] = np.array(self._fingerprint)
+        arrays["dirs_"] = np.array(dirs, dtype=str)
+        arrays["dir_mtimes_"] = np.array([dir_mtimes[d] for d in dirs], dtype=np.int64)
+        arrays["num_examples_"] = np.array(self.num_examples)
+
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = "{}.{}.tmp.npz".format(self.cache_path, os.getpid())
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.cache_path)
+
+    def __len__(self):
+        return self.num_examples
 
     def get_example(self, i):
         """Load the files specified in example ``i``."""
-        datum = self.data[i]
+        datum = {k: v[i] for k, v in self.labels.items()}
         path = datum["file_path_"]
 
         if self.legacy:
@@ -248,3 +337,69 @@ class DataFolder(DatasetMixin):
         example.update(file_content)
 
         return example
+
+
+def scan_directory(root, n_threads=8):
+    """Lists all files in the nested folder :attr:`root`. Directories are
+    listed in parallel by a pool of threads. As :func:`os.walk`, symbolic
+    links to directories are not followed.
+
+    Parameters
+    ----------
+    root : str
+        The folder to scan.
+    n_threads : int
+        Number of threads listing directories.
+
+    Returns
+    -------
+    files : list(str)
+        Sorted paths to all files.
+    dir_mtimes : dict(str, int)
+        Modification times in nanoseconds of all scanned directories.
+    """
+
+    def list_dir(path):
+        files = []
+        dirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        dirs += [entry.path]
+                else:
+                    files += [entry.path]
+        return path, _mtime(path), files, dirs
+
+    files = []
+    dir_mtimes = {}
+    with futures.ThreadPoolExecutor(n_threads) as executor:
+        pending = {executor.submit(list_dir, root)}
+        while pending:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                path, mtime, dir_files, sub_dirs = future.result()
+                dir_mtimes[path] = mtime
+                files += dir_files
+                for sub_dir in sub_dirs:
+                    pending.add(executor.submit(list_dir, sub_dir))
+
+    return sorted(files), dir_mtimes
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+def _to_array(values):
+    """Converts a list of label values to an array. Values which cannot be
+    stacked into a regular array, are stored in an array of objects."""
+    try:
+        return np.array(values)
+    except ValueError:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
@@ -109,16 +109,20 @@ like this:
 """
 
 import os
+import csv
 import numpy as np
 import pandas as pd  # storing model output paths
 import yaml  # metadata
 from PIL import Image
 import inspect
 import re
+import threading
+from concurrent import futures
 
 from edflow.data.util import adjust_support
 from edflow.util import walk, retrieve, pop_keypath
 from edflow.data.dataset import DatasetMixin, CsvDataset, ProcessedDataset
+from edflow.data.dataset import SubDataset
 from edflow.project_manager import ProjectManager as P
 from edflow.hooks.hook import Hook
 from edflow.custom_logging import get_logger
@@ -139,6 +143,9 @@ class EvalHook(Hook):
         config=None,
         step_getter=None,
         keypath="step_ops",
+        index_chunk_size=1024,
+        n_writers=None,
+        memmap_outputs=None,
     ):
         """
         .. warning::
@@ -178,6 +185,26 @@ class EvalHook(Hook):
                 Function which returns the global step as ``int``.
             keypath : str
                 Path in result which will be stored.
+            index_chunk_size : int
+                Number of rows of the ``model_output.csv`` collected before
+                they are appended to the file.
+            n_writers : int
+                Number of workers encoding and writing the outputs in the
+                background. Defaults to ``eval_pipeline/writer/n_workers``
+                in :attr:`config` or 4. With 0, outputs are written on the
+                calling thread. Use ``eval_pipeline/writer/processes: True``
+                for processes instead of threads and
+                ``eval_pipeline/writer/max_pending`` to limit the number of
+                outputs waiting to be written (default 256).
+            memmap_outputs : bool or list(str)
+                If ``True``, all outputs, which are arrays of the same shape
+                for each example, are written into one memory map per key at
+                ``model_outputs/columns/key-*-NxHxWxC-*-dtype.npy`` instead
+                of one file per example. Pass a list of keys to store only
+                those outputs as memory maps. Other outputs are written per
+                example as before. Defaults to
+                ``eval_pipeline/memmap_outputs`` in :attr:`config` or
+                ``False``.
         """
         self.logger = get_logger(self)
 
@@ -198,6 +225,24 @@ class EvalHook(Hook):
 
         self.gs = step_getter
         self.keypath = keypath
+        self.index_chunk_size = index_chunk_size
+
+        if n_writers is None:
+            n_writers = retrieve(config, "eval_pipeline/writer/n_workers", default=4)
+        self.n_writers = n_writers
+        self.writer_processes = retrieve(
+            config, "eval_pipeline/writer/processes", default=False
+        )
+        self.writer_max_pending = retrieve(
+            config, "eval_pipeline/writer/max_pending", default=256
+        )
+        self.writer = None
+
+        if memmap_outputs is None:
+            memmap_outputs = retrieve(
+                config, "eval_pipeline/memmap_outputs", default=False
+            )
+        self.memmap_outputs = memmap_outputs
 
     def before_epoch(self, epoch):
         """
@@ -211,12 +256,26 @@ class EvalHook(Hook):
         -------
 
         """
-        self.data_frame = None
         self.root = os.path.join(P.latest_eval, str(self.gs()))
         self.save_root = os.path.join(self.root, "model_outputs")
         os.makedirs(self.root, exist_ok=True)
         os.makedirs(self.save_root, exist_ok=True)
 
+        self.csv_path = os.path.join(self.root, "model_output.csv")
+        self.index_writer = EvalIndexWriter(
+            self.csv_path, self.config, chunk_size=self.index_chunk_size
+        )
+
+        if self.writer is None and self.n_writers > 0:
+            self.writer = OutputWriterPool(
+                self.n_writers, self.writer_max_pending, self.writer_processes
+            )
+        self.known_dirs = set()
+
+        self.columns_root = os.path.join(self.save_root, "columns")
+        self.column_arrs = {}
+        self.file_keys = set()
+
         self.label_arrs = None
 
     def before_step(self, step, fetches, feeds, batch):
@@ -265,15 +324,9 @@ class EvalHook(Hook):
                 example = label_vals[k][0]
                 ex_shape = list(np.shape(example))
                 shape = [len(self.data_in)] + ex_shape
-                s = "x".join([str(s) for s in shape])
-                dtype = d = example.dtype
-
-                k_ = k.replace("/", "--")
-                savepath = os.path.join(
-                    self.save_root, "{}-*-{}-*-{}.npy".format(k_, s, d)
+                self.label_arrs[k] = create_output_memmap(
+                    self.save_root, k, shape, example.dtype
                 )
-                memmap = np.memmap(savepath, shape=tuple(shape), mode="w+", dtype=dtype)
-                self.label_arrs[k] = memmap
 
         idxs = self.idxs  # indices collected before_step
 
@@ -282,25 +335,26 @@ class EvalHook(Hook):
             for i, idx in enumerate(idxs):
                 self.label_arrs[k][idx] = label_vals[k][i]
 
+        if self.memmap_outputs:
+            self.write_columns(last_results)
+
         path_dicts = save_output(
             root=self.save_root,
             example=last_results,
             index=idxs,
             sub_dir_keys=self.sdks,
             keypath=self.keypath,
+            writer=self.writer,
+            known_dirs=self.known_dirs,
         )
 
-        if self.data_frame is None:
-            columns = sorted(path_dicts[list(path_dicts.keys())[0]])
-            if len(columns) == 0:
-                # No load heavy logs written out
-                pass
-            else:
-                self.data_frame = pd.DataFrame(columns=columns)
+        if self.writer is not None and step % 100 == 0:
+            self.logger.debug(
+                "Output writer queue depth: {}".format(self.writer.queue_depth)
+            )
 
-        if self.data_frame is not None:
-            for idx, path_dict in path_dicts.items():
-                self.data_frame.loc[idx] = path_dict
+        for idx, path_dict in path_dicts.items():
+            self.index_writer.append(idx, path_dict)
 
     def at_exception(self, *args, **kwargs):
         """
@@ -317,6 +371,11 @@ class EvalHook(Hook):
 
         """
         if hasattr(self, "root"):
+            try:
+                self.flush_outputs()
+            except Exception:
+                # Do not hide the original exception.
+                self.logger.exception("Writing the outputs failed.")
             self.save_csv()
 
     def after_epoch(self, epoch):
@@ -331,6 +390,7 @@ class EvalHook(Hook):
         -------
 
         """
+        self.flush_outputs()
         self.save_csv()
 
         data_out = EvalDataFolder(self.root)
@@ -345,18 +405,69 @@ class EvalHook(Hook):
             kwargs = cb_kwargs.get(n, {})
             cb(self.root, self.data_in, data_out, self.config, **kwargs)
 
-    def save_csv(self):
-        """ """
-        csv_path = os.path.join(self.root, "model_output.csv")
+    def write_columns(self, last_results):
+        """Writes all outputs, which are stored as memory mapped columns,
+        and removes them from :attr:`last_results`."""
+        outputs = retrieve(last_results, self.keypath)
+        idxs = self.idxs
+
+        for k in list(outputs.keys()):
+            if k in self.sdks or k in self.file_keys:
+                continue
+            if self.memmap_outputs is not True and k not in self.memmap_outputs:
+                continue
+
+            value = outputs[k]
+            if k not in self.column_arrs:
+                if (
+                    not isinstance(value, np.ndarray)
+                    or value.ndim == 0
+                    or value.dtype.hasobject
+                ):
+                    # ragged outputs are written per example
+                    self.file_keys.add(k)
+                    continue
+                shape = [len(self.data_in)] + list(value.shape[1:])
+                self.column_arrs[k] = create_output_memmap(
+                    self.columns_root, k, shape, value.dtype
+                )
 
-        if self.data_frame is not None:
-            self.data_frame = self.data_frame.sort_index()
-            self.data_frame.to_csv(csv_path, index=False)
-        else:
-            with open(csv_path, "w+") as csv_file:
-                csv_file.write("")
+            column = self.column_arrs[k]
+            value = np.asarray(value)
+            if value.shape[1:] != column.shape[1:]:
+                raise ValueError(
+                    "Output `{}` has shape {}, but its column has shape {}. "
+                    "Exclude it from `memmap_outputs` to store it per "
+                    "example.".format(k, value.shape[1:], column.shape[1:])
+                )
+            column[idxs] = value
+            del outputs[k]
+
+    def flush_outputs(self):
+        """Waits until all outputs have been written and shuts down the
+        writer pool. A new pool is started in :meth:`before_epoch`."""
+        for column in self.column_arrs.values():
+            column.flush()
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            n_written, max_depth = writer.close()
+            self.logger.info(
+                "Wrote {} outputs. Maximum writer queue depth: {}".format(
+                    n_written, max_depth
+                )
+            )
 
-        add_meta_data(csv_path, self.config)
+    def save_csv(self):
+        """Writes all remaining rows of the ``model_output.csv``. The
+        metadata and all other rows have been written already."""
+        csv_path = self.csv_path
+        self.index_writer.flush()
+
+        write_label_manifest(
+            self.save_root,
+            labels=list((self.label_arrs or {}).values()),
+            columns=list(self.column_arrs.values()),
+        )
 
         this_script = os.path.dirname(__file__)
         cb_names = self.cb_names
@@ -413,21 +524,56 @@ class EvalDataFolder(DatasetMixin):
             csv_path = root
             root = os.path.dirname(root)
 
-        labels = load_labels(os.path.join(root, "model_outputs"))
+        outputs_root = os.path.join(root, "model_outputs")
+        columns_root = os.path.join(outputs_root, "columns")
+        manifest = read_label_manifest(outputs_root)
+        if manifest is not None:
+            labels = load_labels(outputs_root, manifest["labels"])
+            columns = load_labels(columns_root, manifest["columns"])
+        else:
+            # Written before manifests existed: find the labels by listing
+            # all outputs.
+            labels = load_labels(outputs_root)
+            columns = {}
+            if os.path.isdir(columns_root):
+                columns = load_labels(columns_root)
+        labels.update(columns)
 
         # Capture the case that only labels have been written out
         try:
             csv_data = CsvDataset(csv_path, comment="#")
+            er.assign_loaders(csv_data.labels)
             self.data = ProcessedDataset(csv_data, er)
+            if columns:
+                self.data = ProcessedDataset(self.data, ColumnReader(columns))
+
+            # Rows are written in the order the outputs are produced.
+            save_index = csv_data.labels.get(EvalIndexWriter.index_column)
+            if save_index is not None and np.any(np.diff(save_index) < 0):
+                self.data = SubDataset(self.data, np.argsort(save_index))
         except pd.errors.EmptyDataError as e:
             exemplar_labels = labels[sorted(labels.keys())[0]]
             self.data = EmptyDataset(len(exemplar_labels), labels)
+            if columns:
+                self.data = ProcessedDataset(self.data, ColumnReader(columns))
 
         self.data.labels.update(labels)
 
         self.append_labels = True
 
 
+class ColumnReader(object):
+    """Adds the entries of memory mapped output columns to the examples of
+    an :class:`EvalDataFolder`. Entries are views into the memory maps."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __call__(self, index_, save_index_=None, **kwargs):
+        index = index_ if save_index_ is None else save_index_
+        return {k: column[int(index)] for k, column in self.columns.items()}
+
+
 class EmptyDataset(DatasetMixin):
     """ """
 
@@ -453,13 +599,15 @@ class EmptyDataset(DatasetMixin):
         return self.len
 
 
-def load_labels(root):
+def load_labels(root, files=None):
     """
 
     Parameters
     ----------
     root :
 
+    files : list(str)
+        Names of the label files. If not given, :attr:`root` is listed.
 
     Returns
     -------
@@ -467,7 +615,8 @@ def load_labels(root):
     """
     regex = re.compile(r".*-\*-.*-\*-.*\.npy")
 
-    files = os.listdir(root)
+    if files is None:
+        files = os.listdir(root)
     label_files = [f for f in files if regex.match(f) is not None]
 
     labels = {}
@@ -483,7 +632,145 @@ def load_labels(root):
     return labels
 
 
-def save_output(root, example, index, sub_dir_keys=[], keypath="step_ops"):
+def write_label_manifest(root, labels, columns):
+    """Writes ``manifest.yaml`` to :attr:`root` listing the file names of the
+    memory mapped labels and output columns, such that
+    :class:`EvalDataFolder` finds them without listing all outputs."""
+    manifest = {
+        "labels": sorted(os.path.basename(l.filename) for l in labels),
+        "columns": sorted(os.path.basename(c.filename) for c in columns),
+    }
+    with open(os.path.join(root, "manifest.yaml"), "w") as f:
+        yaml.safe_dump(manifest, f)
+
+
+def read_label_manifest(root):
+    """Reads the ``manifest.yaml`` written by :func:`write_label_manifest`.
+    Returns ``None`` if there is none."""
+    path = os.path.join(root, "manifest.yaml")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def create_output_memmap(root, key, shape, dtype):
+    """Creates a memory map at :attr:`root` following the naming convention
+    ``key-*-shape-*-dtype.npy`` used for labels."""
+    os.makedirs(root, exist_ok=True)
+    s = "x".join([str(s) for s in shape])
+    d = np.dtype(dtype)
+
+    k_ = key.replace("/", "--")
+    savepath = os.path.join(root, "{}-*-{}-*-{}.npy".format(k_, s, d))
+    return np.memmap(savepath, shape=tuple(shape), mode="w+", dtype=d)
+
+
+class OutputWriterPool(object):
+    """Saves outputs in the background using a pool of threads or processes.
+
+    At most :attr:`max_pending` outputs wait to be written. Further calls to
+    :meth:`submit` block until there is room again. Errors raised while
+    saving are raised again by :meth:`flush`.
+    """
+
+    def __init__(self, n_workers=4, max_pending=256, processes=False):
+        """
+        Parameters
+        ----------
+        n_workers : int
+            Number of threads or processes.
+        max_pending : int
+            Maximum number of outputs waiting to be written.
+        processes : bool
+            Use processes instead of threads. Only worth it if encoding does
+            not release the GIL.
+        """
+        if processes:
+            self.executor = futures.ProcessPoolExecutor(n_workers)
+        else:
+            self.executor = futures.ThreadPoolExecutor(n_workers)
+        self.processes = processes
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.failed = []
+        self.n_submitted = 0
+        self.max_depth = 0
+
+    @property
+    def queue_depth(self):
+        """Number of outputs submitted but not written yet."""
+        return len(self.pending)
+
+    def submit(self, saver, savepath, datum):
+        """Calls ``saver(savepath, datum)`` in the background."""
+        if isinstance(datum, np.ndarray) and not self.processes:
+            # The model may reuse the memory of its outputs.
+            datum = np.array(datum)
+
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(saver, savepath, datum)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.pending.add(future)
+            self.n_submitted += 1
+            self.max_depth = max(self.max_depth, len(self.pending))
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+            if future.exception() is not None:
+                self.failed += [future]
+        self.slots.release()
+
+    def flush(self):
+        """Waits until all submitted outputs have been written.
+
+        Returns
+        -------
+        n_written : int
+            Number of outputs written since the last flush.
+        max_depth : int
+            Maximum queue depth since the last flush.
+        """
+        with self.lock:
+            pending = list(self.pending)
+        futures.wait(pending)
+
+        with self.lock:
+            # Callbacks of the last futures may not have run yet.
+            failed = self.failed + [f for f in pending if f.exception() is not None]
+            self.failed = []
+            stats = (self.n_submitted, self.max_depth)
+            self.n_submitted = 0
+            self.max_depth = 0
+        if failed:
+            raise failed[0].exception()
+        return stats
+
+    def close(self):
+        """Waits until all submitted outputs have been written and shuts down
+        the workers. Returns the same as :meth:`flush`."""
+        try:
+            return self.flush()
+        finally:
+            self.executor.shutdown()
+
+
+def save_output(
+    root,
+    example,
+    index,
+    sub_dir_keys=[],
+    keypath="step_ops",
+    writer=None,
+    known_dirs=None,
+):
     """Saves the ouput of some model contained in ``example`` in a reusable
     manner.
 
@@ -502,6 +789,10 @@ def save_output(root, example, index, sub_dir_keys=[], keypath="step_ops"):
         will be removed from the example dict and not be stored.
         Directories are name ``key:val`` to be able to completely recover
         the keys. (Default value = [])
+    writer : OutputWriterPool
+        If given, outputs are saved in the background by this pool.
+    known_dirs : set
+        Directories, which exist already. New directories are added.
 
     Returns
     -------
@@ -529,7 +820,10 @@ def save_output(root, example, index, sub_dir_keys=[], keypath="step_ops"):
 
     roots = [os.path.join(root, sub_dir) for sub_dir in sub_dirs]
     for r in roots:
-        os.makedirs(r, exist_ok=True)
+        if known_dirs is None or r not in known_dirs:
+            os.makedirs(r, exist_ok=True)
+            if known_dirs is not None:
+                known_dirs.add(r)
 
     roots += [root]
 
@@ -540,7 +834,12 @@ def save_output(root, example, index, sub_dir_keys=[], keypath="step_ops"):
             savename = "{}_{:0>6d}.{{}}".format(n, idx)
             path = os.path.join(root, savename)
 
-            path = save_example(path, e[i])
+            if writer is None:
+                path = save_example(path, e[i])
+            else:
+                saver, ending = determine_saver(e[i])
+                path = path.format(ending)
+                writer.submit(saver, path, e[i])
 
             path_dict[n + "_path"] = path
         path_dicts[idx] = path_dict
@@ -548,6 +847,76 @@ def save_output(root, example, index, sub_dir_keys=[], keypath="step_ops"):
     return path_dicts
 
 
+class EvalIndexWriter(object):
+    """Writes the ``model_output.csv``, which lists the paths to all outputs,
+    incrementally.
+
+    The metadata is written as commented ``yaml`` header when the writer is
+    created. Rows are collected and appended to the file in chunks, such that
+    memory and time per row stay constant. As rows are written in the order
+    they are added, each row contains the dataset index of its outputs in
+    the column ``save_index_``.
+    """
+
+    index_column = "save_index_"
+
+    def __init__(self, path, metadata=None, chunk_size=1024):
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the csv file. Existing files are overwritten.
+        metadata : object
+            Dumped as ``yaml`` into the header, see :func:`add_meta_data`.
+        chunk_size : int
+            Number of rows collected before writing them.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = None
+        self.rows = []
+
+        with open(path, "w") as csv_file:
+            csv_file.write(meta_data_header(metadata))
+
+    def append(self, index, path_dict):
+        """Adds the paths of the outputs for the dataset index :attr:`index`.
+        Nothing is written for empty path dicts."""
+        if len(path_dict) == 0:
+            return
+        self.rows += [(index, path_dict)]
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Appends all collected rows to the file."""
+        if len(self.rows) == 0:
+            return
+
+        with open(self.path, "a", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            if self.columns is None:
+                self.columns = sorted(self.rows[0][1])
+                writer.writerow([self.index_column] + self.columns)
+            for index, path_dict in self.rows:
+                row = [path_dict.get(c, "") for c in self.columns]
+                writer.writerow([int(index)] + row)
+
+        self.rows = []
+
+
+def meta_data_header(metadata):
+    """Dumps metadata as ``yaml`` with each line commented by ``#``."""
+    meta_string = yaml.dump(metadata)
+
+    commented_string = ""
+    for line in meta_string.split("\n"):
+        line = "# {}\n".format(line)
+        commented_string += line
+
+    return commented_string
+
+
 def add_meta_data(path_to_csv, metadata):
     """Prepends kwargs of interest to a csv file as comments (`#`)
 
@@ -563,12 +932,7 @@ def add_meta_data(path_to_csv, metadata):
 
     """
 
-    meta_string = yaml.dump(metadata)
-
-    commented_string = ""
-    for line in meta_string.split("\n"):
-        line = "# {}\n".format(line)
-        commented_string += line
+    commented_string = meta_data_header(metadata)
 
     with open(path_to_csv, "r+") as csv_file:
         content = csv_file.read()
@@ -695,12 +1059,18 @@ def load_by_heuristic(path):
 
     name, ext = os.path.splitext(path)
 
+    return loader_for_extension(ext, path)(path)
+
+
+def loader_for_extension(ext, path=None):
+    """Returns the loader for files with the extension :attr:`ext`, e.g.
+    ``.png``. :attr:`path` is only used in the error message."""
     if ext == ".png":
-        return image_loader(path)
+        return image_loader
     elif ext == ".npy":
-        return np_loader(path)
+        return np_loader
     elif ext == ".txt":
-        return txt_loader(path)
+        return txt_loader
     else:
         raise ValueError("Cannot load file with extension `{}` at {}".format(ext, path))
 
@@ -754,12 +1124,14 @@ def is_loadable(filename):
 
 
 class EvalLabeler(object):
-    """ """
+    """Labels the outputs found in the folders below :attr:`root`. Each
+    folder is listed only once and its files are grouped by index."""
 
     def __init__(self, root):
         self.root = root
 
-        self.visited = []
+        self.visited = set()
+        self.folders = {}
 
     def __call__(self, path):
         """Adds the labels ``paths``, ``kind``, ``index_``, ``datum_root``"""
@@ -777,7 +1149,7 @@ class EvalLabeler(object):
         index, datum_name, ending = decompose_name(filename)
 
         if index not in self.visited:
-            self.visited += [index]
+            self.visited.add(index)
             # Get the sbfolder key val pairs
             for kv in folder_structure.split("/"):
                 key, val = kv.split(":")
@@ -788,49 +1160,68 @@ class EvalLabeler(object):
             # We know all files must be in the folder, as we must assume, that
             # index_ is a unique key. Otherwise this whole system does not
             # work.
+            if folder_structure not in self.folders:
+                self.folders[folder_structure] = self.group_by_index(folder_structure)
+            ret_dict.update(self.folders[folder_structure].pop(index, {}))
 
-            all_files = os.listdir(os.path.join(self.root, folder_structure))
-
-            def idx_filter(fname):
-                """
-
-                Parameters
-                ----------
-                fname :
-
-
-                Returns
-                -------
+            ret_dict["datum_root"] = os.path.join(self.root, folder_structure)
 
-                """
-                n, e = os.path.splitext(fname)
-                if "." in e:
-                    has_nice_ending = e[1:] in LOADABLE_EXTS
-                else:
-                    return False
-                return "{:0>6d}".format(index) in fname and has_nice_ending
+            ret_dict["save_index_"] = index
 
-            of_interest = filter(idx_filter, all_files)
+            return ret_dict
 
-            # Remember the filenames -> Not really neccessary, but makes
-            # reading code cleaner (hopefully).
-            for filename in of_interest:
-                path = os.path.join(self.root, folder_structure, filename)
-                _, datum_name, ending = decompose_name(filename)
-                ret_dict["{}_{}".format(datum_name, "path")] = path
+    def group_by_index(self, folder_structure):
+        """Lists the folder once and collects the paths of all loadable
+        files as ``{index: {"<datum_name>_path": path}}``."""
+        folder = os.path.join(self.root, folder_structure)
 
-            ret_dict["datum_root"] = os.path.join(self.root, folder_structure)
+        groups = {}
+        for filename in os.listdir(folder):
+            name, ext = os.path.splitext(filename)
+            if ext[1:] not in LOADABLE_EXTS or "_" not in name:
+                continue
+            datum_name, index = name.rsplit("_", 1)
+            if not index.isdigit():
+                continue
 
-            ret_dict["save_index_"] = index
+            path = os.path.join(folder, filename)
+            groups.setdefault(int(index), {})["{}_path".format(datum_name)] = path
 
-            return ret_dict
+        return groups
 
 
 class EvalReader(object):
-    """ """
+    """Loads the outputs listed in a row of the ``model_output.csv``.
+
+    The loader of each path column is chosen once by :meth:`assign_loaders`
+    from the extension of its first entry. Columns without assignment and
+    paths with other extensions are loaded by :func:`load_by_heuristic`.
+    """
 
     def __init__(self, root):
         self.root = root
+        self.loaders = {}
+
+    def assign_loaders(self, columns):
+        """Chooses the loader for each path column.
+
+        Parameters
+        ----------
+        columns : dict
+            All columns of the ``model_output.csv`` as returned by
+            :attr:`CsvDataset.labels`.
+        """
+        self.loaders = {}
+        for k, paths in columns.items():
+            if "path" not in k or k == "file_path_":
+                continue
+            path = next((p for p in paths if isinstance(p, str) and p), None)
+            if path is None:
+                continue
+
+            ext = os.path.splitext(path)[1]
+            name = "_".join(os.path.basename(k).split("_")[:-1])
+            self.loaders[k] = (name, ext, loader_for_extension(ext, path))
 
     def __call__(self, **kwargs):
         """Works only with non legacy DataFolder!"""
@@ -844,6 +1235,15 @@ class EvalReader(object):
 
         for k in path_keys:
             path = kwargs[k]
+
+            if k in self.loaders:
+                name, ext, loader = self.loaders[k]
+                if not isinstance(path, str) or not path:
+                    # This example has no output in this column
+                    continue
+                if path.endswith(ext):
+                    ret_dict[name] = loader(path)
+                    continue
             name = "_".join(os.path.basename(k).split("_")[:-1])
 
             ret_dict[name] = load_by_heuristic(path)
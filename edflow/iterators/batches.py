@@ -10,6 +10,7 @@ from edflow.iterators.resize import resize_hfloat32  # noqa
 from edflow.util import get_leaf_names, retrieve, set_value
 
 from chainer.iterators import MultiprocessIterator
+from chainer.iterators import OrderSampler
 
 from edflow.data.dataset import DatasetMixin  # noqa
 
@@ -279,13 +280,69 @@ class Iterator(MultiprocessIterator):
         return math.ceil(self.n / self.batch_size)
 
 
+class ContiguousOrderSampler(OrderSampler):
+    """Shuffles runs of contiguous indices instead of single indices.
+
+    The dataset indices are split into runs of :attr:`run_length` consecutive
+    indices. Each epoch the order of the runs is shuffled, while the indices
+    inside each run stay in order. Neighbouring examples thus end up in the
+    same batch, which allows datasets like the
+    :class:`edflow.data.believers.sequence.SequenceDataset` to reuse data
+    shared between neighbouring examples.
+    """
+
+    def __init__(self, run_length, random_state=None):
+        """
+        Parameters
+        ----------
+        run_length : int
+            Number of consecutive indices kept together.
+        random_state : numpy.random.RandomState
+            Pseudo random number generator used for shuffling.
+        """
+        if run_length < 1:
+            raise ValueError(
+                "run_length must be a positive int, but is {}".format(run_length)
+            )
+        self.run_length = run_length
+        if random_state is None:
+            random_state = np.random.random.__self__
+        self._random = random_state
+
+    def __call__(self, current_order, current_position):
+        n = len(current_order)
+        run_starts = np.arange(0, n, self.run_length)
+        run_starts = self._random.permutation(run_starts)
+
+        offsets = np.arange(self.run_length)
+        order = (run_starts[:, None] + offsets[None, :]).reshape(-1)
+
+        return order[order < n]
+
+
 def make_batches(
-    dataset, batch_size, shuffle, n_processes=8, n_prefetch=1, error_on_timeout=False
+    dataset,
+    batch_size,
+    shuffle,
+    n_processes=8,
+    n_prefetch=1,
+    error_on_timeout=False,
+    run_length=None,
 ):
+    """Creates an :class:`Iterator` over :attr:`dataset`.
+
+    If :attr:`run_length` is given and :attr:`shuffle` is ``True``, runs of
+    :attr:`run_length` contiguous indices are shuffled instead of single
+    indices. See :class:`ContiguousOrderSampler`.
+    """
     # the first n_processes / batch_size batches will be quite slow for some
     # reason
     if error_on_timeout:
         warnings.simplefilter("error", MultiprocessIterator.TimeoutWarning)
+    order_sampler = None
+    if shuffle and run_length is not None:
+        order_sampler = ContiguousOrderSampler(run_length)
+        shuffle = None
     batches = Iterator(
         dataset,
         repeat=True,
@@ -293,6 +350,7 @@ def make_batches(
         n_processes=n_processes,
         n_prefetch=n_prefetch,
         shuffle=shuffle,
+        order_sampler=order_sampler,
     )
     return batches
 
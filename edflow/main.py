@@ -107,6 +107,7 @@ def _train(config, root, checkpoint=None, retrain=False):
         n_processes=n_processes,
         n_prefetch=n_prefetch,
         error_on_timeout=config.get("error_on_timeout", False),
+        run_length=config.get("batch_run_length", None),
     ) as batches:
         # get them going
         logger.info("Warm up batches.")
@@ -19,3 +19,59 @@ def test_load_and_output():
     assert all(D.labels["a"] == [0.1, 1.1, 2.1, 3.1])
     assert all(D.labels["b"] == [0.2, 1.2, 2.2, 3.2])
     assert all(D.labels["c"] == [0.3, 1.3, 2.3, 3.3])
+
+
+def test_cached_columns(tmpdir):
+    filename = str(tmpdir.join("test.csv"))
+    with open(filename, "w") as f:
+        f.write("a,name\n0.1,x\n1.1,y\n2.1,x\n")
+
+    D = CsvDataset(filename, cache=True)
+    cache_root = filename + ".columns"
+    assert os.path.exists(os.path.join(cache_root, "source.yaml"))
+
+    assert len(D) == 3
+    assert D[2] == {"a": 2.1, "name": "x", "index_": 2}
+    assert all(D.labels["a"] == [0.1, 1.1, 2.1])
+    assert list(D.labels["name"]) == ["x", "y", "x"]
+    assert list(D.labels["name"].categories) == ["x", "y"]
+
+    # Unchanged csv files are not converted again
+    mtime = os.stat(os.path.join(cache_root, "source.yaml")).st_mtime_ns
+    D = CsvDataset(filename, cache=True)
+    assert os.stat(os.path.join(cache_root, "source.yaml")).st_mtime_ns == mtime
+
+    with open(filename, "w") as f:
+        f.write("a,name\n0.1,x\n1.1,z\n2.1,x\n3.1,w\n")
+    os.utime(filename, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+    D = CsvDataset(filename, cache=True)
+    assert len(D) == 4
+    assert D[1]["name"] == "z"
+    assert list(D.labels["name"].categories) == ["w", "x", "z"]
+
+
+def test_convert_csv_race(tmpdir, monkeypatch):
+    import edflow.data.agnostics.csv_dset as csv_dset
+
+    filename = str(tmpdir.join("test.csv"))
+    with open(filename, "w") as f:
+        f.write("a,name\n0.1,x\n1.1,y\n2.1,x\n")
+    cache_root = filename + ".columns"
+    csv_dset.convert_csv(filename, cache_root)
+
+    rename = os.rename
+
+    def rename_and_race(src, dst):
+        # Another converter installs its cache right after ours moved the
+        # old one aside.
+        rename(src, dst)
+        csv_dset.convert_csv(filename, cache_root)
+
+    monkeypatch.setattr(csv_dset.os, "rename", rename_and_race)
+    csv_dset.convert_csv(filename, cache_root)
+    monkeypatch.undo()
+
+    assert sorted(os.listdir(str(tmpdir))) == ["test.csv", "test.csv.columns"]
+    D = CsvDataset(filename, cache=True)
+    assert list(D.labels["name"]) == ["x", "y", "x"]
@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+
+from edflow.data.agnostics.query import LabelQuery, query_indices
+from edflow.data.agnostics.subdataset import SubDataset
+from edflow.debug import DebugDataset
+
+
+def test_query_precedence():
+    labels = {"a": np.arange(10) % 3, "b": np.arange(10)}
+
+    idxs = query_indices(labels, "a == 0 & b in [3, 6, 7]", 10)
+    assert list(idxs) == [3, 6]
+
+    idxs = query_indices(labels, "a == 1 | b > 8", 10)
+    assert list(idxs) == [1, 4, 7, 9]
+
+    idxs = query_indices(labels, "~(b < 8) and not a == 2", 10)
+    assert list(idxs) == [9]
+
+    idxs = query_indices(labels, "2 < b <= 4 or b not in [0, 1, 2, 3, 4, 5, 6]", 10)
+    assert list(idxs) == [3, 4, 7, 8, 9]
+
+
+def test_query_chunks():
+    labels = {"a": np.arange(100), "kps": np.stack([np.arange(100)] * 2, axis=-1)}
+
+    ref = list(range(10, 100, 10))
+    for chunk_size in [1, 7, 100, 1000]:
+        idxs = query_indices(labels, "a % 10 == 0 & a > 0", 100, chunk_size)
+        assert list(idxs) == ref
+
+        idxs = query_indices(labels, "kps[:, 1] % 10 == 0 & a > 0", 100, chunk_size)
+        assert list(idxs) == ref
+
+        idxs = query_indices(
+            labels, lambda l: (l["a"] % 10 == 0) & (l["a"] > 0), 100, chunk_size
+        )
+        assert list(idxs) == ref
+
+
+def test_query_nested_keys():
+    labels = {"a": {"b": np.arange(5)}}
+
+    idxs = query_indices(labels, "`a/b` >= 3", 5)
+    assert list(idxs) == [3, 4]
+    assert LabelQuery("`a/b` >= 3 & c == 1").names == ["a/b", "c"]
+
+
+def test_query_errors():
+    labels = {"a": np.arange(5)}
+
+    with pytest.raises(KeyError):
+        query_indices(labels, "b == 1", 5)
+
+    with pytest.raises(ValueError):
+        query_indices(labels, "len(a) == 1", 5)
+
+
+def test_query_cache(tmpdir):
+    path = str(tmpdir.join("a.npy"))
+    a = np.memmap(path, mode="w+", dtype=np.int64, shape=(10,))
+    a[:] = np.arange(10)
+    a.flush()
+    labels = {"a": np.memmap(path, mode="c", dtype=np.int64, shape=(10,))}
+
+    cache_root = str(tmpdir.join("cache"))
+    idxs = query_indices(labels, "a > 6", 10, cache_root=cache_root)
+    assert list(idxs) == [7, 8, 9]
+    assert len(tmpdir.join("cache").listdir()) == 1
+
+    idxs = query_indices(labels, "a > 6", 10, cache_root=cache_root)
+    assert isinstance(idxs, np.memmap)
+    assert list(idxs) == [7, 8, 9]
+
+    # Not memory mapped -> not cached
+    query_indices({"a": np.arange(10)}, "a > 5", 10, cache_root=cache_root)
+    assert len(tmpdir.join("cache").listdir()) == 1
+
+    # The cache can not be written, e.g. on read only datasets
+    cache_root = str(tmpdir.join("a.npy", "cache"))
+    idxs = query_indices(labels, "a > 7", 10, cache_root=cache_root)
+    assert list(idxs) == [8, 9]
+
+
+def test_dataset_where():
+    D = DebugDataset(size=10)
+
+    S = D.where("label1 >= 5 & label2 != 7")
+
+    assert isinstance(S, SubDataset)
+    assert len(S) == 4
+    assert list(S.labels["label1"]) == [5, 6, 8, 9]
+    assert S[2]["val"] == 8
@@ -104,3 +104,375 @@ def test_meta_dset():
 
     finally:
         _teardown(root)
+
+
+def test_meta_dset_label_index():
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        M = MetaDataset(root)
+
+        LI = M.get_label_index("attr1")
+        assert os.path.exists(os.path.join(root, "label_indices", "attr1"))
+        assert len(LI) == N
+        assert list(LI.indices(42)) == [42]
+
+        # Loaded from disk the second time
+        LI2 = MetaDataset(root).get_label_index("attr1")
+        assert isinstance(LI2.order, np.memmap)
+        assert list(LI2.indices(42)) == [42]
+
+        # The label file changes without changing its length
+        path = os.path.join(root, "labels", f"attr1-*-{N}-*-int64.npy")
+        mmap = np.memmap(path, dtype=np.int64, mode="r+", shape=(N,))
+        mmap[:] = np.arange(N)[::-1]
+        mmap.flush()
+        del mmap
+        os.utime(path, ns=(0, 0))
+        LI3 = MetaDataset(root).get_label_index("attr1")
+        assert list(LI3.indices(42)) == [N - 1 - 42]
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_label_index_read_only(monkeypatch):
+    from edflow.data.util.label_index import LabelIndex
+
+    def save(self, root):
+        raise PermissionError(root)
+
+    monkeypatch.setattr(LabelIndex, "save", save)
+    try:
+        root = _setup(".", 10)
+
+        LI = MetaDataset(root).get_label_index("attr1")
+        assert list(LI.indices(3)) == [3]
+        assert not os.path.exists(os.path.join(root, "label_indices"))
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_where():
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        M = MetaDataset(root)
+
+        S = M.where("attr1 % 10 == 0 & attr1 < 50")
+        assert len(S) == 5
+        assert list(S.labels["attr1"]) == [0, 10, 20, 30, 40]
+        assert len(os.listdir(os.path.join(root, "query_cache"))) == 1
+
+        S = MetaDataset(root).where("attr1 % 10 == 0 & attr1 < 50")
+        assert list(S.labels["attr1"]) == [0, 10, 20, 30, 40]
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_categorical():
+    from edflow.data.believers.meta_columns import (
+        store_categorical_label,
+        CategoricalColumn,
+    )
+
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        names = np.array(["even", "odd"])[np.arange(N) % 2]
+        store_categorical_label(names, os.path.join(root, "labels"), "name")
+
+        M = MetaDataset(root)
+
+        assert isinstance(M.labels["name"], CategoricalColumn)
+        assert len(M.labels["name"]) == N
+        assert M.labels["name"].codes.dtype == np.int8
+        assert np.all(np.asarray(M.labels["name"]) == names)
+        assert M[3]["labels_"]["name"] == "odd"
+
+        S = M.where("name == 'even'")
+        assert len(S) == N // 2
+        assert list(M.get_label_index("name").indices("odd")[:2]) == [1, 3]
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_manifest():
+    from edflow.data.believers.meta_manifest import LazyLabel, write_manifest
+
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        M = MetaDataset(root)
+        M.expand = True
+        assert not os.path.exists(os.path.join(root, "manifest.yaml"))
+        ref = M[5]
+
+        M = MetaDataset(root, write_manifest=True)
+        assert os.path.exists(os.path.join(root, "manifest.yaml"))
+
+        M = MetaDataset(root)
+        assert isinstance(M.labels["attr1"], LazyLabel)
+        assert M.labels["keypoints"].shape == (N, 17, 2)
+        assert M.labels["attr1"]._label is None
+        assert len(M) == N
+
+        def tester(key, val):
+            assert np.all(val == retrieve(ref, key))
+
+        M.expand = True
+        walk(M[5], tester, pass_key=True)
+        assert isinstance(M.labels["attr1"]._label, np.memmap)
+        assert list(M.where("attr1 < 3").labels["attr1"]) == [0, 1, 2]
+
+        # Operators act on the opened label
+        M = MetaDataset(root)
+        attr1 = M.labels["attr1"]
+        assert np.sum(attr1 == 3) == 1
+        assert np.where(attr1 == 3)[0][0] == 3
+        assert np.sum(attr1 != 3) == N - 1
+        assert np.all(attr1 + 1 == np.arange(1, N + 1))
+        assert np.all(2 * attr1 - attr1 == np.arange(N))
+        assert np.all(np.add(attr1, attr1) == 2 * np.arange(N))
+        assert np.all((attr1 < 3) == (np.arange(N) < 3))
+
+        # Adding labels invalidates the manifest
+        data = np.arange(N)
+        mmap_path = os.path.join(root, "labels", f"attr3-*-{N}-*-{data.dtype}.npy")
+        mmap = np.memmap(mmap_path, dtype=data.dtype, mode="w+", shape=(N,))
+        mmap[:] = data
+        del mmap
+
+        M = MetaDataset(root)
+        assert "attr3" in M.labels
+        assert isinstance(M.labels["attr3"], np.memmap)
+
+        write_manifest(root)
+        M = MetaDataset(root)
+        assert isinstance(M.labels["attr3"], LazyLabel)
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_get_batch():
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        M = MetaDataset(root)
+        batch = M.get_batch([3, 7, 11])
+
+        assert batch["image"].shape == (3, 64, 64, 3)
+        assert batch["image"].dtype == np.float32
+        assert np.all(batch["image"] == 1.0)
+        assert list(batch["index_"]) == [3, 7, 11]
+        assert list(batch["labels_"]["attr1"]) == [3, 7, 11]
+        assert batch["labels_"]["keypoints"].shape == (3, 17, 2)
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_packed_images():
+    from edflow.data.believers.meta_columns import pack_column, PackedColumn
+
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        M = MetaDataset(root)
+        M.expand = True
+        ref = M[5]["image"]
+
+        pack_column(root, "image")
+        assert os.path.exists(os.path.join(root, "original_labels"))
+
+        M = MetaDataset(root)
+        M.expand = True
+        assert isinstance(M.labels["image_"], PackedColumn)
+        assert M.labels["image_"][5].dtype == np.uint8
+        assert np.all(M[5]["image"] == ref)
+        assert M.get_batch([1, 5])["image"].shape == (2, 64, 64, 3)
+
+        M = MetaDataset(root, write_manifest=True)
+        M.expand = True
+        assert np.all(M[5]["image"] == ref)
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_decoded_cache():
+    N = 20
+    try:
+        root = _setup(".", N)
+
+        with open(os.path.join(root, "meta.yaml"), "w") as mfile:
+            mfile.write(
+                """
+loader_kwargs:
+    image:
+        support: "-1->1"
+        resize_to: 32
+        decoded_cache: true
+        """
+            )
+
+        M = MetaDataset(root)
+        M.expand = True
+        assert "decoded_cache" not in M.loader_kwargs["image"]
+
+        d = M[3]
+        assert d["image"].shape == (32, 32, 3)
+        assert d["image"].dtype == np.float32
+        cache = M.decoded_caches["image"]
+        assert os.path.exists(os.path.join(root, "decoded_cache", "image-32x32"))
+        assert cache.n_valid == 1
+
+        M = MetaDataset(root)
+        M.expand = True
+        assert np.all(M[3]["image"] == d["image"])
+        batch = M.get_batch([3, 4, 5])
+        assert np.all(batch["image"] == 1.0)
+        assert M.decoded_caches["image"].n_valid == 3
+
+        # Changing the image paths invalidates the cache
+        label_path = M.labels["image_"].filename
+        stat = os.stat(label_path)
+        os.utime(label_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        M = MetaDataset(root)
+        M.expand = True
+        assert M.decoded_caches["image"].n_valid == 0
+        assert np.all(M[3]["image"] == d["image"])
+        assert M.decoded_caches["image"].n_valid == 1
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_string_columns():
+    from edflow.data.believers.meta_columns import (
+        convert_string_labels,
+        store_string_label,
+        StringColumn,
+        CategoricalColumn,
+        ConcatenatedLabel,
+    )
+
+    N = 100
+    try:
+        root = _setup(".", N)
+
+        names = np.array(["even", "odd"])[np.arange(N) % 2]
+        mmap_path = os.path.join(root, "labels", f"name-*-{N}-*-{names.dtype}.npy")
+        mmap = np.memmap(mmap_path, dtype=names.dtype, mode="w+", shape=(N,))
+        mmap[:] = names
+        del mmap
+
+        M = MetaDataset(root)
+        M.expand = True
+        ref = M[7]
+
+        paths = convert_string_labels(root)
+        assert len(paths) == 2
+        assert len(os.listdir(os.path.join(root, "original_labels"))) == 2
+
+        M = MetaDataset(root)
+        M.expand = True
+        assert isinstance(M.labels["image_"], StringColumn)
+        assert isinstance(M.labels["name"], CategoricalColumn)
+        assert M.labels["image_"][7] == ref["labels_"]["image_"]
+        assert np.all(M[7]["image"] == ref["image"])
+        assert list(M.labels["image_"][[7, -1]]) == [
+            ref["labels_"]["image_"],
+            os.path.join(root, "images", "099.png"),
+        ]
+        assert len(M.where("name == 'odd'")) == N // 2
+
+        path = store_string_label(["", "äö", "x"], root, "utf")
+        S = StringColumn.from_folder(path)
+        assert list(S) == ["", "äö", "x"]
+        assert list(S[1:]) == ["äö", "x"]
+        assert S[2:].shape == (1,)
+        assert S.dtype.kind == "U"
+        assert list(S == "x") == [False, False, True]
+        assert list(S != "x") == [True, True, False]
+        assert np.sum(M.labels["name"] == "odd") == N // 2
+        assert np.sum(M.labels["name"] != "odd") == N // 2
+        assert (M.labels["image_"] == ref["labels_"]["image_"])[7]
+        assert list(S[::-2]) == ["x", ""]
+        assert list(S[np.array([True, False, True])]) == ["", "x"]
+        assert S[[]].shape == (0,)
+
+        C = ConcatenatedLabel([S, StringColumn.from_folder(path)])
+        assert list(C[[0, 1, 5]]) == ["", "äö", "x"]
+        assert list(C[1:5]) == ["äö", "x", "", "äö"]
+
+    finally:
+        _teardown(root)
+
+
+def test_meta_dset_shards():
+    from edflow.data.believers.meta_columns import ConcatenatedLabel
+
+    try:
+        super_root = os.path.abspath("META__shards__META")
+        root1 = _setup(os.path.join(super_root, "a"), 10)
+        root2 = _setup(os.path.join(super_root, "b"), 5)
+        refs = [MetaDataset(root1), MetaDataset(root2)]
+
+        with open(os.path.join(super_root, "meta.yaml"), "w") as mfile:
+            mfile.write(
+                "description: Sharded\nshards:\n  - {}\n  - {}\n".format(
+                    os.path.relpath(root1, super_root), root2
+                )
+            )
+
+        for M in [MetaDataset([root1, root2]), MetaDataset(super_root)]:
+            M.expand = True
+            assert len(M) == 15
+            assert isinstance(M.labels["attr1"], ConcatenatedLabel)
+            assert list(M.labels["attr1"][8:12]) == [8, 9, 0, 1]
+            assert M.labels["keypoints"][[0, 14]].shape == (2, 17, 2)
+            assert M.labels["image_"][12] == refs[1].labels["image_"][2]
+            assert np.all(np.asarray(M.labels["attr1"])[10:] == np.arange(5))
+
+            d = M[12]
+            assert d["index_"] == 12
+            assert d["labels_"]["image_"] == refs[1].labels["image_"][2]
+            assert d["image"].shape == (64, 64, 3)
+
+            batch = M.get_batch([14, 0, 11])
+            assert list(batch["labels_"]["attr1"]) == [4, 0, 1]
+            assert batch["image"].shape == (3, 64, 64, 3)
+
+            assert len(M.where("attr1 < 2")) == 4
+            assert list(M.get_label_index("attr1").indices(3)) == [3, 13]
+
+            for start in range(0, 15, 4):
+                chunk = M.labels["attr1"][start : start + 4]
+                assert list(chunk) == list(np.asarray(M.labels["attr1"])[start:][:4])
+            assert list(M.labels["attr1"][::-7]) == [4, 7, 0]
+            assert list(M.labels["attr1"][np.arange(15) > 12]) == [3, 4]
+
+            attr1 = M.labels["attr1"]
+            expected = np.concatenate([np.arange(10), np.arange(5)])
+            assert np.sum(attr1 == 2) == 2
+            assert list(np.flatnonzero(attr1 == 2)) == [2, 12]
+            assert np.all((attr1 != 2) == (expected != 2))
+            assert np.all(attr1 + 1 == expected + 1)
+            assert np.all(attr1 - expected == 0)
+            assert np.all(np.multiply(attr1, 2) == 2 * expected)
+            image = M.labels["image_"]
+            assert np.sum(image == refs[1].labels["image_"][2]) == 1
+
+    finally:
+        _teardown(super_root)
@@ -0,0 +1,141 @@
+import pytest
+import os
+import numpy as np
+from PIL import Image
+
+from edflow.data.believers.meta_loaders import image_loader, image_batch_loader
+from edflow.data.believers.meta_loaders import DecodedImageCache
+
+
+def _make_images(root, n, size=(64, 48), ext="png"):
+    paths = []
+    for i in range(n):
+        image = np.full((size[1], size[0], 3), 10 * i, dtype=np.uint8)
+        path = os.path.join(root, "{}.{}".format(i, ext))
+        Image.fromarray(image).save(path)
+        paths += [path]
+    return paths
+
+
+@pytest.mark.parametrize("support", ["0->255", "0->1", "-1->1"])
+def test_image_loader_support(tmpdir, support):
+    [path] = _make_images(str(tmpdir), 1)
+    im = image_loader(path, support=support)()
+
+    assert im.shape == (48, 64, 3)
+    if support == "0->255":
+        assert im.dtype == np.uint8
+    else:
+        assert im.dtype == np.float32
+        vmin = -1.0 if support == "-1->1" else 0.0
+        assert np.allclose(im, vmin)
+
+
+@pytest.mark.parametrize("n_threads", [0, 4])
+def test_image_batch_loader(tmpdir, n_threads):
+    paths = _make_images(str(tmpdir), 5)
+
+    batch = image_batch_loader(paths, support="0->1", n_threads=n_threads)
+    assert batch.shape == (5, 48, 64, 3)
+    assert batch.dtype == np.float32
+    for i, path in enumerate(paths):
+        assert np.allclose(batch[i], image_loader(path, support="0->1")())
+
+    out = np.zeros((5, 16, 16, 3), dtype=np.uint8)
+    batch = image_batch_loader(paths, resize_to=16, n_threads=n_threads, out=out)
+    assert batch is out
+    assert np.all(out[3] == 30)
+
+
+def test_image_batch_loader_draft(tmpdir):
+    paths = _make_images(str(tmpdir), 3, size=(256, 256), ext="jpg")
+
+    batch = image_batch_loader(paths, resize_to=[32, 32], draft=True)
+    assert batch.shape == (3, 32, 32, 3)
+    assert np.allclose(batch[2], 20, atol=3)
+
+    with pytest.raises(ValueError):
+        image_batch_loader(paths + _make_images(str(tmpdir), 1, ext="png"))
+
+
+def _fill_cache(args):
+    cache, paths, indices = args
+    for i in indices:
+        image_loader(paths[i], resize_to=16, cache=cache, index=i)()
+    return cache.n_valid
+
+
+def test_decoded_image_cache(tmpdir):
+    import multiprocessing
+
+    paths = _make_images(str(tmpdir), 6)
+    root = str(tmpdir.join("cache"))
+
+    cache = DecodedImageCache(root, 6)
+    assert cache.get(0) is None
+    assert cache.n_valid == 0
+
+    im = image_loader(paths[2], resize_to=16, cache=cache, index=2)()
+    assert im.shape == (16, 16, 3)
+    assert cache.n_valid == 1
+
+    cached = image_loader(paths[2], resize_to=16, cache=cache, index=2)()
+    assert isinstance(cached, np.memmap)
+    assert not cached.flags.writeable
+    assert np.all(cached == im)
+
+    # Partially filled caches are completed by several processes
+    with multiprocessing.Pool(2) as pool:
+        pool.map(_fill_cache, [(cache, paths, [0, 1, 2]), (cache, paths, [3, 4])])
+
+    cache = DecodedImageCache(root, 6)
+    assert cache.n_valid == 5
+    assert cache.get(5) is None
+    assert np.all(cache.get(4) == 40)
+
+    batch = image_batch_loader(
+        paths, support="0->1", resize_to=16, cache=cache, indices=np.arange(6)
+    )
+    assert cache.n_valid == 6
+    assert np.allclose(batch[5], 50 / 255.0)
+
+    with pytest.raises(ValueError):
+        DecodedImageCache(root, 7).get(0)
+
+
+def test_decoded_image_cache_source(tmpdir):
+    paths = _make_images(str(tmpdir), 3)
+    root = str(tmpdir.join("cache"))
+
+    cache = DecodedImageCache(root, 3, source="a")
+    image_loader(paths[1], resize_to=16, cache=cache, index=1)()
+    assert cache.n_valid == 1
+
+    # Stray files are ignored
+    with open(os.path.join(root, "notes.txt"), "w") as f:
+        f.write("stray")
+    open(os.path.join(root, "other-*-npy"), "w").close()
+    assert DecodedImageCache(root, 3, source="a").n_valid == 1
+
+    # Caches of other sources are rebuilt
+    cache = DecodedImageCache(root, 3, source="b")
+    assert cache.get(1) is None
+    assert not os.path.exists(root)
+    image_loader(paths[2], resize_to=16, cache=cache, index=2)()
+    assert cache.n_valid == 1
+    with open(os.path.join(root, "source.txt")) as f:
+        assert f.read() == "b"
+
+
+def test_decoded_image_cache_not_writable(tmpdir):
+    paths = _make_images(str(tmpdir), 3)
+    blocker = str(tmpdir.join("blocker"))
+    open(blocker, "w").close()
+
+    cache = DecodedImageCache(os.path.join(blocker, "cache"), 3)
+    with pytest.warns(UserWarning):
+        im = image_loader(paths[0], resize_to=16, cache=cache, index=0)()
+    assert im.shape == (16, 16, 3)
+    assert cache.disabled
+    assert cache.n_valid == 0
+    assert cache.get(0) is None
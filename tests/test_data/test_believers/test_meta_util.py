@@ -0,0 +1,105 @@
+import pytest
+import os
+import numpy as np
+
+from edflow.data.believers.meta import load_labels
+from edflow.data.believers.meta_util import LabelWriter
+
+
+def test_label_writer(tmpdir):
+    root = str(tmpdir.join("labels"))
+
+    with LabelWriter(root, buffer_size=4, dtypes={"name": "<U8"}) as writer:
+        for i in range(10):
+            writer.append({"frame": i, "kps": np.full((3, 2), i, dtype=np.float32)})
+        writer.extend({"name": np.array(["a", "bb"] * 5)})
+        writer.extend({"nested/value": np.arange(10) * 2})
+
+        assert writer.columns["frame"].n == 8
+        assert writer.columns["frame"].n_buffered == 2
+
+    files = sorted(os.listdir(root))
+    assert files == [
+        "frame-*-10-*-int64.npy",
+        "kps-*-10x3x2-*-float32.npy",
+        "name-*-10-*-<U8.npy",
+        "nested",
+    ]
+
+    labels = load_labels(root)
+    assert np.all(labels["frame"] == np.arange(10))
+    assert np.all(labels["kps"][:, 0, 0] == np.arange(10))
+    assert list(labels["name"][:3]) == ["a", "bb", "a"]
+    assert np.all(labels["nested"]["value"] == np.arange(10) * 2)
+
+
+def test_label_writer_errors(tmpdir):
+    root = str(tmpdir)
+
+    writer = LabelWriter(root)
+    writer.append({"a": 1, "b": "x"})
+    with pytest.raises(ValueError):
+        writer.append({"b": "too long"})
+    with pytest.raises(ValueError):
+        writer.append({"a": [1, 2]})
+
+    writer.append({"a": 2})
+    with pytest.raises(ValueError):
+        writer.finalize()
+
+
+def test_label_writer_atomic_rows(tmpdir):
+    root = str(tmpdir)
+
+    writer = LabelWriter(root)
+    writer.append({"a": 1, "b": [1, 2]})
+    with pytest.raises(ValueError):
+        writer.append({"a": 2, "b": [1, 2, 3], "c": 0})
+    assert "c" not in writer.columns
+    writer.append({"a": 3, "b": [3, 4]})
+
+    paths = writer.finalize()
+    assert writer.finalize() == paths
+    labels = load_labels(root)
+    assert list(labels["a"]) == [1, 3]
+    assert labels["b"].shape == (2, 2)
+
+
+def test_label_writer_lossy_values(tmpdir):
+    root = str(tmpdir)
+
+    writer = LabelWriter(root, dtypes={"small": np.int8, "f": np.float32})
+    writer.append({"a": 1, "small": 1, "f": 1})
+    with pytest.raises(ValueError):
+        writer.append({"a": 0.7, "small": 2, "f": 2})
+    with pytest.raises(ValueError):
+        writer.append({"a": 2, "small": 1000, "f": 2})
+    with pytest.raises(ValueError):
+        writer.append({"a": 2, "small": 2, "f": 1e300})
+    with pytest.raises(ValueError):
+        big = np.array([2, 2 ** 70], dtype=object)
+        writer.extend({"a": big, "small": [2, 3], "f": [2, 3]})
+    writer.append({"a": 2.0, "small": np.int64(-3), "f": 0.1})
+    writer.extend({"a": [3, 4], "small": [4, 5], "f": np.array([0.5, 1.5])})
+
+    writer.finalize()
+    labels = load_labels(root)
+    assert list(labels["a"]) == [1, 2, 3, 4]
+    assert labels["a"].dtype == np.int64
+    assert list(labels["small"]) == [1, -3, 4, 5]
+    assert np.allclose(labels["f"], [1, 0.1, 0.5, 1.5])
+
+
+def test_label_writer_empty(tmpdir):
+    writer = LabelWriter(str(tmpdir))
+    writer.extend({"a": np.zeros([0, 2])})
+    with pytest.raises(ValueError):
+        writer.finalize()
+
+
+def test_label_writer_new_labels_rolled_back(tmpdir):
+    writer = LabelWriter(str(tmpdir), dtypes={"e": "<U1"})
+    with pytest.raises(ValueError):
+        writer.append({"d": 0, "e": "too long"})
+    assert writer.columns == {}
+    assert os.listdir(str(tmpdir)) == []
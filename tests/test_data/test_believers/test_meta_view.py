@@ -166,3 +166,121 @@ def test_meta_view_dset():
 
     finally:
         _teardown(super_root)
+
+
+def test_meta_view_dset_dedup():
+    N = 100
+    V = 25
+    try:
+        super_root, base_root, view_root = _setup(".", N, V)
+
+        M = MetaViewDataset(view_root)
+        M.append_labels = False
+
+        requested = []
+        get_example = M.base.get_example
+
+        def counting_get_example(idx):
+            requested.append(idx)
+            return get_example(idx)
+
+        M.base.get_example = counting_get_example
+
+        # complex contains 15 times the index 0 and simple index 0, too.
+        d = M[0]
+        assert requested == [0]
+        assert len(d["complex"][0]) == 5
+        assert d["complex"][0][2][1] == d["simple"]
+
+        # Examples loaded once are still separate objects.
+        d["simple"]["edited"] = True
+        assert "edited" not in d["complex"][0][2][1]
+
+        requested.clear()
+        M.expand = True
+        d = M[3]
+        assert requested == []
+        assert np.all(d["complex"][0][4][2]["image"] == 1.0)
+        assert d["simple"]["index_"] == 3
+
+        batch = M.get_batch([1, 2, 1])
+        assert list(batch["index_"]) == [1, 2, 1]
+        assert list(batch["simple"]["index_"]) == [1, 2, 1]
+        assert batch["simple"]["image"].shape == (3, 64, 64, 3)
+
+    finally:
+        _teardown(super_root)
+
+
+def test_export_label_view(tmpdir):
+    from edflow.data.believers.meta_view import export_label_view
+
+    label = np.arange(20 * 3).reshape(20, 3)
+    view = np.array([[0, 1], [5, 5], [19, 2], [7, 8], [3, 3]])
+    root = str(tmpdir)
+
+    path = export_label_view(label, view, root, "kps", chunk_size=2)
+    assert os.path.basename(path) == f"kps-*-5x2x3-*-{label.dtype}.npy"
+    assert not os.path.exists(os.path.join(root, ".kps.progress"))
+
+    result = np.memmap(path, mode="r", dtype=label.dtype, shape=(5, 2, 3))
+    assert np.all(result == label[view])
+
+    # Simulate an export interrupted after the first chunk
+    mmap = np.memmap(path, mode="r+", dtype=label.dtype, shape=(5, 2, 3))
+    mmap[2:] = -1
+    mmap.flush()
+    with open(os.path.join(root, ".kps.progress"), "w") as pf:
+        pf.write("2")
+
+    export_label_view(label, view, root, "kps", chunk_size=2)
+    result = np.memmap(path, mode="r", dtype=label.dtype, shape=(5, 2, 3))
+    assert np.all(result == label[view])
+    assert not os.path.exists(os.path.join(root, ".kps.progress"))
+
+
+@pytest.mark.parametrize("column_format", ["utf8", "packed"])
+def test_meta_view_dset_column_formats(tmpdir, column_format):
+    from edflow.data.believers.meta import MetaDataset
+    from edflow.data.believers.meta_columns import convert_string_labels, pack_column
+
+    N = 10
+    V = 5
+    super_root, base_root, view_root = _setup(str(tmpdir), N, V)
+    if column_format == "utf8":
+        convert_string_labels(base_root)
+    else:
+        pack_column(base_root, "image")
+
+    base = MetaDataset(base_root)
+    M = MetaViewDataset(view_root)
+
+    for dirpath, dirnames, filenames in os.walk(os.path.join(view_root, "labels")):
+        for name in dirnames + filenames:
+            assert "object" not in name
+
+    base_labels = {k: v for k, v in base.labels.items() if k.startswith("image")}
+    assert len(base_labels) == 1
+    key, base_label = list(base_labels.items())[0]
+
+    simple = M.labels["simple1"][key]
+    complex_ = M.labels["complex"][0][key]
+    assert len(simple) == V
+    assert complex_.shape == (V, 5, 3)
+    for i in range(V):
+        assert np.all(np.asarray(simple[i]) == np.asarray(base_label[i]))
+    assert np.all(np.asarray(complex_[2, 4, 1]) == np.asarray(base_label[0]))
+
+    M.expand = True
+    d = M[3]
+    assert np.all(d["simple1"]["image"] == 1.0)
+    assert np.all(d["complex"][0][4][2]["image"] == 1.0)
+
+
+def test_export_label_view_object(tmpdir):
+    from edflow.data.believers.meta_view import export_label_view
+
+    label = np.array([{"a": 1}, None, "x"], dtype=object)
+    with pytest.raises(ValueError):
+        export_label_view(label, np.array([0, 2]), str(tmpdir), "objects")
+    assert os.listdir(str(tmpdir)) == []
@@ -164,3 +164,32 @@ def test_get_seq():
     assert s1 == s2
 
     assert np.all(S1.labels["label1"] == S2.labels["label1"])
+
+
+def test_sequence_dset_frame_cache():
+    D1 = DebugDataset(size=10)
+    D2 = DebugDataset(size=10)
+
+    D = D1 + D2
+
+    S_ref = SequenceDataset(D, 3, fid_key="label1")
+    S = SequenceDataset(D, 3, fid_key="label1", frame_cache_size=8)
+
+    assert len(S) == len(S_ref)
+    for i in range(len(S)):
+        assert S[i] == S_ref[i]
+
+    # 16 sequences of length 3, but only 20 distinct frames
+    assert S.frame_cache.misses == 20
+    assert S.frame_cache.hits == 3 * len(S) - 20
+    assert len(S.frame_cache) == 8
+
+
+def test_sequence_dset_frame_cache_step():
+    D = DebugDataset(size=10)
+
+    S_ref = SequenceDataset(D, 3, step=2, fid_key="label1")
+    S = SequenceDataset(D, 3, step=2, fid_key="label1", frame_cache_size=4)
+
+    for i in range(len(S)):
+        assert S[i] == S_ref[i]
@@ -0,0 +1,520 @@
+import os
+import pickle
+import queue
+import socket
+import threading
+import time
+import multiprocessing as mp
+from zipfile import ZipFile, ZIP_DEFLATED
+
+import pytest
+import numpy as np
+
+from edflow.data.dataset_mixin import DatasetMixin
+from edflow.data.util.cached_dset import (
+    CachedDataset,
+    ChunkLeases,
+    PathCachedDataset,
+    cachable,
+    cache_key,
+    evict_caches,
+    keyed_cache_path,
+    make_client_manager,
+    pickle_and_queue,
+    throughput,
+)
+from edflow.data.util.cache_records import (
+    RecordReader,
+    RecordWriter,
+    encode_record,
+    decode_record,
+    convert_zip_cache,
+    store_cache_labels,
+    load_cache_labels,
+    ALIGNMENT,
+    CODEC_RAW,
+    CODEC_ZLIB,
+    CODEC_ARRAYS,
+)
+
+
+def make_example(i):
+    return {"image": np.full([4, 4, 3], i, dtype=np.uint8), "label": i}
+
+
+def write_zip_cache(root, name, n):
+    os.makedirs(os.path.join(root, "cached"))
+    zip_path = os.path.join(root, "cached", name + ".zip")
+    with ZipFile(zip_path, "w", ZIP_DEFLATED) as zip_f:
+        for i in range(n):
+            zip_f.writestr("example_{}.p".format(i), pickle.dumps(make_example(i)))
+        labels = {"label": list(range(n))}
+        zip_f.writestr("labels.p", pickle.dumps(labels))
+    return zip_path
+
+
+def test_encode_record():
+    example = make_example(3)
+
+    record, codec = encode_record(example)
+    assert codec == CODEC_RAW
+    assert decode_record(record, codec)["label"] == 3
+
+    record, codec = encode_record({"zeros": np.zeros(1000)}, compression=6)
+    assert codec == CODEC_ZLIB
+    assert np.all(decode_record(record, codec)["zeros"] == 0)
+
+
+def test_record_writer_reader(tmpdir):
+    root = str(tmpdir.join("cache.records"))
+
+    with RecordWriter(root, 4) as writer:
+        assert list(writer.missing) == [0, 1, 2, 3]
+        for i in [2, 0]:
+            writer.write(i, *encode_record(make_example(i), compression=3))
+
+    # resume
+    with RecordWriter(root, 4) as writer:
+        assert list(writer.missing) == [1, 3]
+        for i in writer.missing:
+            writer.write(i, *encode_record(make_example(i)))
+        assert len(writer.missing) == 0
+
+    with pytest.raises(ValueError):
+        RecordWriter(root, 5)
+
+    reader = RecordReader(root)
+    assert len(reader) == 4
+    for i in range(4):
+        ex = reader[i]
+        assert ex["label"] == i
+        assert np.all(ex["image"] == i)
+
+    reader = pickle.loads(pickle.dumps(reader))
+    assert reader[1]["label"] == 1
+
+
+def test_record_writer_killed(tmpdir):
+    root = str(tmpdir.join("cache.records"))
+
+    writer = RecordWriter(root, 3)
+    writer.write(0, *encode_record(make_example(0)))
+    writer.write(1, *encode_record(make_example(1)))
+    # not committed yet
+    assert np.all(writer.index[:, 0] < 0)
+    writer.commit()
+    writer.file.close()
+    del writer
+
+    # The index points behind the end of the records, as if the writer had
+    # been killed before the data reached the file.
+    records_path = os.path.join(root, "records.bin")
+    size = os.path.getsize(records_path)
+    with open(records_path, "r+b") as f:
+        f.truncate(size - 1)
+
+    with RecordWriter(root, 3) as writer:
+        assert list(writer.missing) == [1, 2]
+        for i in writer.missing:
+            writer.write(i, *encode_record(make_example(i)))
+
+    reader = RecordReader(root)
+    assert [reader[i]["label"] for i in range(3)] == [0, 1, 2]
+
+
+def test_record_reader_missing(tmpdir):
+    root = str(tmpdir.join("cache.records"))
+    RecordWriter(root, 2).close()
+
+    with pytest.raises(KeyError):
+        RecordReader(root)[0]
+
+
+def test_convert_zip_cache(tmpdir):
+    root = str(tmpdir)
+    zip_path = write_zip_cache(root, "data", 5)
+
+    records_root = convert_zip_cache(zip_path, compression=1)
+    assert records_root == os.path.join(root, "cached", "data.records")
+
+    C = CachedDataset.from_cache(root, "data", records=True)
+    assert len(C) == 5
+    for i in range(5):
+        assert C[i]["label"] == i
+        assert np.all(C[i]["image"] == i)
+    assert isinstance(C.labels["label"], np.memmap)
+    assert list(C.labels["label"]) == list(range(5))
+
+    C_zip = CachedDataset.from_cache(root, "data")
+    assert C_zip[3]["label"] == 3
+
+
+class Examples(object):
+    in_memory_keys = ["label"]
+
+    def __len__(self):
+        return 6
+
+    def __getitem__(self, i):
+        return make_example(i)
+
+
+def test_pickle_and_queue_records():
+    leases = ChunkLeases()
+    outqueue = queue.Queue()
+    leases.put(
+        [
+            (0, {"indices": [0, 1, 2], "compression": 9}),
+            (1, {"indices": [3], "compression": None}),
+        ]
+    )
+
+    def complete():
+        # plays the server
+        for _ in range(2):
+            chunk_id, results = outqueue.get()
+            assert leases.complete(chunk_id)
+            finished[chunk_id] = results
+
+    finished = {}
+    server = threading.Thread(target=complete)
+    server.start()
+    pickle_and_queue(Examples, leases, outqueue, poll_interval=0.01)
+    server.join()
+
+    for i, (idx, record, codec, labels) in enumerate(finished[0]):
+        assert idx == i
+        assert codec == CODEC_ZLIB
+        assert decode_record(record, codec)["label"] == i
+        assert labels == {"label": i}
+
+    # zip caches receive pickles
+    [[name, pickle_bytes, labels]] = finished[1]
+    assert name == "example_3.p"
+    assert pickle.loads(pickle_bytes)["label"] == 3
+    assert labels == {"label": 3}
+
+
+def test_chunk_leases():
+    leases = ChunkLeases(lease_timeout=0.05)
+    leases.put([(0, "a"), (1, "b")])
+
+    assert leases.lease() == (0, "a")
+    assert leases.lease() == (1, "b")
+    assert leases.lease() is None
+    assert leases.complete(1)
+    assert not leases.complete(1)
+
+    # the lease of chunk 0 expires
+    time.sleep(0.1)
+    assert leases.lease() == (0, "a")
+    assert not leases.finished()
+    assert leases.complete(0)
+    assert leases.finished()
+    assert leases.lease() is None
+
+
+def test_chunk_leases_heartbeat():
+    leases = ChunkLeases(lease_timeout=0.1)
+    assert leases.idle_time() is None
+    leases.put([(0, "a")])
+
+    assert leases.lease() == (0, "a")
+    for _ in range(4):
+        time.sleep(0.05)
+        leases.heartbeat(0)
+    # renewed leases do not expire
+    assert leases.lease() is None
+    assert leases.idle_time() < 0.1
+
+    time.sleep(0.15)
+    assert leases.idle_time() > 0.1
+    assert leases.complete(0)
+    assert leases.idle_time() < 0.1
+
+
+class CacheExamples(DatasetMixin):
+    in_memory_keys = ["label"]
+
+    def __init__(self, root="", crash=False, n=40, delay=0):
+        self.root = root
+        self.name = "examples"
+        self.crash = crash
+        self.n = n
+        self.delay = delay
+
+    def __len__(self):
+        return self.n
+
+    def get_example(self, i):
+        if self.crash:
+            os._exit(1)
+        time.sleep(self.delay)
+        return make_example(i)
+
+
+def cache_worker(port, crash, delay, factory=None):
+    time.sleep(delay)
+    deadline = time.time() + 10
+    while True:
+        try:
+            manager = make_client_manager("localhost", port=port)
+            break
+        except ConnectionError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+
+    if factory is None:
+
+        def factory():
+            return CacheExamples(crash=crash)
+
+    pickle_and_queue(
+        factory, manager.get_leases(), manager.get_outqueue(), poll_interval=0.1
+    )
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.parametrize("records", [False, True])
+def test_cache_with_worker_processes(tmpdir, records):
+    port = free_port()
+
+    # The first worker dies after leasing a chunk, which has to be handed out
+    # again.
+    workers = [mp.Process(target=cache_worker, args=(port, True, 0))]
+    workers += [
+        mp.Process(target=cache_worker, args=(port, False, 1.0)) for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        C = CachedDataset(
+            CacheExamples(str(tmpdir)),
+            force_cache=True,
+            records=records,
+            chunk_size=4,
+            port=port,
+            lease_timeout=1.0,
+            max_pending=2,
+        )
+    finally:
+        for worker in workers:
+            worker.join(10)
+            if worker.is_alive():
+                worker.terminate()
+
+    assert workers[0].exitcode == 1
+    assert all(worker.exitcode == 0 for worker in workers[1:])
+
+    assert len(C) == 40
+    for i in range(40):
+        assert C[i]["label"] == i
+        assert np.all(C[i]["image"] == i)
+    assert list(C.labels["label"]) == list(range(40))
+
+
+def test_cache_all_workers_died(tmpdir):
+    port = free_port()
+    worker = mp.Process(target=cache_worker, args=(port, True, 0))
+    worker.start()
+
+    try:
+        with pytest.raises(RuntimeError):
+            CachedDataset(
+                CacheExamples(str(tmpdir)),
+                force_cache=True,
+                records=True,
+                chunk_size=4,
+                port=port,
+                lease_timeout=0.5,
+            )
+    finally:
+        worker.join(10)
+    assert worker.exitcode == 1
+
+
+def test_cache_slow_worker(tmpdir):
+    port = free_port()
+
+    # Each chunk takes longer than twice the lease timeout.
+    def factory():
+        return CacheExamples(n=8, delay=0.4)
+
+    worker = mp.Process(target=cache_worker, args=(port, False, 0, factory))
+    worker.start()
+
+    try:
+        C = CachedDataset(
+            CacheExamples(str(tmpdir), n=8),
+            force_cache=True,
+            records=True,
+            chunk_size=4,
+            port=port,
+            lease_timeout=0.5,
+        )
+    finally:
+        worker.join(10)
+        if worker.is_alive():
+            worker.terminate()
+
+    assert worker.exitcode == 0
+    assert [C[i]["label"] for i in range(8)] == list(range(8))
+
+
+def test_store_cache_labels(tmpdir):
+    root = str(tmpdir)
+    labels = {
+        "label": [0, 1, 2],
+        "name": ["a", "bc", "d"],
+        "ragged": [[0], [1, 2], []],
+    }
+    store_cache_labels(root, labels)
+
+    loaded = load_cache_labels(root)
+    assert isinstance(loaded["label"], np.memmap)
+    assert list(loaded["label"]) == [0, 1, 2]
+    assert list(loaded["name"]) == ["a", "bc", "d"]
+    assert loaded["ragged"] == [[0], [1, 2], []]
+
+    # overwrite
+    store_cache_labels(root, {"label": [3, 4, 5]})
+    loaded = load_cache_labels(root)
+    assert list(loaded.keys()) == ["label"]
+    assert list(loaded["label"]) == [3, 4, 5]
+
+
+def test_throughput():
+    assert throughput(10, 2 ** 20, 2.0) == (
+        "10 examples in 2.0s: 5.0 examples/s, 0.50 MB/s"
+    )
+
+
+def test_encode_raw_arrays():
+    example = {
+        "image": np.arange(24, dtype=np.float32).reshape(2, 3, 4),
+        "nested": [np.arange(3, dtype=np.int16)[::-1], {"scalar": np.float64(2)}],
+        "empty": np.zeros([0, 3]),
+        "zero_dim": np.array(3.0),
+        "strings": np.array(["a", "bc"]),
+        "objects": np.array([None, 1], dtype=object),
+        "label": 5,
+    }
+
+    for compression in [0, 9]:
+        record, codec = encode_record(example, compression, raw_arrays=True)
+        assert codec & CODEC_ARRAYS
+        decoded = decode_record(record, codec)
+
+        assert decoded["label"] == 5
+        for key in ["image", "empty", "zero_dim", "strings", "objects"]:
+            assert decoded[key].dtype == example[key].dtype
+            assert decoded[key].shape == example[key].shape
+            assert np.all(decoded[key] == example[key])
+        assert list(decoded["nested"][0]) == [2, 1, 0]
+        assert decoded["nested"][1]["scalar"] == 2
+
+
+def test_raw_arrays_zero_copy(tmpdir):
+    root = str(tmpdir.join("cache.records"))
+
+    with RecordWriter(root, 3) as writer:
+        for i in range(3):
+            record, codec = encode_record(make_example(i), raw_arrays=True)
+            writer.write(i, record, codec)
+
+    reader = RecordReader(root)
+    for i in range(3):
+        offset = reader.index[i, 0]
+        assert offset % ALIGNMENT == 0
+
+        image = reader[i]["image"]
+        assert np.all(image == i)
+        assert image.ctypes.data % ALIGNMENT == 0
+        assert not image.flags.writeable
+        assert not image.flags.owndata
+
+
+def factory_a(n, offset=0):
+    return n + offset
+
+
+def factory_b(n, offset=0):
+    return n + offset
+
+
+def test_cache_key():
+    key = cache_key(factory_a, (3,))
+    assert len(key) == 16
+    assert cache_key(factory_a, (), {"n": 3}) == key
+    assert cache_key(factory_a, (3, 0)) == key
+    assert cache_key(factory_a, (3, 1)) != key
+    assert cache_key(factory_b, (3,)) != key
+
+
+    # Arrays are hashed by content, not by their truncated repr.
+    a = np.zeros(10000)
+    b = np.zeros(10000)
+    b[5000] = 1
+    assert cache_key(factory_a, (a,)) == cache_key(factory_a, (np.zeros(10000),))
+    assert cache_key(factory_a, (a,)) != cache_key(factory_a, (b,))
+    assert cache_key(factory_a, (a,)) != cache_key(factory_a, (a.astype(int),))
+
+    with pytest.raises(ValueError):
+        cache_key(factory_a, (object(),))
+
+    assert keyed_cache_path("/a/data.zip", key) == "/a/data-{}.zip".format(key)
+
+
+def test_cachable(tmpdir, monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(PathCachedDataset, "port", port)
+    path = str(tmpdir.join("cache", "examples.zip"))
+
+    @cachable(path)
+    def examples(n=8):
+        return CacheExamples(n=n)
+
+    def cache(**kwargs):
+        # edcache workers call the factory without arguments
+        worker = mp.Process(target=cache_worker, args=(port, False, 0, examples))
+        worker.start()
+        try:
+            return examples(**kwargs)
+        finally:
+            worker.join(10)
+
+    C = cache()
+    assert len(C) == 8
+    assert C[5]["label"] == 5
+    assert os.path.exists(examples.cache_path() + ".p")
+
+    # hit without workers
+    C = examples(8)
+    assert C.base_dataset is None
+    assert len(C) == 8
+    assert list(C.labels["label"]) == list(range(8))
+
+    # other parameters build a new cache next to the first one
+    C = cache(n=4)
+    assert len(C) == 4
+    assert examples.cache_path(4) != examples.cache_path(8)
+    assert len(examples(n=8)) == 8
+    assert len(examples(n=4)) == 4
+
+    with open(path + ".log") as f:
+        events = [line.split("\t")[1] for line in f]
+    assert events == ["miss", "hit", "miss", "hit", "hit"]
+
+    # least recently used caches are evicted first
+    os.utime(examples.cache_path(8) + ".p", (0, 0))
+    size = os.path.getsize(examples.cache_path(4))
+    assert evict_caches(path, size * 1.5) == [examples.cache_path(8)]
+    assert not os.path.exists(examples.cache_path(8))
+    assert len(examples(n=4)) == 4
@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+
+from edflow.data.util.label_index import LabelIndex
+
+
+def test_label_index_lookup():
+    labels = np.array(["a", "b", "a", "c", "b", "a"])
+    LI = LabelIndex(labels)
+
+    assert len(LI) == 3
+    assert LI.n_indices == 6
+    assert list(LI.indices("a")) == [0, 2, 5]
+    assert list(LI.indices("b")) == [1, 4]
+    assert list(LI.indices("c")) == [3]
+    assert LI.group_size("a") == 3
+    assert list(LI.sizes) == [3, 2, 1]
+
+    with pytest.raises(KeyError):
+        LI.indices("d")
+
+    for value, indices in LI.items():
+        assert np.all(labels[indices] == value)
+
+
+def test_label_index_wrong_dims():
+    with pytest.raises(ValueError):
+        LabelIndex(np.zeros([3, 2]))
+
+
+def test_label_index_sample():
+    labels = np.array([0, 1, 0, 2, 1, 0, 0])
+    LI = LabelIndex(labels)
+    prng = np.random.RandomState(0)
+
+    indices = np.arange(len(labels))
+    for _ in range(20):
+        partners = LI.sample(indices, 2, prng, replace=True)
+        assert partners.shape == (len(labels), 2)
+        assert np.all(labels[partners] == labels[indices, None])
+
+    for _ in range(20):
+        partners = LI.sample(indices, 1, prng, avoid_identity=True)
+        for i, [p] in enumerate(partners):
+            if LI.group_size(labels[i]) > 1:
+                assert p != i
+            else:
+                assert p == i
+
+    # Group of 0 has 4 members, thus 3 distinct partners besides the index
+    for _ in range(20):
+        partners = LI.sample([0, 2, 5, 6], 3, prng, avoid_identity=True)
+        for i, p in zip([0, 2, 5, 6], partners):
+            assert len(set(p)) == 3
+            assert i not in p
+            assert np.all(labels[p] == 0)
+
+
+def test_label_index_sample_balanced():
+    labels = np.array([0] * 98 + [1, 2])
+    LI = LabelIndex(labels)
+
+    samples = LI.sample_balanced(3000, np.random.RandomState(0))
+    counts = np.bincount(labels[samples])
+
+    assert np.all(counts > 800)
+    assert isinstance(
+        LI.sample_balanced(prng=np.random.RandomState(0)), (int, np.integer)
+    )
+
+
+def test_label_index_save_load(tmpdir):
+    labels = np.array([3, 1, 3, 2, 1])
+    LI = LabelIndex(labels)
+
+    root = str(tmpdir.join("label_indices", "key"))
+    assert not LabelIndex.exists(root)
+    LI.save(root)
+    assert LabelIndex.exists(root)
+
+    LI2 = LabelIndex.load(root)
+    for value in [1, 2, 3]:
+        assert np.all(LI.indices(value) == LI2.indices(value))
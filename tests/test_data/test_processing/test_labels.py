@@ -1,7 +1,12 @@
 import pytest
+import os
 import numpy as np
 from edflow.debug import DebugDataset
-from edflow.data.processing.labels import LabelDataset, ExtraLabelsDataset
+from edflow.data.processing.labels import (
+    LabelDataset,
+    ExtraLabelsDataset,
+    labeler_identity,
+)
 from edflow.util import set_value
 
 
@@ -30,3 +35,105 @@ def test_extra_labels():
 
     assert "new" in E.labels
     assert np.all(E.labels["new"] == np.arange(10))
+
+
+def _square_labeler(dset, idx):
+    return {"square": idx ** 2, "name": "x" * (idx % 3 + 1), "vec": np.ones(2) * idx}
+
+
+@pytest.mark.parametrize("n_processes", [None, 2])
+def test_extra_labels_parallel(n_processes):
+    D = DebugDataset(size=10)
+
+    E = ExtraLabelsDataset(D, _square_labeler, n_processes=n_processes, chunk_size=3)
+
+    assert E.labels["square"].dtype == np.int64
+    assert np.all(E.labels["square"] == np.arange(10) ** 2)
+    assert list(E.labels["name"][:4]) == ["x", "xx", "xxx", "x"]
+    assert E.labels["vec"].shape == (10, 2)
+    assert np.all(E.labels["vec"][:, 0] == np.arange(10))
+
+
+def test_extra_labels_cache(tmpdir):
+    calls = []
+
+    def labeler(dset, idx):
+        calls.append(idx)
+        return {"new": idx + 1}
+
+    cache_root = str(tmpdir)
+    E = ExtraLabelsDataset(DebugDataset(size=10), labeler, cache_root=cache_root)
+    assert len(calls) == 11
+    assert len(os.listdir(cache_root)) == 1
+
+    E = ExtraLabelsDataset(DebugDataset(size=10), labeler, cache_root=cache_root)
+    assert len(calls) == 11
+    assert np.all(E.labels["new"] == np.arange(1, 11))
+
+    # A different base dataset results in a new entry
+    E = ExtraLabelsDataset(DebugDataset(size=5), labeler, cache_root=cache_root)
+    assert len(calls) == 17
+    assert len(os.listdir(cache_root)) == 2
+
+
+def _offset_labeler(dset, idx, offset=0):
+    return {"new": idx + offset}
+
+
+class OffsetLabeler(object):
+    def __init__(self, offset, table=None):
+        self.offset = offset
+        self.table = table
+
+    def __call__(self, dset, idx):
+        return {"new": idx + self.offset}
+
+
+def test_labeler_identity():
+    from functools import partial
+
+    a = labeler_identity(partial(_offset_labeler, offset=1))
+    assert a == labeler_identity(partial(_offset_labeler, offset=1))
+    assert a != labeler_identity(partial(_offset_labeler, offset=2))
+
+    a = labeler_identity(OffsetLabeler(1, np.arange(1000)))
+    assert a == labeler_identity(OffsetLabeler(1, np.arange(1000)))
+    assert a != labeler_identity(OffsetLabeler(2, np.arange(1000)))
+    table = np.arange(1000)
+    table[500] = 0
+    assert a != labeler_identity(OffsetLabeler(1, table))
+
+    with pytest.raises(ValueError):
+        labeler_identity(OffsetLabeler(1, object()))
+
+
+def test_extra_labels_cache_partial(tmpdir):
+    from functools import partial
+
+    cache_root = str(tmpdir)
+    for offset in [1, 2, 1]:
+        E = ExtraLabelsDataset(
+            DebugDataset(size=4),
+            partial(_offset_labeler, offset=offset),
+            cache_root=cache_root,
+        )
+        assert list(E.labels["new"]) == [offset + i for i in range(4)]
+    assert len(os.listdir(cache_root)) == 2
+
+    E = ExtraLabelsDataset(
+        DebugDataset(size=4),
+        OffsetLabeler(1, object()),
+        cache_root=cache_root,
+        cache_key="offset-1",
+    )
+    assert len(os.listdir(cache_root)) == 3
+
+
+def test_extra_labels_upcast():
+    E = ExtraLabelsDataset(
+        DebugDataset(size=6),
+        lambda dset, idx: {"new": idx if idx < 3 else idx + 0.5},
+        chunk_size=2,
+    )
+    assert E.labels["new"].dtype == np.float64
+    assert list(E.labels["new"]) == [0, 1, 2, 3.5, 4.5, 5.5]
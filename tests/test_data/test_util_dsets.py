@@ -0,0 +1,85 @@
+import pytest
+import os
+import numpy as np
+
+from edflow.data.util.util_dsets import DataFolder, scan_directory
+
+
+def _setup(root):
+    for sub in ["a", "b", os.path.join("b", "c")]:
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+    for i in range(12):
+        sub = ["a", "b", os.path.join("b", "c")][i % 3]
+        with open(os.path.join(root, sub, "{:0>2d}.txt".format(i)), "w") as f:
+            f.write(str(i))
+    with open(os.path.join(root, "a", "ignored.dat"), "w") as f:
+        f.write("")
+
+
+def label_fn(path):
+    name, ext = os.path.splitext(os.path.basename(path))
+    if ext != ".txt":
+        return None
+    return {"fid": int(name), "parity": int(name) % 2}
+
+
+def read_fn(path):
+    with open(path) as f:
+        return {"content": f.read()}
+
+
+def test_scan_directory(tmpdir):
+    root = str(tmpdir)
+    _setup(root)
+
+    files, dir_mtimes = scan_directory(root, n_threads=2)
+
+    assert len(files) == 13
+    assert files == sorted(files)
+    assert sorted(dir_mtimes) == sorted(
+        [root] + [os.path.join(root, s) for s in ["a", "b", os.path.join("b", "c")]]
+    )
+
+
+@pytest.mark.parametrize("n_processes", [None, 2])
+def test_data_folder(tmpdir, n_processes):
+    root = str(tmpdir)
+    _setup(root)
+
+    D = DataFolder(
+        root, read_fn, label_fn, sort_keys=["parity", "fid"], n_processes=n_processes
+    )
+
+    assert len(D) == 12
+    assert list(D.labels["fid"]) == [0, 2, 4, 6, 8, 10, 1, 3, 5, 7, 9, 11]
+    assert D[1]["content"] == "2"
+    assert D[1]["fid"] == 2
+    assert D[1]["file_path_"].endswith("02.txt")
+
+
+def test_data_folder_cache(tmpdir):
+    root = str(tmpdir.join("data"))
+    _setup(root)
+    cache_path = str(tmpdir.join("cache", "labels.npz"))
+
+    calls = []
+
+    def counting_label_fn(path):
+        calls.append(path)
+        return label_fn(path)
+
+    D = DataFolder(root, read_fn, counting_label_fn, cache_path=cache_path)
+    assert os.path.exists(cache_path)
+    assert len(calls) == 13
+
+    D = DataFolder(root, read_fn, counting_label_fn, cache_path=cache_path)
+    assert len(calls) == 13
+    assert len(D) == 12
+    assert D[0]["content"] == "0"
+
+    # Changing a directory invalidates the cache
+    with open(os.path.join(root, "b", "c", "12.txt"), "w") as f:
+        f.write("12")
+    D = DataFolder(root, read_fn, counting_label_fn, cache_path=cache_path)
+    assert len(D) == 13
+    assert len(calls) == 27
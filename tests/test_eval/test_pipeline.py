@@ -0,0 +1,276 @@
+import os
+
+import numpy as np
+import pytest
+
+from edflow.eval.pipeline import (
+    EvalHook,
+    EvalDataFolder,
+    EvalIndexWriter,
+    EvalLabeler,
+    EvalReader,
+    OutputWriterPool,
+    read_meta_data,
+    save_output,
+)
+
+
+def write_outputs(root, indices, chunk_size=2):
+    save_root = os.path.join(root, "model_outputs")
+    os.makedirs(save_root)
+    csv_path = os.path.join(root, "model_output.csv")
+
+    writer = EvalIndexWriter(csv_path, {"dataset": "a.b.C"}, chunk_size=chunk_size)
+    for batch in np.array_split(np.array(indices), 3):
+        outputs = {
+            "step_ops": {
+                "image": np.stack([np.full([4, 4, 3], i / 10.0) for i in batch]),
+                "code": np.stack([np.full([5], i, dtype=np.float32) for i in batch]),
+            }
+        }
+        for idx, path_dict in save_output(save_root, outputs, batch).items():
+            writer.append(idx, path_dict)
+    writer.flush()
+    return csv_path
+
+
+def test_index_writer(tmpdir):
+    root = str(tmpdir)
+    csv_path = write_outputs(root, list(range(7)))
+
+    assert read_meta_data(csv_path) == {"dataset": "a.b.C"}
+
+    with open(csv_path) as f:
+        rows = [l for l in f.read().splitlines() if not l.startswith("#")]
+    assert rows[0] == "save_index_,code_path,image_path"
+    assert len(rows) == 8
+
+    D = EvalDataFolder(root)
+    assert len(D) == 7
+    for i in range(7):
+        assert np.all(D[i]["code"] == i)
+        assert D[i]["image"].shape == (4, 4, 3)
+
+
+def test_index_writer_unordered(tmpdir):
+    root = str(tmpdir)
+    indices = [5, 2, 0, 6, 1, 4, 3]
+    csv_path = write_outputs(root, indices, chunk_size=100)
+
+    D = EvalDataFolder(csv_path)
+    assert len(D) == 7
+    for i in range(7):
+        assert np.all(D[i]["code"] == i)
+    assert list(D.labels["save_index_"]) == list(range(7))
+
+
+def test_index_writer_no_rows(tmpdir):
+    csv_path = str(tmpdir.join("model_output.csv"))
+    writer = EvalIndexWriter(csv_path, {"a": 1})
+    writer.append(0, {})
+    writer.flush()
+
+    assert read_meta_data(csv_path) == {"a": 1}
+
+
+def failing_saver(savepath, datum):
+    raise IOError("disk full")
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_output_writer_pool(tmpdir, processes):
+    root = str(tmpdir)
+    writer = OutputWriterPool(n_workers=2, max_pending=3, processes=processes)
+    known_dirs = set()
+
+    outputs = {
+        "step_ops": {
+            "image": np.random.uniform(size=[6, 8, 8, 3]),
+            "text": ["a", "b", "c", "d", "e", "f"],
+            "sub": [0, 0, 1, 1, 2, 2],
+        }
+    }
+    path_dicts = save_output(
+        root,
+        outputs,
+        list(range(6)),
+        sub_dir_keys=["sub"],
+        writer=writer,
+        known_dirs=known_dirs,
+    )
+    assert writer.queue_depth <= 3
+    assert len(known_dirs) == 3
+
+    n_written, max_depth = writer.flush()
+    assert n_written == 12
+    assert 1 <= max_depth <= 3
+    assert writer.queue_depth == 0
+
+    for idx, path_dict in path_dicts.items():
+        assert os.path.exists(path_dict["image_path"])
+        assert "sub:{}".format(idx // 2) in path_dict["image_path"]
+        with open(path_dict["text_path"]) as f:
+            assert f.read() == "abcdef"[idx] + "\n"
+
+    writer.submit(failing_saver, "x", np.zeros(3))
+    with pytest.raises(IOError):
+        writer.flush()
+    writer.close()
+
+    # Slots are released if the pool does not accept outputs anymore.
+    with pytest.raises(RuntimeError):
+        writer.submit(failing_saver, "x", np.zeros(3))
+    assert writer.slots._value == 3
+
+
+class Project(object):
+    def __init__(self, latest_eval):
+        self.latest_eval = latest_eval
+
+
+def run_eval_hook(tmpdir, monkeypatch, n=10, batch_size=4, **hook_kwargs):
+    import edflow.eval.pipeline as pipeline
+
+    monkeypatch.setattr(pipeline, "P", Project(str(tmpdir)))
+
+    hook = EvalHook(
+        list(range(n)),
+        config={"dataset": "a.b.C"},
+        step_getter=lambda: 7,
+        **hook_kwargs
+    )
+    hook.before_epoch(0)
+    for step, start in enumerate(range(0, n, batch_size)):
+        batch = np.arange(start, min(start + batch_size, n))
+        hook.before_step(step, None, None, {"index_": batch})
+        outputs = {
+            "step_ops": {
+                "image": np.stack([np.full([4, 4, 3], i / n) for i in batch]),
+                "code": np.stack([np.full([5], i, dtype=np.float32) for i in batch]),
+            },
+            "labels": {"index_": batch},
+        }
+        hook.after_step(step, outputs)
+    hook.after_epoch(0)
+    return os.path.join(str(tmpdir), "7")
+
+
+@pytest.mark.parametrize("n_writers", [0, 2])
+def test_eval_hook(tmpdir, monkeypatch, n_writers):
+    root = run_eval_hook(tmpdir, monkeypatch, n_writers=n_writers)
+
+    D = EvalDataFolder(root)
+    assert len(D) == 10
+    for i in range(10):
+        assert np.all(D[i]["code"] == i)
+        assert D[i]["image"].shape == (4, 4, 3)
+
+
+@pytest.mark.parametrize("memmap_outputs", [True, ["code"]])
+def test_eval_hook_memmap_outputs(tmpdir, monkeypatch, memmap_outputs):
+    root = run_eval_hook(tmpdir, monkeypatch, memmap_outputs=memmap_outputs)
+
+    columns = os.listdir(os.path.join(root, "model_outputs", "columns"))
+    assert "code-*-10x5-*-float32.npy" in columns
+
+    D = EvalDataFolder(root)
+    assert len(D) == 10
+    assert isinstance(D.labels["code"], np.memmap)
+    for i in range(10):
+        code = D[i]["code"]
+        assert np.all(code == i)
+        assert isinstance(code.base, np.memmap)
+        assert D[i]["image"].shape == (4, 4, 3)
+
+    outputs = os.listdir(os.path.join(root, "model_outputs"))
+    has_image_files = "image_000000.png" in outputs
+    assert has_image_files == (memmap_outputs is not True)
+
+
+def test_eval_data_folder_without_listing(tmpdir, monkeypatch):
+    import edflow.eval.pipeline as pipeline
+
+    root = run_eval_hook(
+        tmpdir, monkeypatch, memmap_outputs=["code"], labels_key="labels"
+    )
+    outputs_root = os.path.join(root, "model_outputs")
+    assert pipeline.read_label_manifest(outputs_root) == {
+        "labels": ["index_-*-10-*-int64.npy"],
+        "columns": ["code-*-10x5-*-float32.npy"],
+    }
+
+    def listdir(path):
+        raise AssertionError("Listed {}".format(path))
+
+    def load_by_heuristic(path):
+        raise AssertionError("Loader chosen for {}".format(path))
+
+    monkeypatch.setattr(pipeline.os, "listdir", listdir)
+    monkeypatch.setattr(pipeline, "load_by_heuristic", load_by_heuristic)
+
+    D = EvalDataFolder(root)
+    assert len(D) == 10
+    assert list(D.labels["index_"]) == list(range(10))
+    for i in range(10):
+        assert np.all(D[i]["code"] == i)
+        assert D[i]["image"].shape == (4, 4, 3)
+
+
+def test_eval_reader():
+    reader = EvalReader("")
+    reader.assign_loaders(
+        {"a_path": ["", "x/a_000001.npy"], "b_path": [np.nan, np.nan], "c": [1, 2]}
+    )
+    assert list(reader.loaders.keys()) == ["a_path"]
+    name, ext, _ = reader.loaders["a_path"]
+    assert (name, ext) == ("a", ".npy")
+
+    with pytest.raises(ValueError):
+        reader.assign_loaders({"a_path": ["x/a_000001.jpg"]})
+
+
+def test_eval_labeler(tmpdir, monkeypatch):
+    import edflow.eval.pipeline as pipeline
+
+    folder = tmpdir.mkdir("sub:a--b")
+    for i in range(3):
+        np.save(str(folder.join("code_{:0>6d}.npy".format(i))), np.zeros(1))
+        folder.join("text_{:0>6d}.txt".format(i)).write("x")
+    folder.join("notes.md").write("x")
+
+    listed = []
+    listdir = os.listdir
+    monkeypatch.setattr(
+        pipeline.os, "listdir", lambda path: listed.append(path) or listdir(path)
+    )
+
+    labeler = EvalLabeler(str(tmpdir))
+    for i in range(3):
+        path = str(folder.join("code_{:0>6d}.npy".format(i)))
+        labels = labeler(path)
+        assert labels["save_index_"] == i
+        assert labels["sub"] == "a/b"
+        assert labels["code_path"] == path
+        assert labels["text_path"] == str(folder.join("text_{:0>6d}.txt".format(i)))
+        assert labeler(str(folder.join("text_{:0>6d}.txt".format(i)))) is None
+    assert len(listed) == 1
+
+
+def test_eval_hook_exception(tmpdir, monkeypatch):
+    import edflow.eval.pipeline as pipeline
+
+    monkeypatch.setattr(pipeline, "P", Project(str(tmpdir)))
+    monkeypatch.setattr(pipeline, "determine_saver", lambda x: (failing_saver, "npy"))
+
+    hook = EvalHook(
+        list(range(4)), config={"dataset": "a.b.C"}, step_getter=lambda: 7, n_writers=2
+    )
+    hook.before_epoch(0)
+    hook.before_step(0, None, None, {"index_": np.arange(4)})
+    hook.after_step(0, {"step_ops": {"code": np.zeros([4, 5])}})
+    writer = hook.writer
+
+    # The saver error is logged and does not replace the original exception.
+    hook.at_exception(ValueError("original"))
+    assert hook.writer is None
+    assert writer.executor._shutdown
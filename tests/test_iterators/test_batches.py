@@ -116,3 +116,18 @@ def test_deep_lod2dol_v3_wrong_inputs():
 
     with pytest.raises(Exception):
         dol = batches._deep_lod2dol_v3(lod)
+
+
+def test_contiguous_order_sampler():
+    sampler = batches.ContiguousOrderSampler(4, np.random.RandomState(0))
+
+    order = sampler(np.arange(10), 0)
+
+    assert sorted(order) == list(range(10))
+    # Inside each run the indices are contiguous
+    for k in range(1, len(order)):
+        if order[k] % 4 != 0:
+            assert order[k] == order[k - 1] + 1
+
+    with pytest.raises(ValueError):
+        batches.ContiguousOrderSampler(0)